@@ -0,0 +1,240 @@
+"""Tarifas de varias máquinas y versiones en una base SQLite.
+
+En vez de una copia de date.ods por láser y por revisión de precios, cada
+hoja se importa una vez como versión (máquina, vigente_desde) y queda
+guardada: un presupuesto viejo se puede rehacer con la tarifa que valía en
+su fecha. Cada máquina tiene además un perfil con sus valores por defecto
+(costo_maquina, costo_operario, neto_pack, costo_pack).
+
+    almacen = AlmacenTarifas("tarifas.sqlite")
+    almacen.importar("date.ods", "Laser1", "2026-01-01")
+    vista = almacen.vista("Laser1", "2026-03-15")   # versión vigente ese día
+    motor.calcular_presupuesto(vista, datos)         # búsquedas con SQL preparado
+
+La vista tiene la misma interfaz de búsqueda que tarifas.IndiceTarifas
+(buscar, version); vista.indice() da el IndiceTarifas completo para los
+combobox y el cálculo por lotes.
+"""
+import datetime
+import math
+import sqlite3
+import threading
+
+import motor
+import tarifas
+
+ALMACEN = "tarifas.sqlite"
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS versiones (
+    maquina       TEXT NOT NULL,
+    vigente_desde TEXT NOT NULL,   -- fecha ISO (AAAA-MM-DD)
+    origen        TEXT,
+    importado     TEXT NOT NULL,
+    huella        TEXT NOT NULL,   -- IndiceTarifas.version de las filas importadas
+    PRIMARY KEY (maquina, vigente_desde)
+);
+CREATE TABLE IF NOT EXISTS tarifas (
+    maquina       TEXT NOT NULL,
+    material      TEXT NOT NULL,
+    espesor       REAL NOT NULL,
+    vigente_desde TEXT NOT NULL,
+    orden         INTEGER NOT NULL, -- fila en la hoja original
+    presion, ugello, consumo,
+    duracion REAL, tiempo_1 REAL, tiempo_2 REAL, cw REAL,
+    impulso, m1,
+    costo REAL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS tarifas_clave
+    ON tarifas (maquina, material, espesor, vigente_desde);
+CREATE TABLE IF NOT EXISTS perfiles (
+    maquina        TEXT PRIMARY KEY,
+    costo_maquina  REAL,
+    costo_operario REAL,
+    neto_pack      REAL,
+    costo_pack     REAL
+);
+"""
+
+# Columna de la base -> columna de la hoja 'date'
+COLUMNAS = (
+    ("presion", "Presión "),
+    ("ugello", "Ugello "),
+    ("consumo", "Consumo"),
+    ("duracion", "Duracion"),
+    ("tiempo_1", 1),
+    ("tiempo_2", 2),
+    ("cw", "CW "),
+    ("impulso", "Impulso "),
+    ("m1", "M1"),
+    ("costo", "Costo"),
+)
+CAMPOS_PERFIL = ("costo_maquina", "costo_operario", "neto_pack", "costo_pack")
+
+_BUSCAR = """
+SELECT material, espesor, cw, tiempo_1, tiempo_2, duracion, costo FROM tarifas
+WHERE maquina = ? AND material = ? AND espesor = ? AND vigente_desde = ?
+"""
+_FILAS_VERSION = """
+SELECT material, espesor, cw, tiempo_1, tiempo_2, duracion, costo FROM tarifas
+WHERE maquina = ? AND vigente_desde = ? ORDER BY orden
+"""
+_VERSION_VIGENTE = """
+SELECT vigente_desde, huella FROM versiones
+WHERE maquina = ? AND vigente_desde <= ? ORDER BY vigente_desde DESC LIMIT 1
+"""
+
+
+class ErrorAlmacen(motor.ErrorPresupuesto):
+    """Máquina o versión inexistente en la base de tarifas."""
+
+
+def _celda(valor):
+    # Tipos de NumPy a Python; las celdas vacías (NaN) se guardan como NULL
+    if valor is None:
+        return None
+    if hasattr(valor, "item"):
+        valor = valor.item()
+    if isinstance(valor, float) and math.isnan(valor):
+        return None
+    return valor
+
+
+def _numero(valor):
+    return math.nan if valor is None else float(valor)
+
+
+def _fila(registro):
+    material, espesor, cw, tiempo_1, tiempo_2, duracion, costo = registro
+    return tarifas.FilaTarifa(material, espesor, _numero(cw), _numero(tiempo_1), _numero(tiempo_2),
+                              _numero(duracion), _numero(costo))
+
+
+def _fecha(fecha):
+    """Fecha ISO; None es hoy."""
+    if fecha is None:
+        return datetime.date.today().isoformat()
+    try:
+        return datetime.date.fromisoformat(str(fecha)).isoformat()
+    except ValueError:
+        raise ErrorAlmacen(f"Data non valida (AAAA-MM-GG): {fecha}") from None
+
+
+class AlmacenTarifas:
+    def __init__(self, ruta=ALMACEN):
+        self.ruta = ruta
+        # Las vistas se usan también desde los hilos en segundo plano de la ventana
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self._conexion.executescript(_ESQUEMA)
+        self._candado = threading.Lock()
+
+    def cerrar(self):
+        self._conexion.close()
+
+    def _consultar(self, sql, parametros=()):
+        # sqlite3 guarda las sentencias preparadas por texto SQL: repetir la
+        # misma consulta sólo vuelve a enlazar los parámetros
+        with self._candado:
+            return self._conexion.execute(sql, parametros).fetchall()
+
+    def importar(self, archivo, maquina, vigente_desde=None):
+        """Importa la hoja 'date' de un .ods/.xlsx como versión de `maquina`.
+
+        Si ya existía esa versión (misma máquina y fecha), se reemplaza.
+        Devuelve el número de filas importadas.
+        """
+        vigente_desde = _fecha(vigente_desde)
+        hoja = tarifas.leer_columnas(archivo)
+        filas_hoja = len(hoja["Material"])
+        columnas = {nombre: hoja[columna] if columna in hoja else [None] * filas_hoja
+                    for nombre, columna in COLUMNAS}
+
+        registros = []
+        vistos = set()
+        for orden, (material, espesor) in enumerate(zip(hoja["Material"], hoja["Espesor"])):
+            if not isinstance(material, str) or espesor != espesor:
+                continue
+            clave = (material, float(espesor))
+            if clave in vistos:
+                continue  # vale la primera fila, como en IndiceTarifas
+            vistos.add(clave)
+            registros.append((maquina, material, float(espesor), vigente_desde, orden,
+                              *(_celda(columnas[nombre][orden]) for nombre, _ in COLUMNAS)))
+
+        with self._candado, self._conexion:
+            self._conexion.execute("DELETE FROM tarifas WHERE maquina = ? AND vigente_desde = ?",
+                                   (maquina, vigente_desde))
+            self._conexion.executemany(
+                f"INSERT INTO tarifas (maquina, material, espesor, vigente_desde, orden, "
+                f"{', '.join(nombre for nombre, _ in COLUMNAS)}) "
+                f"VALUES ({', '.join('?' * (5 + len(COLUMNAS)))})", registros)
+            # Misma huella que tendría el IndiceTarifas del archivo
+            filas = self._conexion.execute(_FILAS_VERSION, (maquina, vigente_desde)).fetchall()
+            huella = tarifas.IndiceTarifas(map(_fila, filas)).version
+            self._conexion.execute(
+                "INSERT OR REPLACE INTO versiones VALUES (?, ?, ?, ?, ?)",
+                (maquina, vigente_desde, archivo, datetime.datetime.now().isoformat(timespec="seconds"), huella))
+        return len(registros)
+
+    def versiones(self, maquina=None):
+        """[(maquina, vigente_desde, origen, filas)] de las versiones guardadas."""
+        sql = ("SELECT v.maquina, v.vigente_desde, v.origen, COUNT(t.material) FROM versiones v "
+               "LEFT JOIN tarifas t ON t.maquina = v.maquina AND t.vigente_desde = v.vigente_desde "
+               "{} GROUP BY v.maquina, v.vigente_desde ORDER BY v.maquina, v.vigente_desde")
+        if maquina is None:
+            return self._consultar(sql.format(""))
+        return self._consultar(sql.format("WHERE v.maquina = ?"), (maquina,))
+
+    def maquinas(self):
+        return [fila[0] for fila in self._consultar("SELECT DISTINCT maquina FROM versiones ORDER BY maquina")]
+
+    def vista(self, maquina, fecha=None):
+        """VistaTarifas de la versión de `maquina` vigente en `fecha` (hoy si es None)."""
+        fecha = _fecha(fecha)
+        filas = self._consultar(_VERSION_VIGENTE, (maquina, fecha))
+        if not filas:
+            raise ErrorAlmacen(f"Nessuna tariffa per la macchina '{maquina}' in vigore al {fecha}.")
+        vigente_desde, huella = filas[0]
+        return VistaTarifas(self, maquina, vigente_desde, huella)
+
+    def guardar_perfil(self, maquina, **valores):
+        """Fija valores por defecto de la máquina (los que no se pasan no cambian)."""
+        desconocidos = set(valores) - set(CAMPOS_PERFIL)
+        if desconocidos:
+            raise ErrorAlmacen(f"Campi del profilo sconosciuti: {', '.join(sorted(desconocidos))}")
+        actual = self.perfil(maquina)
+        actual.update({campo: valor for campo, valor in valores.items() if valor is not None})
+        with self._candado, self._conexion:
+            self._conexion.execute(
+                "INSERT OR REPLACE INTO perfiles VALUES (?, ?, ?, ?, ?)",
+                (maquina, *(actual.get(campo) for campo in CAMPOS_PERFIL)))
+
+    def perfil(self, maquina):
+        """Valores por defecto de la máquina que estén definidos (dict)."""
+        filas = self._consultar(f"SELECT {', '.join(CAMPOS_PERFIL)} FROM perfiles WHERE maquina = ?", (maquina,))
+        if not filas:
+            return {}
+        return {campo: valor for campo, valor in zip(CAMPOS_PERFIL, filas[0]) if valor is not None}
+
+
+class VistaTarifas:
+    """Una versión de las tarifas de una máquina, consultada fila a fila."""
+
+    def __init__(self, almacen, maquina, vigente_desde, huella):
+        self.almacen = almacen
+        self.maquina = maquina
+        self.vigente_desde = vigente_desde
+        # Igual a IndiceTarifas.version de las mismas filas (clave del cache de presupuestos)
+        self.version = huella
+        self._indice = None
+
+    def buscar(self, material, espesor):
+        filas = self.almacen._consultar(_BUSCAR, (self.maquina, material, float(espesor), self.vigente_desde))
+        return _fila(filas[0]) if filas else None
+
+    def indice(self):
+        """IndiceTarifas de toda la versión (una consulta, se guarda)."""
+        if self._indice is None:
+            filas = self.almacen._consultar(_FILAS_VERSION, (self.maquina, self.vigente_desde))
+            self._indice = tarifas.IndiceTarifas(_fila(registro) for registro in filas)
+        return self._indice
@@ -0,0 +1,365 @@
+"""Anidado (nesting) de piezas rectangulares en chapas y costo de material amortizado.
+
+motor.py cobra el material de cada pieza como ancho × largo / 1e6 × Costo,
+como si las piezas de un pedido no compartieran chapa ni dejaran retazos.
+Aquí las piezas de cada (Material, Espesor) se acomodan en chapas de un
+formato dado y el costo de las chapas usadas se reparte entre las piezas
+según su área: una pieza paga su área dividida por el aprovechamiento.
+
+La colocación es un skyline bottom-left: cada chapa guarda su perfil
+superior como segmentos horizontales ordenados por x, y una pieza se apoya
+sobre el perfil donde su borde superior quede más bajo. Así nunca se
+comparan piezas entre sí: cada búsqueda recorre sólo los segmentos del
+perfil (unas decenas), y las medidas que ya no entraron en una chapa se
+recuerdan para no volver a probarlas. Se prueban varios órdenes de las
+piezas (por área, lado mayor, ...) y vale el que usa menos chapas; con
+trabajadores > 1 los órdenes y los grupos se reparten entre procesos.
+
+    filas, grupos = anidar_lote(indice, trabajos, hoja=(1500, 3000), separacion=5)
+
+La tabla de trabajos es la de lote.py (Material, Espesor, ancho, largo) con
+las columnas opcionales cantidad (1 si falta) y rotar (sí si falta).
+"""
+import concurrent.futures
+import re
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+import motor
+
+# Formato de chapa por defecto: ancho × largo (mm)
+HOJA = (1500.0, 3000.0)
+
+# Chapas en las que se sigue intentando colocar (las anteriores se dan por llenas)
+ABIERTAS = 8
+
+COLUMNA_ERROR = "errore"
+FUERA_DE_HOJA = "Il pezzo non entra nella lamiera."
+COSTO_VACIO = "Il campo 'Costo' è vuoto o mancante per questo materiale."
+
+_EPS = 1e-9
+
+
+class Colocacion(NamedTuple):
+    fila: object   # índice de la fila en la tabla de trabajos
+    hoja: int      # número de chapa del grupo, desde 0
+    x: float       # mm desde el borde izquierdo de la chapa
+    y: float       # mm desde el borde inferior
+    ancho: float   # medidas ya giradas, sobre la chapa
+    largo: float
+    rotada: bool
+
+
+class Anidado(NamedTuple):
+    orden: str
+    hojas: int
+    colocaciones: list
+    fuera: list          # filas que no entran ni en una chapa vacía
+    altura_ultima: float  # mm ocupados de la última chapa (desempate)
+
+
+class ResultadoGrupo(NamedTuple):
+    material: str
+    espesor: float
+    ancho_hoja: float
+    largo_hoja: float
+    hojas: int
+    piezas: int
+    utilizacion: float      # área de las piezas / área de las chapas
+    costo_hoja: float       # EUR
+    costo_material: float   # EUR de todas las chapas
+    costo_sin_anidado: float  # suma de ancho × largo × Costo de las piezas
+    orden: str
+    colocaciones: list
+
+
+class _Hoja:
+    """Perfil superior (skyline) de una chapa: segmentos [x, y, ancho] ordenados por x."""
+
+    __slots__ = ("ancho", "largo", "segmentos", "libre", "piso", "fallidas")
+
+    def __init__(self, ancho, largo):
+        self.ancho = ancho
+        self.largo = largo
+        self.segmentos = [[0.0, 0.0, ancho]]
+        self.libre = ancho * largo
+        self.piso = 0.0  # segmento más bajo del perfil
+        # Medidas que no entraron: el perfil sólo sube, así que no entrarán después
+        self.fallidas = set()
+
+    def buscar(self, ancho, largo, rotar):
+        """(tope, x, i, y, ancho, largo, rotada) de la mejor posición, o None."""
+        clave = (ancho, largo, rotar)
+        if (clave in self.fallidas or ancho * largo > self.libre + _EPS
+                or self.piso + (min(ancho, largo) if rotar else largo) > self.largo + _EPS):
+            return None
+        orientaciones = [(ancho, largo, False)]
+        if rotar and ancho != largo:
+            orientaciones.append((largo, ancho, True))
+
+        segmentos = self.segmentos
+        n = len(segmentos)
+        mejor = None
+        for w, h, rotada in orientaciones:
+            if w > self.ancho + _EPS or h > self.largo + _EPS:
+                continue
+            for i in range(n):
+                x = segmentos[i][0]
+                fin = x + w
+                if fin > self.ancho + _EPS:
+                    break
+                # Apoyo: el segmento más alto de los que cubre la pieza
+                y = 0.0
+                j = i
+                while j < n and segmentos[j][0] < fin - _EPS:
+                    if segmentos[j][1] > y:
+                        y = segmentos[j][1]
+                    j += 1
+                tope = y + h
+                if tope > self.largo + _EPS:
+                    continue
+                if mejor is None or tope < mejor[0] - _EPS or (tope < mejor[0] + _EPS and x < mejor[1]):
+                    mejor = (tope, x, i, y, w, h, rotada)
+        if mejor is None:
+            self.fallidas.add(clave)
+        return mejor
+
+    def colocar(self, i, x, y, ancho, largo):
+        segmentos = self.segmentos
+        segmentos.insert(i, [x, y + largo, ancho])
+        fin = x + ancho
+        # Recortar o quitar los segmentos que quedaron debajo de la pieza
+        j = i + 1
+        while j < len(segmentos):
+            segmento = segmentos[j]
+            if segmento[0] >= fin - _EPS:
+                break
+            sobra = segmento[0] + segmento[2] - fin
+            if sobra <= _EPS:
+                del segmentos[j]
+            else:
+                segmento[0] = fin
+                segmento[2] = sobra
+                break
+        # Unir con los vecinos a la misma altura
+        if i + 1 < len(segmentos) and abs(segmentos[i + 1][1] - segmentos[i][1]) <= _EPS:
+            segmentos[i][2] += segmentos[i + 1][2]
+            del segmentos[i + 1]
+        if i > 0 and abs(segmentos[i - 1][1] - segmentos[i][1]) <= _EPS:
+            segmentos[i - 1][2] += segmentos[i][2]
+            del segmentos[i]
+        self.libre -= ancho * largo
+        self.piso = min(segmento[1] for segmento in segmentos)
+
+    def altura(self):
+        return max(segmento[1] for segmento in self.segmentos)
+
+
+# Órdenes de las piezas que se prueban; cada pieza es (fila, ancho, largo, rotar)
+ORDENES = {
+    "area": lambda p: (-(p[1] * p[2]), -max(p[1], p[2])),
+    "lado_mayor": lambda p: (-max(p[1], p[2]), -min(p[1], p[2])),
+    "alto": lambda p: ((-min(p[1], p[2]) if p[3] else -p[2]), -max(p[1], p[2])),
+    "perimetro": lambda p: (-(p[1] + p[2]), -max(p[1], p[2])),
+}
+
+
+def anidar(piezas, ancho_hoja, largo_hoja, separacion=0.0, orden="area"):
+    """Acomoda `piezas` [(fila, ancho, largo, rotar)] en chapas de ancho_hoja × largo_hoja.
+
+    `separacion` (mm) queda entre pieza y pieza y contra los bordes de la
+    chapa. Devuelve un Anidado.
+    """
+    # Cada pieza ocupa su medida más la separación; la chapa útil pierde un margen
+    util_ancho = ancho_hoja - separacion
+    util_largo = largo_hoja - separacion
+    hojas = []
+    colocaciones = []
+    fuera = []
+    for fila, ancho, largo, rotar in sorted(piezas, key=ORDENES[orden]):
+        w = ancho + separacion
+        h = largo + separacion
+        # La primera chapa abierta donde entre (first fit)
+        for numero in range(max(0, len(hojas) - ABIERTAS), len(hojas)):
+            posicion = hojas[numero].buscar(w, h, rotar)
+            if posicion is not None:
+                break
+        else:
+            hoja = _Hoja(util_ancho, util_largo)
+            posicion = hoja.buscar(w, h, rotar)
+            if posicion is None:
+                fuera.append(fila)
+                continue
+            hojas.append(hoja)
+            numero = len(hojas) - 1
+        _, x, i, y, w_colocada, h_colocada, rotada = posicion
+        hojas[numero].colocar(i, x, y, w_colocada, h_colocada)
+        colocaciones.append(Colocacion(fila, numero, x + separacion, y + separacion,
+                                       w_colocada - separacion, h_colocada - separacion, rotada))
+    return Anidado(orden, len(hojas), colocaciones, fuera, hojas[-1].altura() if hojas else 0.0)
+
+
+def _anidar_tarea(clave, piezas, ancho_hoja, largo_hoja, separacion, orden):
+    return clave, anidar(piezas, ancho_hoja, largo_hoja, separacion, orden)
+
+
+def _mejor(anterior, nuevo):
+    # Menos chapas; a igualdad, la última chapa menos ocupada (el retazo más grande)
+    if anterior is None:
+        return nuevo
+    if (nuevo.hojas, nuevo.altura_ultima) < (anterior.hojas, anterior.altura_ultima):
+        return nuevo
+    return anterior
+
+
+def anidar_grupos(grupos, separacion=0.0, ordenes=tuple(ORDENES), trabajadores=1):
+    """{clave: Anidado} del mejor orden de cada grupo.
+
+    `grupos` es {clave: (piezas, ancho_hoja, largo_hoja)}. Con trabajadores > 1
+    cada (grupo, orden) se calcula en un proceso aparte.
+    """
+    tareas = [(clave, piezas, ancho, largo, separacion, orden)
+              for clave, (piezas, ancho, largo) in grupos.items() for orden in ordenes]
+    mejores = {}
+    if trabajadores <= 1 or len(tareas) <= 1:
+        for tarea in tareas:
+            clave, anidado = _anidar_tarea(*tarea)
+            mejores[clave] = _mejor(mejores.get(clave), anidado)
+        return mejores
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=trabajadores) as pool:
+        futuros = [pool.submit(_anidar_tarea, *tarea) for tarea in tareas]
+        for futuro in concurrent.futures.as_completed(futuros):
+            clave, anidado = futuro.result()
+            mejores[clave] = _mejor(mejores.get(clave), anidado)
+    return mejores
+
+
+def leer_formato(texto):
+    """(ancho, largo) de un texto como '1500x3000'."""
+    partes = re.split(r"\s*[x×X*]\s*", texto.strip())
+    try:
+        ancho, largo = (float(parte.replace(",", ".")) for parte in partes)
+    except ValueError:
+        raise motor.ErrorPresupuesto(f"Formato di lamiera non valido (ancho x largo): {texto}") from None
+    if ancho <= 0 or largo <= 0:
+        raise motor.ErrorPresupuesto(f"Formato di lamiera non valido (ancho x largo): {texto}")
+    return ancho, largo
+
+
+def leer_formatos(tabla):
+    """{(material, espesor) o material: (ancho, largo)} de una tabla Material, Espesor, ancho, largo.
+
+    Una fila sin Espesor vale para todos los espesores del material.
+    """
+    formatos = {}
+    for material, espesor, ancho, largo in zip(tabla["Material"], tabla["Espesor"], tabla["ancho"], tabla["largo"]):
+        clave = material if motor.es_vacio(espesor) else (material, float(espesor))
+        formatos[clave] = (float(ancho), float(largo))
+    return formatos
+
+
+def formato_de(formatos, material, espesor, hoja=HOJA):
+    return formatos.get((material, espesor)) or formatos.get(material) or hoja
+
+
+def _si_no(valor):
+    if motor.es_vacio(valor):
+        return True
+    if isinstance(valor, str):
+        return valor.strip().lower() not in ("0", "no", "n", "false", "falso")
+    return bool(valor)
+
+
+def anidar_lote(indice, trabajos, formatos=None, hoja=HOJA, separacion=0.0, trabajadores=1):
+    """Anida las piezas de `trabajos` por (Material, Espesor).
+
+    Devuelve (filas, grupos): un DataFrame con el mismo índice que la entrada
+    (costo de material sin anidar y amortizado, por unidad y por fila) y la
+    lista de ResultadoGrupo.
+    """
+    formatos = formatos or {}
+    for columna in ("Material", "Espesor", "ancho", "largo"):
+        if columna not in trabajos:
+            raise motor.ErrorPresupuesto(f"Colonna mancante: {columna}")
+    n = len(trabajos)
+    materiales = trabajos["Material"].to_numpy(dtype=object)
+    espesores = pd.to_numeric(trabajos["Espesor"], errors="coerce").to_numpy(dtype=float)
+    anchos = pd.to_numeric(trabajos["ancho"], errors="coerce").to_numpy(dtype=float)
+    largos = pd.to_numeric(trabajos["largo"], errors="coerce").to_numpy(dtype=float)
+    if "cantidad" in trabajos:
+        cantidades = pd.to_numeric(trabajos["cantidad"], errors="coerce").to_numpy(dtype=float)
+    else:
+        cantidades = np.ones(n)
+    rotar = [_si_no(v) for v in trabajos["rotar"]] if "rotar" in trabajos else [True] * n
+
+    errores = np.full(n, "", dtype=object)
+    costo_peso = np.full(n, np.nan)
+    filas_por_grupo = {}
+    for posicion, fila in enumerate(trabajos.index):
+        material, espesor = materiales[posicion], espesores[posicion]
+        if motor.es_vacio(material) or espesor != espesor:
+            errores[posicion] = motor.SIN_MATERIAL
+            continue
+        medidas = (anchos[posicion], largos[posicion], cantidades[posicion])
+        if any(v != v or v <= 0 for v in medidas) or cantidades[posicion] != int(cantidades[posicion]):
+            errores[posicion] = motor.NUMEROS_INVALIDOS
+            continue
+        tarifa = indice.buscar(material, espesor)
+        if tarifa is None:
+            errores[posicion] = motor.SIN_DATOS
+            continue
+        if motor.es_vacio(tarifa.costo):
+            errores[posicion] = COSTO_VACIO
+            continue
+        costo_peso[posicion] = motor.calcular_costo_peso(tarifa, anchos[posicion], largos[posicion])
+        filas_por_grupo.setdefault((material, float(espesor)), []).append(posicion)
+
+    grupos = {}
+    for clave, posiciones in filas_por_grupo.items():
+        ancho_hoja, largo_hoja = formato_de(formatos, *clave, hoja=hoja)
+        piezas = [(posicion, anchos[posicion], largos[posicion], rotar[posicion])
+                  for posicion in posiciones for _ in range(int(cantidades[posicion]))]
+        grupos[clave] = (piezas, ancho_hoja, largo_hoja)
+    anidados = anidar_grupos(grupos, separacion, trabajadores=trabajadores)
+
+    costo_anidado = np.full(n, np.nan)
+    resultados = []
+    for (material, espesor), (piezas, ancho_hoja, largo_hoja) in grupos.items():
+        anidado = anidados[(material, espesor)]
+        for posicion in anidado.fuera:
+            errores[posicion] = FUERA_DE_HOJA
+        area_hojas = anidado.hojas * ancho_hoja * largo_hoja
+        area_piezas = sum(c.ancho * c.largo for c in anidado.colocaciones)
+        costo_hoja = motor.calcular_costo_peso(indice.buscar(material, espesor), ancho_hoja, largo_hoja)
+        costo_material = anidado.hojas * costo_hoja
+        if area_piezas:
+            # Cada pieza paga su parte del área de las piezas colocadas
+            por_mm2 = costo_material / area_piezas
+            colocadas = sorted({c.fila for c in anidado.colocaciones})
+            costo_anidado[colocadas] = anchos[colocadas] * largos[colocadas] * por_mm2
+        resultados.append(ResultadoGrupo(
+            material=material,
+            espesor=espesor,
+            ancho_hoja=ancho_hoja,
+            largo_hoja=largo_hoja,
+            hojas=anidado.hojas,
+            piezas=len(anidado.colocaciones),
+            utilizacion=area_piezas / area_hojas if area_hojas else 0.0,
+            costo_hoja=costo_hoja,
+            costo_material=costo_material,
+            costo_sin_anidado=float(np.nansum(costo_peso[[c.fila for c in anidado.colocaciones]])),
+            orden=anidado.orden,
+            colocaciones=[c._replace(fila=trabajos.index[c.fila]) for c in anidado.colocaciones],
+        ))
+
+    invalida = errores != ""
+    filas = pd.DataFrame({
+        "costo_peso": np.where(invalida, np.nan, costo_peso),
+        "costo_peso_anidado": np.where(invalida, np.nan, costo_anidado),
+        "costo_peso_anidado_fila": np.where(invalida, np.nan, costo_anidado * cantidades),
+        COLUMNA_ERROR: errores,
+    }, index=trabajos.index)
+    return filas, resultados
@@ -1,6 +1,18 @@
+import os
+import sys
+import time
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import pandas as pd
+
+import cache_presupuestos
+import en_vivo
+import informe
+import instrumentacion
+import motor
+import segundo_plano
+import tabla_virtual
+import tarifas
+import vigilante
 
 # Ruta del archivo predeterminado
 ARCHIVO = "date.ods"  # O "date.xlsx" si usas archivo Excel
@@ -8,295 +20,491 @@ ARCHIVO = "date.ods"  # O "date.xlsx" si usas archivo Excel
 # Variable global para almacenar la ruta del archivo
 archivo_cargado = ARCHIVO
 
-# Variable global para almacenar los datos filtrados como diccionario
-datos_filtrados_dict = {}
+# Último presupuesto mostrado en la tabla (lo usa generar_informe)
+ultimo_presupuesto = None
+
+# Índice de la tabla de tarifas; se carga en segundo plano al abrir la ventana
+indice = None
+
+# Grafo del presupuesto en vivo: cada cambio recalcula sólo lo que depende de él
+grafo_presupuesto = en_vivo.crear_grafo()
+RETARDO_EN_VIVO_MS = 150
+recalculo_pendiente = None
+
+# Misura delle fasi (--profile o LASER_PERFIL=1); F12 apre il pannello di debug
+if "--profile" in sys.argv:
+    instrumentacion.activar()
+panel_debug = None
+capturar_clic = False
+
+# Misura dell'avvio (medir_arranque.py, perfil_arranque.py)
+MEDIR_ARRANQUE = bool(os.environ.get("LASER_MEDIR_ARRANQUE"))
+
+# Finestra con i risultati di un lotto (tabella virtuale)
+ventana_lote = None
+tabla_lote = None
+
+# Finestra "Confronta tutti": lo stesso pezzo in ogni materiale e spessore
+ventana_comparacion = None
+tabla_comparacion = None
+resumen_comparacion = None
+
+# Base di tariffe (almacen_tarifas.py) e macchina scelta; None: si usa il file
+ruta_almacen = None
+vista_maquina = None
+
+# Preventivi già calcolati (memoria + .presupuestos.sqlite) per "Calcolare i Dati"
+cache_quotes = cache_presupuestos.CachePresupuestos()
 
 def cargar_archivo():
-    global archivo_cargado  # Usamos la variable global para almacenar la ruta
+    global archivo_cargado, vista_maquina  # Usamos la variable global para almacenar la ruta
     archivo = filedialog.askopenfilename(filetypes=[("Archivos ODS", "*.ods"), ("Archivos Excel", "*.xlsx")])
     if archivo:
         archivo_cargado = archivo  # Si se selecciona un archivo, actualizamos la variable global
+        vista_maquina = None  # Se deja la base de tarifas
+        combo_maquina.set('')
         entrada_archivo.set(archivo_cargado)  # Actualizamos la ruta mostrada en la interfaz
+        cargar_tarifas(archivo_cargado)
+
+def cargar_tarifas(archivo):
+    # Leer e indexar la tabla en segundo plano; si el usuario elige otro
+    # archivo antes de que termine, el resultado anterior se descarta
+    trabajador.enviar("carga", tarifas.indice_tarifas, archivo,
+                      al_terminar=tarifas_cargadas, al_fallar=carga_fallida)
+
+def tarifas_cargadas(indice_nuevo):
+    global indice
+    indice = indice_nuevo
+    combo_material['values'] = indice.materiales
+    actualizar_espesores(None)
+    grafo_presupuesto.fijar("indice", indice)
+    programar_recalculo()
+    if MEDIR_ARRANQUE:
+        # Detrás de la señal ventana_visible (ya programada): tabla lista, cerrar
+        ventana.after(0, lambda: (print("listo", flush=True), ventana.destroy()))
+
+def carga_fallida(error):
+    if MEDIR_ARRANQUE:
+        ventana.destroy()
+        return
+    messagebox.showerror("Errore", f"Impossibile caricare il file: {error}")
+
+def abrir_almacen():
+    global ruta_almacen
+    ruta = filedialog.askopenfilename(filetypes=[("Base di tariffe", "*.sqlite *.db"), ("Tutti", "*.*")])
+    if ruta:
+        ruta_almacen = ruta
+        trabajador.enviar("almacen", _maquinas_de, ruta,
+                          al_terminar=maquinas_leidas, al_fallar=carga_fallida)
+
+def _maquinas_de(ruta):
+    # En segundo plano: almacen_tarifas se importa sólo si se usa una base
+    import almacen_tarifas
+
+    almacen = almacen_tarifas.AlmacenTarifas(ruta)
+    try:
+        return almacen.maquinas()
+    finally:
+        almacen.cerrar()
+
+def maquinas_leidas(maquinas):
+    if not maquinas:
+        messagebox.showerror("Errore", "La base di tariffe non contiene macchine (vedi 'presupuesto.py importar').")
+        return
+    combo_maquina['values'] = maquinas
+    combo_maquina.set(maquinas[0])
+    elegir_maquina()
+
+def elegir_maquina(event=None):
+    # Versión de la máquina vigente en la fecha indicada (hoy si está vacía)
+    maquina = combo_maquina.get()
+    if ruta_almacen is None or not maquina:
+        return
+    trabajador.enviar("carga", _cargar_maquina, ruta_almacen, maquina, entrada_fecha.get().strip() or None,
+                      al_terminar=maquina_cargada, al_fallar=carga_fallida)
+
+def _cargar_maquina(ruta, maquina, fecha):
+    import almacen_tarifas
+
+    almacen = almacen_tarifas.AlmacenTarifas(ruta)
+    try:
+        vista = almacen.vista(maquina, fecha)
+        return vista, vista.indice(), almacen.perfil(maquina)
+    finally:
+        almacen.cerrar()
+
+def maquina_cargada(resultado):
+    global vista_maquina
+    vista_maquina, indice_maquina, perfil = resultado
+    entrada_archivo.set(f"{os.path.basename(ruta_almacen)}: {vista_maquina.maquina} ({vista_maquina.vigente_desde})")
+    # El perfil de la máquina completa los datos generales
+    for campo, valor in perfil.items():
+        entrada = campos_pieza[campo]
+        entrada.delete(0, tk.END)
+        entrada.insert(0, f"{valor:g}")
+    tarifas_cargadas(indice_maquina)
+
+def recargar_tarifas(archivo):
+    # Con una máquina de la base elegida el archivo vigilado no se usa
+    if vista_maquina is not None:
+        return
+    # El archivo cambió en disco (por ejemplo, guardado desde LibreOffice):
+    # releer en segundo plano y comparar con el índice actual
+    trabajador.enviar("carga", tarifas.recargar_indice, archivo, indice,
+                      al_terminar=tarifas_recargadas, al_fallar=recarga_fallida)
+
+def tarifas_recargadas(resultado):
+    global indice
+    indice_nuevo, cambios = resultado
+    if not cambios:
+        return
+    # El índice nuevo está completo antes de reemplazar la referencia: un
+    # cálculo ve la tabla anterior o la nueva, nunca una mezcla
+    anterior = indice
+    indice = indice_nuevo
+    if anterior is None or anterior.materiales != indice.materiales:
+        combo_material['values'] = indice.materiales
+    material = combo_material.get()
+    if material in cambios.cambian_espesores():
+        # Se conserva la selección: si ese espesor ya no existe, el cálculo lo indica
+        combo_espesor['values'] = indice.espesores.get(material, [])
+    grafo_presupuesto.fijar("indice", indice)
+    programar_recalculo()
+    # Los presupuestos de la tabla anterior ya no sirven (el borrado en disco, en segundo plano)
+    trabajador.enviar("cache_version", cache_quotes.retener_version, indice.version,
+                      al_terminar=lambda _: estado_cache.set(cache_quotes.linea_resumen()))
+
+def recarga_fallida(error):
+    # Se sigue con la tabla anterior; el próximo guardado vuelve a intentarlo
+    estado_calculo.set(f"Impossibile ricaricare il file: {error}")
+
+def mostrar_ocupado(ocupado):
+    # Barra de progreso mientras haya trabajos en segundo plano
+    if ocupado:
+        barra_progreso.start(10)
+    else:
+        barra_progreso.stop()
 
 def actualizar_espesores(event):
     material_usuario = combo_material.get()
     
-    if material_usuario:
-        # Filtrar los espesores según el material
-        espesores_filtrados = df[df['Material'] == material_usuario]['Espesor'].dropna().unique().tolist()
+    if material_usuario and indice is not None:
+        # Espesores del material, ya ordenados en el índice
+        espesores_filtrados = indice.espesores.get(material_usuario, [])
         # Actualizar los valores del combobox de espesor
         combo_espesor['values'] = espesores_filtrados
         combo_espesor.set('')  # Limpiar la selección de espesor
-
-def recolectar_datos():
-    try:
-        global datos_filtrados_dict
-        archivo = archivo_cargado  
-        material_usuario = combo_material.get() 
-        espesor_usuario = combo_espesor.get()  
-        
-        # Verificar si el espesor está vacío
-        if espesor_usuario:
-            espesor_usuario = float(espesor_usuario)  
-        else:
-            espesor_usuario = None 
-
-        # Leer el archivo ODS (si es un archivo LibreOffice) o Excel
-        if archivo.endswith(".ods"):
-            df = pd.read_excel(archivo, engine="odf", sheet_name="date")  
-        else:
-            df = pd.read_excel(archivo, sheet_name="date")  
-
-        # Filtrar los datos por material y espesor si es necesario
-        if material_usuario and espesor_usuario is not None:
-            df_filtrado = df[(df['Material'] == material_usuario) & (df['Espesor'] == espesor_usuario)]
-        else:
-            df_filtrado = df  
-
-        # Verificar si se encontraron resultados
-        if df_filtrado.empty:
-            messagebox.showwarning("Nessun risultato", "Non sono stati trovati dati con i criteri selezionati.") 
-            return None  
-        else:
-            # Convertir el dataframe filtrado a un diccionario de Python sin columnas
-            datos_filtrados_dict = df_filtrado.to_dict(orient='records')
-            return datos_filtrados_dict
-
-    except Exception as e:
-        messagebox.showerror("Errore", f"Si è verificato un errore: {e}")
-        return None
-
-def calcular_tiempo_corte():
-    datos_filtrados_dict = recolectar_datos()
-
-    if not datos_filtrados_dict:
-        return None  
-
+        programar_recalculo()
+
+def aplicar_campos():
+    # Pasar al grafo los textos actuales; sólo cambian los nodos afectados
+    grafo_presupuesto.fijar("material", combo_material.get())
+    grafo_presupuesto.fijar("espesor", combo_espesor.get())
+    for campo, entrada in campos_pieza.items():
+        grafo_presupuesto.fijar(campo, entrada.get())
+
+def programar_recalculo(event=None):
+    global recalculo_pendiente
+    # Esperar a que el usuario deje de escribir antes de recalcular
+    if recalculo_pendiente is not None:
+        ventana.after_cancel(recalculo_pendiente)
+    recalculo_pendiente = ventana.after(RETARDO_EN_VIVO_MS, recalcular_en_vivo)
+
+def recalcular_en_vivo():
+    global recalculo_pendiente
+    recalculo_pendiente = None
+    aplicar_campos()
     try:
-        # Obtener el perímetro ingresado y convertirlo a float
-        perimetro_usuario = entrada_perimetro.get()
-        cantidad_aujeros = entrada_aujeros.get()
-        
-        # Verificar que el usuario ingresó un perímetro
-        if not perimetro_usuario:
-            messagebox.showerror("Errore", "Per favore, inserisci un perimetro.")
-            return None
-        
-        # Verificar que el usuario ingresó la cantidad de agujeros
-        if not cantidad_aujeros:
-            messagebox.showerror("Errore", "Per favore, inserisci la quantità di fori.")
-            return None
-        
-        # Convertir valores a float
-        perimetro_usuario = float(perimetro_usuario)  # mm
-        cantidad_aujeros = float(cantidad_aujeros)    
-
-
-        
-        # Recuperar el valor de 'CW ' y los tiempos desde el diccionario
-        cw = datos_filtrados_dict[0]['CW ']  # mm * h
-        tiempo_1 = datos_filtrados_dict[0][1]  # h 
-        tiempo_2 = datos_filtrados_dict[0][2]  # h
-
-        # Verificar que 'cw' no sea cero para evitar la división por cero
-        if cw == 0:
-            messagebox.showerror("Errore", "Il valore di CW non può essere zero.")
-            return None
-
-        # Verificar que los tiempos no sean nulos
-        if tiempo_1 is None or tiempo_2 is None:
-            messagebox.showerror("Errore", "I tempi non sono validi.")
-            return None
-        
-        tiempo_corte = perimetro_usuario / cw  # Tiempo de corte en horas
-        tiempo_aujeros = cantidad_aujeros * (tiempo_1 + tiempo_2)  
-        tiempo_total = tiempo_corte + tiempo_aujeros 
-
-        # Convertir el tiempo total a minutos
-        tiempo_total_min = tiempo_total * 60
-
-        # Crear el diccionario con los resultados
-        tiempo_corte_dict = {
-            "tiempo_corte_horas": tiempo_corte,
-            "tiempo_aujeros_horas": tiempo_aujeros,
-            "tiempo_total_horas": tiempo_total,
-            "tiempo_total_minutos": tiempo_total_min
-        }
-
-        # Retornar el diccionario de resultados
-        return tiempo_corte_dict
-
-    except ValueError:
-        # Si no se pudo convertir el perímetro o la cantidad de agujeros a números, mostrar un error
-        messagebox.showerror("Errore", "Il valore del perimetro o della quantità di fori deve essere un numero valido.")
-        return None
-    except Exception as e:
-        # Capturar cualquier otro error y mostrarlo
-        messagebox.showerror("Errore", f"Si è verificato un errore: {e}")
-        return None
+        with instrumentacion.tramo("gui/recalculo"):
+            presupuesto = en_vivo.presupuesto(grafo_presupuesto)
+    except motor.ErrorPresupuesto as e:
+        estado_calculo.set(str(e))
+        return
+    estado_calculo.set("")
+    insertar_resultados(presupuesto.como_dict())
 
-def calcular_consumo_gas():
+def mostrar_resultados():
+    global capturar_clic
+    if capturar_clic:
+        # Un solo clic con cProfile: el perfil queda en un .prof y el resumen en el panel
+        capturar_clic = False
+        ruta = time.strftime("clic_%Y%m%d_%H%M%S.prof")
+        _, estadisticas = instrumentacion.perfilar(calcular_y_mostrar, ruta=ruta)
+        mostrar_cprofile(ruta, estadisticas)
+    else:
+        calcular_y_mostrar()
+
+def calcular_y_mostrar():
+    with instrumentacion.tramo("gui/clic"):
+        _calcular_y_mostrar()
+
+def _calcular_y_mostrar():
+    aplicar_campos()
     try:
-        # Primero recolectamos los datos
-        datos_filtrados_dict = recolectar_datos()
-        if not datos_filtrados_dict:
-            return None 
-
-        # Calculamos tiempos
-        tiempo_corte_dict = calcular_tiempo_corte()
-        if not tiempo_corte_dict:
-            return None  
-
-        # Obtener el contenido neto del pack ingresado
-        neto_pack_usuario = neto_pack.get()
-        
-        # Verificar que el usuario ingresó el contenido neto del pack
-        if not neto_pack_usuario:
-            messagebox.showerror("Errore", "Per favore, inserisci il contenuto netto del pack.")  
-            return None
-        
-        # Convertir el contenido neto a float
+        datos = en_vivo.datos(grafo_presupuesto)
+    except motor.ErrorPresupuesto as e:
+        messagebox.showerror("Errore", str(e))
+        return
+    # En el hilo de Tk sólo la memoria del cache; el disco y el cálculo van al trabajador
+    presupuesto = cache_quotes.buscar_memoria(indice, datos)
+    if presupuesto is None:
+        trabajador.enviar("calculo", _calcular_con_cache, indice, datos,
+                          al_terminar=presupuesto_calculado, al_fallar=calculo_fallido)
+    else:
+        presupuesto_calculado(presupuesto)
+        trabajador.enviar("cache", cache_quotes.escribir_pendientes)
+
+def _calcular_con_cache(indice_calculo, datos):
+    # En segundo plano: lectura del disco, cálculo y escritura de lo pendiente
+    presupuesto = cache_quotes.calcular(indice_calculo, datos)
+    cache_quotes.escribir_pendientes()
+    return presupuesto
+
+def presupuesto_calculado(presupuesto):
+    costos_dict = presupuesto.como_dict()
+    # Mostrar los resultados
+    estado_cache.set(cache_quotes.linea_resumen())
+    estado_calculo.set("")
+    insertar_resultados(costos_dict)
+
+def calculo_fallido(error):
+    if isinstance(error, motor.ErrorPresupuesto):
+        messagebox.showerror("Errore", str(error))
+    else:
+        messagebox.showerror("Errore", f"Si è verificato un errore: {error}")
+
+def insertar_resultados(costos_dict):
+    global ultimo_presupuesto
+    # Guardar el presupuesto mostrado para que el informe no lo recalcule
+    ultimo_presupuesto = costos_dict
+
+    with instrumentacion.tramo("gui/tabla"):
+        # Limpiar la tabla antes de agregar nuevos resultados
+        for row in treeview.get_children():
+            treeview.delete(row)
+
+        # Insertar los datos en la tabla
+        treeview.insert("", "end", values=(
+            f"{costos_dict['costo_gas']} EUR",
+            f"{costos_dict['costo_maquina']} EUR",
+            f"{costos_dict['costo_peso']} EUR",
+            f"{costos_dict['total']} EUR",
+            f"{costos_dict['cantidad_gas_dict']} m³",
+            f"{costos_dict['tiempo_corte_horas']} h",
+            f"{costos_dict['Costo_operario']} EUR/h"
+        ))
+
+def abrir_panel_debug(event=None):
+    global panel_debug, tabla_debug, texto_cprofile
+    if panel_debug is not None and panel_debug.winfo_exists():
+        panel_debug.lift()
+        return
+    instrumentacion.activar()
+    panel_debug = tk.Toplevel(ventana)
+    panel_debug.title("Debug - tempi delle fasi")
+    columnas = ("cuenta", "total_ms", "p50_ms", "p95_ms", "p99_ms")
+    tabla_debug = ttk.Treeview(panel_debug, columns=columnas, height=12)
+    tabla_debug.heading("#0", text="Fase")
+    tabla_debug.column("#0", width=200)
+    for columna in columnas:
+        tabla_debug.heading(columna, text=columna)
+        tabla_debug.column(columna, width=80, anchor="e")
+    tabla_debug.pack(fill="both", expand=True, padx=5, pady=5)
+
+    botones = tk.Frame(panel_debug)
+    botones.pack(fill="x", padx=5)
+    tk.Button(botones, text="Salva JSON", command=salvar_debug).pack(side="left", padx=2)
+    tk.Button(botones, text="Azzera", command=instrumentacion.limpiar).pack(side="left", padx=2)
+    tk.Button(botones, text="cProfile del prossimo clic", command=armar_cprofile).pack(side="left", padx=2)
+
+    texto_cprofile = tk.Text(panel_debug, height=14, width=100, font=("Courier", 9))
+    texto_cprofile.pack(fill="both", expand=True, padx=5, pady=5)
+    actualizar_panel_debug()
+
+def actualizar_panel_debug():
+    if panel_debug is None or not panel_debug.winfo_exists():
+        return
+    tabla_debug.delete(*tabla_debug.get_children())
+    for nombre, datos in instrumentacion.resumen().items():
+        tabla_debug.insert("", "end", text=nombre, values=(
+            datos["cuenta"], f"{datos['total_ms']:.2f}", f"{datos['p50_ms']:.3f}",
+            f"{datos['p95_ms']:.3f}", f"{datos['p99_ms']:.3f}"))
+    panel_debug.after(1000, actualizar_panel_debug)
+
+def salvar_debug():
+    ruta = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON", "*.json")])
+    if ruta:
+        instrumentacion.volcar_json(ruta)
+
+def armar_cprofile():
+    global capturar_clic
+    capturar_clic = True
+    texto_cprofile.delete("1.0", "end")
+    texto_cprofile.insert("end", "Premi \"Calcolare i Dati\": il prossimo clic verrà profilato con cProfile.\n")
+
+def mostrar_cprofile(ruta, estadisticas):
+    if panel_debug is None or not panel_debug.winfo_exists():
+        print(estadisticas)
+        return
+    texto_cprofile.delete("1.0", "end")
+    texto_cprofile.insert("end", f"Profilo salvato in {ruta}\n{estadisticas}")
+ 
+def presupuestar_lote():
+    if indice is None:
+        messagebox.showerror("Errore", "La tabella delle tariffe non è ancora caricata.")
+        return
+    archivo = filedialog.askopenfilename(filetypes=[("Lavori", "*.csv *.ods *.xlsx")])
+    if not archivo:
+        return
+    # I campi di "Dati Generali" compilati valgono per le righe senza quelle colonne
+    valores = {}
+    for campo in ("neto_pack", "costo_pack", "costo_maquina", "costo_operario"):
         try:
-            neto_pack_usuario = float(neto_pack_usuario)
+            valores[campo] = float(campos_pieza[campo].get())
         except ValueError:
-            messagebox.showerror("Errore", "Il contenuto netto deve essere un numero valido.")
-            return None
-
-        # Obtener el tiempo total en horas y la duración del pack
-        tiempo_corte_hora = tiempo_corte_dict['tiempo_total_horas']
-        duracion_pack = datos_filtrados_dict[0]['Duracion'] 
-        
-        # Verificar si la duración está vacía o no existe
-        if duracion_pack is None or duracion_pack == "":
-            messagebox.showerror("Errore", "Il campo 'Durazione' è vuoto o mancante. Per favore, inserisci la durata del pack.")
-            return None
-        
-        # Verificar que la duración no sea cero
-        if duracion_pack == 0:
-            messagebox.showerror("Errore", "La durata del pack non può essere zero.")
-            return None
-        
-        # Calcular el consumo
-        consumo = (tiempo_corte_hora * neto_pack_usuario) / duracion_pack
-        
-        return consumo  # m3
-
+            pass
+    trabajador.enviar("lote", _calcular_lote, archivo, indice, valores,
+                      al_terminar=lote_calculado, al_fallar=lote_fallido)
+
+def _calcular_lote(archivo, indice_lote, valores):
+    # En segundo plano: leer, calcular y pasar a arrays; la ventana sólo pinta
+    import lote
+
+    trabajos = lote.leer_trabajos(archivo)
+    resultados = lote.calcular_lote(indice_lote, trabajos, valores)
+    return tabla_virtual.ResultadosLote.desde_lote(trabajos, resultados)
+
+def lote_calculado(modelo):
+    global ventana_lote, tabla_lote
+    if ventana_lote is None or not ventana_lote.winfo_exists():
+        ventana_lote = tk.Toplevel(ventana)
+        ventana_lote.title("Preventivi del lotto")
+        tabla_lote = tabla_virtual.TablaVirtual(ventana_lote, padding=5)
+        tabla_lote.pack(fill="both", expand=True)
+        tk.Button(ventana_lote, text="Salva risultati", command=salvar_lote, font=fuente).pack(pady=5)
+    tabla_lote.mostrar(modelo)
+    ventana_lote.lift()
+
+def lote_fallido(error):
+    messagebox.showerror("Errore", f"Impossibile calcolare il lotto: {error}")
+
+def salvar_lote():
+    modelo = tabla_lote.modelo
+    ruta = filedialog.asksaveasfilename(parent=ventana_lote, defaultextension=".csv",
+                                        filetypes=[("CSV", "*.csv"), ("ODS", "*.ods"), ("Excel", "*.xlsx")])
+    if not ruta:
+        return
+    try:
+        # Le righe visibili, nell'ordine e con il filtro della tabella
+        informe.escribir_informe(ruta, [columna.clave for columna in modelo.columnas], modelo.filas_crudas())
     except Exception as e:
         messagebox.showerror("Errore", f"Si è verificato un errore: {e}")
-        return None
-
-def calcular_costos_general():
-    # Primero recolectamos los datos
-    datos_filtrados_dict = recolectar_datos()
-    
-    if not datos_filtrados_dict:
-        return None 
-    
-    # Calculamos los tiempos de corte
-    tiempo_corte_dict = calcular_tiempo_corte()
-    if not tiempo_corte_dict:
-        return None  
-
-    # Calculamos el consumo de gas
-    cantidad_gas_dict = calcular_consumo_gas()
-    if cantidad_gas_dict is None:
-        return None 
-
-    # Obtenemos los valores de entrada del usuario
-    costo_pack_usuario = entrada_costo_pack.get()
-    costo_maquina_usuario = entrada_maquina.get()
-    ancho_usuario = entrada_ancho.get()
-    largo_usuario = entrada_largo.get()
-    costo_operario_usuario = entrada_costo_hora_operarios.get()
-
-    # Verificar que los valores de los campos sean válidos
-    if not costo_pack_usuario:
-        messagebox.showerror("Errore", "Per favore, inserisci il costo del pack.")  
-        return None
-    
-    if not costo_maquina_usuario:
-        messagebox.showerror("Errore", "Per favore, inserisci il costo della macchina.")  
-        return None
-    
-    if not ancho_usuario:
-        messagebox.showerror("Errore", "Per favore, inserisci l'ancho.")  
-        return None
-
-    if not costo_operario_usuario:
-        messagebox.showerror("Errore", "Per favore, inserisci l'costo ore operari.")  
-        return None
-    
-    if not largo_usuario:
-        messagebox.showerror("Errore", "Per favore, inserisci il largo.")  
-        return None
 
-    # Convertir las entradas de usuario a valores numéricos válidos
+def comparar_todos():
+    if indice is None:
+        messagebox.showerror("Errore", en_vivo.CARGANDO)
+        return
+    aplicar_campos()
     try:
-        costo_pack_usuario = float(costo_pack_usuario)
-        costo_maquina_usuario = float(costo_maquina_usuario)
-        ancho_usuario = float(ancho_usuario)
-        largo_usuario = float(largo_usuario)
-        costo_operario_usuario = float(costo_operario_usuario)
-    except ValueError:
-        messagebox.showerror("Errore", "Per favore, inserisci valori numerici validi.")
-        return None
-
-    # Cálculos
-    costo_kilogramo = datos_filtrados_dict[0]['Costo']    
-    costo_gas = cantidad_gas_dict * costo_pack_usuario
-    tiempo_corte_horas = tiempo_corte_dict.get("tiempo_total_horas", 0) 
-    costo_maquina = tiempo_corte_horas * costo_maquina_usuario
-    area_usuario = (ancho_usuario * largo_usuario)  
-    area_usuario_m2 = area_usuario / 1_000_000  # Convertir de mm² a m²
-    costo_peso = area_usuario_m2 * costo_kilogramo
-    
-    total = costo_gas + costo_maquina + costo_peso + costo_operario_usuario
-
-    # Crear un diccionario con los resultados
-    costos_dict = {
-        "costo_gas": costo_gas,
-        "costo_maquina": costo_maquina,
-        "costo_peso": costo_peso,
-        "total": total,
-        "cantidad_gas_dict": cantidad_gas_dict,
-        "tiempo_corte_horas": tiempo_corte_horas,
-        "Costo_operario": costo_operario_usuario,
-    }
-
-    # Mostrar los resultados
-    print(costos_dict)
-
-    return costos_dict
+        campos = en_vivo.campos(grafo_presupuesto)
+    except motor.ErrorPresupuesto as e:
+        messagebox.showerror("Errore", str(e))
+        return
+    trabajador.enviar("comparacion", _comparar_todos, indice, campos,
+                      al_terminar=comparacion_calculada, al_fallar=comparacion_fallida)
+
+def _comparar_todos(indice_comparacion, campos):
+    # En segundo plano: una pasada vectorizada sobre toda la tabla (comparacion importa numpy)
+    import comparacion
+
+    with instrumentacion.tramo("gui/comparacion"):
+        matriz = comparacion.comparar(indice_comparacion, campos)
+        return matriz.modelo(), comparacion.resumen(matriz)
+
+def comparacion_calculada(resultado):
+    global ventana_comparacion, tabla_comparacion, resumen_comparacion
+    modelo, lineas = resultado
+    if ventana_comparacion is None or not ventana_comparacion.winfo_exists():
+        ventana_comparacion = tk.Toplevel(ventana)
+        ventana_comparacion.title("Confronto tra materiali e spessori")
+        resumen_comparacion = tk.StringVar()
+        tk.Label(ventana_comparacion, textvariable=resumen_comparacion, font=fuente, justify="left").pack(anchor="w", padx=5, pady=5)
+        tabla_comparacion = tabla_virtual.TablaVirtual(ventana_comparacion, columnas=tabla_virtual.COLUMNAS_COMPARACION, padding=5)
+        tabla_comparacion.pack(fill="both", expand=True)
+    resumen_comparacion.set("\n".join(lineas))
+    tabla_comparacion.mostrar(modelo)
+    ventana_comparacion.lift()
+
+def comparacion_fallida(error):
+    messagebox.showerror("Errore", f"Impossibile confrontare i materiali: {error}")
+
+def calcular_intervalo():
+    if indice is None:
+        messagebox.showerror("Errore", en_vivo.CARGANDO)
+        return
+    aplicar_campos()
+    try:
+        datos = en_vivo.datos(grafo_presupuesto)
+    except motor.ErrorPresupuesto as e:
+        messagebox.showerror("Errore", str(e))
+        return
+    trabajador.enviar("incertidumbre", _simular_intervalo, indice, datos,
+                      al_terminar=intervalo_calculado, al_fallar=intervalo_fallido)
+
+def _simular_intervalo(indice_simulacion, datos):
+    # En segundo plano: 100k muestras con ±15% en CW, 1, 2 y Duracion (incertidumbre importa numpy)
+    import incertidumbre
+
+    with instrumentacion.tramo("gui/incertidumbre"):
+        return incertidumbre.tabla(incertidumbre.simular(indice_simulacion, datos))
+
+def intervalo_calculado(texto):
+    ventana_intervalo = tk.Toplevel(ventana)
+    ventana_intervalo.title("Intervallo di costo (Monte Carlo, ±15%)")
+    tk.Label(ventana_intervalo, text=texto, font=("Courier", 10), justify="left").pack(padx=10, pady=10)
+
+def intervalo_fallido(error):
+    messagebox.showerror("Errore", f"Impossibile calcolare l'intervallo: {error}")
+
+def leer_dibujo():
+    archivo = filedialog.askopenfilename(filetypes=[("Disegni", "*.dxf *.DXF")])
+    if not archivo:
+        return
+    trabajador.enviar("dxf", _leer_geometria, archivo,
+                      al_terminar=geometria_leida, al_fallar=geometria_fallida)
+
+def _leer_geometria(archivo):
+    # En segundo plano y con el cache por contenido (geometrias importa numpy)
+    import geometrias
+
+    cache = geometrias.CacheGeometrias()
+    try:
+        return cache.leer(archivo)
+    finally:
+        cache.cerrar()
+
+def geometria_leida(geometria):
+    for entrada, valor in ((entrada_perimetro, f"{geometria.perimetro:.2f}"),
+                           (entrada_aujeros, str(geometria.aujeros)),
+                           (entrada_ancho, f"{geometria.ancho:.2f}"),
+                           (entrada_largo, f"{geometria.largo:.2f}")):
+        entrada.delete(0, "end")
+        entrada.insert(0, valor)
+    if geometria.abiertos:
+        estado_calculo.set(f"Attenzione: {geometria.abiertos} contorni aperti nel disegno")
+    programar_recalculo()
+
+def geometria_fallida(error):
+    messagebox.showerror("Errore", f"Impossibile leggere il disegno: {error}")
 
-def mostrar_resultados():
-    # Llamar a calcular_costos_general para obtener los datos
-    costos_dict = calcular_costos_general()
-    
-    if costos_dict is None:
-        return  # Si no se generaron datos, salir
-    
-    # Limpiar la tabla antes de agregar nuevos resultados
-    for row in treeview.get_children():
-        treeview.delete(row)
-    
-    # Insertar los datos en la tabla
-    treeview.insert("", "end", values=(
-        f"{costos_dict['costo_gas']} EUR",
-        f"{costos_dict['costo_maquina']} EUR",
-        f"{costos_dict['costo_peso']} EUR",
-        f"{costos_dict['total']} EUR",
-        f"{costos_dict['cantidad_gas_dict']} m³",
-        f"{costos_dict['tiempo_corte_horas']} h",
-        f"{costos_dict['Costo_operario']} EUR/h"
-    ))
- 
 def generar_informe():
     try:
-        # Llamar a calcular_costos_general para obtener los datos
-        costos_dict = calcular_costos_general()
+        # Usar el presupuesto que se ve en la tabla, sin recalcularlo
+        costos_dict = ultimo_presupuesto
         
         if costos_dict is None:
-            return  # Si los datos no fueron recolectados o no son válidos, salir
+            messagebox.showerror("Errore", "Per favore, calcola prima i dati.")
+            return
         
         # Obtener el nombre del informe
         nombre_informe = entrada_nombre_informe.get()  # Obtener el nombre del informe
@@ -305,11 +513,14 @@ def generar_informe():
             messagebox.showerror("Errore", "Per favore, inserisci un nome per il rapporto.")  
             return
         
-        # Guardar los datos recolectados en un archivo ODS
-        df_informe = pd.DataFrame([costos_dict])  # Convertir el diccionario a DataFrame (como una fila)
-        df_informe.to_excel(f"{nombre_informe}.ods", index=False, engine="odf")  # Guardar como .ods
+        # Sin extensión (.ods, .xlsx o .csv) se guarda como .ods
+        if not nombre_informe.lower().endswith(tuple(informe.ESCRITORES)):
+            nombre_informe = f"{nombre_informe}.ods"
+
+        informe.escribir_informe(nombre_informe, list(costos_dict), [list(costos_dict.values())],
+                                 agregar=agregar_informe.get())
         
-        messagebox.showinfo("Rapporto Generato", f"Rapporto generato con successo come '{nombre_informe}.ods'.")  # Mensaje de éxito
+        messagebox.showinfo("Rapporto Generato", f"Rapporto generato con successo come '{nombre_informe}'.")  # Mensaje de éxito
 
     except Exception as e:
         messagebox.showerror("Errore", f"Si è verificato un errore: {e}") 
@@ -337,11 +548,22 @@ tk.Entry(frame_principal, textvariable=entrada_archivo, width=20, state='readonl
 # Bottone per caricare un altro file
 tk.Button(frame_principal, text="Carica un altro file", command=cargar_archivo, font=fuente, bg="#4CAF50", fg="white", relief="raised", padx=10, pady=5).pack(pady=10, fill="none")
 
-# Leggere i dati dal file caricato
-df = pd.read_excel(archivo_cargado, engine="odf", sheet_name="date")
-
-# Ottenere l'elenco dei materiali unici
-materiales = df['Material'].dropna().unique().tolist()
+# Base di tariffe con più macchine e versioni datate (almacen_tarifas.py)
+frame_maquina = tk.Frame(frame_principal, bg="#f4f4f4")
+frame_maquina.pack(pady=5, fill="none")
+tk.Button(frame_maquina, text="Base tariffe...", command=abrir_almacen, font=fuente, bg="#4CAF50", fg="white", relief="raised", padx=10, pady=5).pack(side="left", padx=5)
+tk.Label(frame_maquina, text="Macchina:", font=fuente, bg="#f4f4f4").pack(side="left")
+combo_maquina = ttk.Combobox(frame_maquina, width=10, font=fuente, state="readonly")
+combo_maquina.pack(side="left", padx=5)
+tk.Label(frame_maquina, text="Data:", font=fuente, bg="#f4f4f4").pack(side="left")
+entrada_fecha = tk.Entry(frame_maquina, width=10, font=fuente)
+entrada_fecha.pack(side="left", padx=5)
+combo_maquina.bind("<<ComboboxSelected>>", elegir_maquina)
+entrada_fecha.bind("<Return>", elegir_maquina)
+
+# Barra di avanzamento per il caricamento e i calcoli in background
+barra_progreso = ttk.Progressbar(frame_principal, mode="indeterminate", length=200)
+barra_progreso.pack(pady=5, fill="none")
 
 # Titolo della sezione "Dati della Tabella Excel"
 tk.Label(frame_principal, text="Dati della Tabella Excel", font=('Helvetica', 14, 'bold'), bg="#f4f4f4").pack(anchor="w", pady=10, fill="none")
@@ -354,7 +576,7 @@ frame_comboboxes = tk.Frame(frame_material, bg="#f4f4f4")
 frame_comboboxes.pack(fill="none", pady=5)
 
 tk.Label(frame_comboboxes, text="Seleziona Materiale:", font=fuente, bg="#f4f4f4").pack(anchor="w", pady=5, fill="none")
-combo_material = ttk.Combobox(frame_comboboxes, values=materiales, width=20, font=fuente)
+combo_material = ttk.Combobox(frame_comboboxes, width=20, font=fuente)
 combo_material.pack(pady=5, fill="none")
 
 tk.Label(frame_comboboxes, text="Seleziona Spessore:", font=fuente, bg="#f4f4f4").pack(anchor="w", pady=5, fill="none")
@@ -390,6 +612,9 @@ tk.Label(frame_columna_derecha, text="larghezza mm:", font=fuente, bg="#f4f4f4")
 entrada_ancho = tk.Entry(frame_columna_derecha, width=20, font=fuente)
 entrada_ancho.pack(pady=5, fill="none")
 
+# Perimetro, fori e ingombro letti da un disegno DXF
+tk.Button(frame_principal, text="Leggi DXF...", command=leer_dibujo, font=fuente, bg="#4CAF50", fg="white", relief="raised", padx=10, pady=5).pack(pady=5, fill="none")
+
 # Dati Generali
 tk.Label(frame_principal, text="Dati Generali", font=('Helvetica', 14, 'bold'), bg="#f4f4f4").pack(anchor="w", pady=10, fill="none")
 
@@ -426,14 +651,54 @@ entrada_costo_hora_operarios.pack(pady=5, fill="none")
 # Vinculare l'evento di selezione del materiale con l'aggiornamento degli spessori
 combo_material.bind("<<ComboboxSelected>>", actualizar_espesores)
 
+# Campi del pezzo per il ricalcolo in tempo reale (stessi nomi di motor.CAMPOS)
+campos_pieza = {
+    "perimetro": entrada_perimetro,
+    "aujeros": entrada_aujeros,
+    "neto_pack": neto_pack,
+    "costo_pack": entrada_costo_pack,
+    "costo_maquina": entrada_maquina,
+    "ancho": entrada_ancho,
+    "costo_operario": entrada_costo_hora_operarios,
+    "largo": entrada_largo,
+}
+for entrada in campos_pieza.values():
+    entrada.bind("<KeyRelease>", programar_recalculo)
+combo_espesor.bind("<<ComboboxSelected>>", programar_recalculo)
+combo_espesor.bind("<KeyRelease>", programar_recalculo)
+
 # Bottone per raccogliere i dati
 tk.Button(frame_principal, text="Calcolare i Dati", command=mostrar_resultados, font=fuente, bg="#2196F3", fg="white", relief="raised", padx=10, pady=5).pack(pady=15, fill="none")
 
+# Percentili p5/p50/p95 del costo con CW, tempi dei fori e durata del pacco variabili
+tk.Button(frame_principal, text="Intervallo di costo", command=calcular_intervalo, font=fuente, bg="#2196F3", fg="white", relief="raised", padx=10, pady=5).pack(pady=5, fill="none")
+
+# Lo stesso pezzo in tutti i materiali e spessori, dal più economico (verde) al più veloce (blu)
+tk.Button(frame_principal, text="Confronta tutti", command=comparar_todos, font=fuente, bg="#2196F3", fg="white", relief="raised", padx=10, pady=5).pack(pady=5, fill="none")
+
+# Preventivi di un elenco di pezzi (.csv/.ods/.xlsx), mostrati in una tabella virtuale
+tk.Button(frame_principal, text="Preventivo di un lotto...", command=presupuestar_lote, font=fuente, bg="#2196F3", fg="white", relief="raised", padx=10, pady=5).pack(pady=5, fill="none")
+
+# Messaggio del ricalcolo in tempo reale (campo mancante, dati non trovati, ...)
+estado_calculo = tk.StringVar(value="")
+tk.Label(frame_principal, textvariable=estado_calculo, font=fuente, fg="#b00020", bg="#f4f4f4").pack(pady=2)
+
+# Statistiche della cache dei preventivi
+estado_cache = tk.StringVar(value="")
+tk.Label(frame_principal, textvariable=estado_cache, font=('Helvetica', 9), fg="#555555", bg="#f4f4f4").pack(pady=2)
+
 # Etiqueta para el nombre del informe
 tk.Label(frame_principal, text="Nome del Rapporto:", font=('Helvetica', 12)).pack(anchor="w", pady=5)
 entrada_nombre_informe = tk.Entry(frame_principal, font=('Helvetica', 12), width=30)
 entrada_nombre_informe.pack(pady=5)
 
+# Aggiungere al rapporto esistente invece di sovrascriverlo
+agregar_informe = tk.BooleanVar(value=False)
+tk.Checkbutton(frame_principal, text="Aggiungi al rapporto esistente", variable=agregar_informe, font=fuente, bg="#f4f4f4").pack(pady=5)
+
+# Bottone per generare il rapporto con il preventivo mostrato
+tk.Button(frame_principal, text="Genera Rapporto", command=generar_informe, font=fuente, bg="#4CAF50", fg="white", relief="raised", padx=10, pady=5).pack(pady=5, fill="none")
+
 # Crear un Treeview para mostrar los resultados en forma de tabla
 treeview = ttk.Treeview(frame_principal, columns=("Costo Gas", "Costo Maquina", "Costo Peso", "Total", "Cantidad Gas", "Tiempo Corte", "Costo Operario"), show="headings")
 
@@ -458,8 +723,29 @@ treeview.column("Costo Operario", width=100)
 # Colocar el Treeview en la ventana
 treeview.pack(pady=20, fill="both", expand=True)
 
+# Pannello di debug con i tempi delle fasi
+ventana.bind("<F12>", abrir_panel_debug)
+if instrumentacion.activada:
+    ventana.after(0, abrir_panel_debug)
+
+# Lavori in background (caricamento del file e calcoli) senza bloccare la finestra
+trabajador = segundo_plano.Trabajador(ventana, al_cambiar_ocupado=mostrar_ocupado)
+
+# Leggere i dati dal file caricato e indicizzarli per (Material, Espesor)
+cargar_tarifas(archivo_cargado)
+
+# Ricaricare la tabella quando il file viene modificato (ad es. salvato da LibreOffice)
+vigilante_tarifas = vigilante.Vigilante(ventana, lambda: archivo_cargado, recargar_tarifas)
+vigilante_tarifas.iniciar()
+
+# Misura dell'avvio: segnala la prima iterazione del ciclo con i moduli già importati;
+# la finestra si chiude quando la tabella è pronta ("listo", in tarifas_cargadas)
+if MEDIR_ARRANQUE:
+    ventana.after(0, lambda: print("ventana_visible", *sorted(sys.modules), flush=True))
+
 # Iniziare la finestra
 ventana.mainloop()
+cache_quotes.cerrar()
 
 
 
@@ -1,34 +1,72 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import pandas as pd
 import os
+import sys
+
+import en_vivo
+import motor
+import segundo_plano
+import tarifas
+import vigilante
 
 DEFAULT_FILE = "date.ods"
 
 # Global variables
 file_url = DEFAULT_FILE
-df = None
-
-def load_file(file):
-    """Load the file into the DataFrame."""
-    global df
-    try:
-        if file.endswith(".ods"):
-            df = pd.read_excel(file, engine="odf", sheet_name="date")
-        elif file.endswith(".xlsx"):
-            df = pd.read_excel(file, engine="openpyxl", sheet_name="date")
-        else:
-            messagebox.showerror("Errore", "Formato di file non supportato")
-            return False
+index = None
 
-        materials = df['Material'].dropna().unique().tolist()
-        combo_material['values'] = materials
-        combo_material.set("")
-        return True
-    except Exception as e:
-        messagebox.showerror("Errore", f"Impossibile caricare il file: {e}")
+def load_file(file, on_error_message="Impossibile caricare il file"):
+    """Load and index the file by (Material, Espesor) in the background."""
+    if not file.endswith((".ods", ".xlsx")):
+        messagebox.showerror("Errore", "Formato di file non supportato")
         return False
 
+    def failed(e):
+        messagebox.showerror("Errore", f"{on_error_message}: {e}")
+
+    # A newer load replaces a pending one: its result is discarded
+    worker.enviar("load", tarifas.indice_tarifas, file, al_terminar=file_loaded, al_fallar=failed)
+    return True
+
+def file_loaded(new_index):
+    """Show the materials of the freshly loaded file."""
+    global index
+    index = new_index
+    combo_material['values'] = index.materiales
+    combo_material.set("")
+    combo_thickness['values'] = []
+    combo_thickness.set("")
+
+def reload_file(file):
+    """Re-read the file after it changed on disk and apply only the differences."""
+    worker.enviar("load", tarifas.recargar_indice, file, index, al_terminar=file_reloaded,
+                  al_fallar=reload_failed)
+
+def reload_failed(e):
+    """Keep the previous table; the next save of the file retries."""
+    messagebox.showerror("Errore", f"Impossibile ricaricare il file: {e}")
+
+def file_reloaded(result):
+    """Swap in the updated index and refresh only the affected comboboxes."""
+    global index
+    new_index, changes = result
+    if not changes:
+        return
+    previous = index
+    index = new_index
+    if previous is None or previous.materiales != index.materiales:
+        combo_material['values'] = index.materiales
+    material = combo_material.get()
+    if material in changes.cambian_espesores():
+        combo_thickness['values'] = index.espesores.get(material, [])
+
+def show_busy(busy):
+    """Run the progress bar while background work is pending."""
+    if busy:
+        progress.start(10)
+    else:
+        progress.stop()
+
 def upload_file():
     """Allow the user to select and load a file."""
     global file_url
@@ -36,23 +74,24 @@ def upload_file():
     if file:
         file_url = file
         entry_file.set(file)
-        if not load_file(file):
-            messagebox.showerror("Errore", "Impossibile caricare il file selezionato")
+        load_file(file, "Impossibile caricare il file selezionato")
 
 def update_thickness(event):
     """Update thicknesses based on selected material."""
-    if df is None:
+    if index is None:
         return
     
     selected_material = combo_material.get()
     if selected_material:
-        filtered_thicknesses = df[df['Material'] == selected_material]['Espesor'].dropna().unique().tolist()
-        combo_thickness['values'] = filtered_thicknesses
+        combo_thickness['values'] = index.espesores.get(selected_material, [])
         combo_thickness.set('')
 
 def date():
+    if index is None:
+        # The table is still loading in the background
+        messagebox.showerror("Errore", en_vivo.CARGANDO)
+        return None
     try:
-        global df
         material = combo_material.get()
         thickness = combo_thickness.get()
         
@@ -62,25 +101,22 @@ def date():
             thickness = None
 
         if material and thickness is not None:
-            filtered_df = df[(df['Material'] == material) & (df['Espesor'] == thickness)]
+            # Same lookup used by the quote engine in app.py and the CLI
+            rows = [motor.buscar_tarifa(index, material, thickness)]
+        elif material:
+            rows = [index.filas[(material, t)] for t in index.espesores.get(material, [])]
         else:
-            if material:
-                filtered_df = df[df['Material'] == material]
-            else:
-                filtered_df = df
+            rows = list(index.filas.values())
 
-        if filtered_df.empty:
+        if not rows:
             messagebox.showwarning("Nessun risultato", "Non sono stati trovati dati con i criteri selezionati.")
             return None  
-        else:
-            # Convert the filtered DataFrame to a dictionary
-            filtered_dict = filtered_df.to_dict(orient='records')
 
-            # Optionally, you can process `filtered_dict` here if needed
-            print(filtered_dict)  # For debugging or checking the result
-
-            return filtered_dict
+        return [row.como_dict() for row in rows]
 
+    except motor.ErrorPresupuesto as e:
+        messagebox.showwarning("Nessun risultato", str(e))
+        return None
     except Exception as e:
         messagebox.showerror("Errore", f"Si è verificato un errore: {e}")
         return None
@@ -101,6 +137,8 @@ entry_file = tk.StringVar(value=file_url)
 tk.Label(frame_primary, text="File Excel:", font=font, bg="#f4f4f4").grid(row=0, column=0, sticky="w", padx=5, pady=2)
 tk.Entry(frame_primary, textvariable=entry_file, width=30, state='readonly', font=font).grid(row=0, column=1, padx=5, pady=2)
 tk.Button(frame_primary, text="Carica un altro file", command=upload_file, font=font, relief="raised", padx=5, pady=5).grid(row=1, column=0, columnspan=2, pady=5)
+progress = ttk.Progressbar(frame_primary, mode="indeterminate", length=200)
+progress.grid(row=2, column=0, columnspan=2, pady=2)
 
 # Secondary frames
 frame_secondary = tk.Frame(window, bg="#f4f4f4", padx=10, pady=10)
@@ -126,12 +164,23 @@ combo_thickness.pack(pady=2)
 # Button to trigger the calculation
 tk.Button(window, text="Calcolare", command=date, font=font, relief="raised", padx=10, pady=5).pack(pady=10)
 
+# Background work (file loading) so the window never freezes
+worker = segundo_plano.Trabajador(window, al_cambiar_ocupado=show_busy)
+
 # Load default file if it exists
 if os.path.exists(DEFAULT_FILE):
-    if not load_file(DEFAULT_FILE):
-        messagebox.showwarning("Attenzione", "Il file predefinito non può essere caricato. Seleziona un altro file.")
+    load_file(DEFAULT_FILE, "Il file predefinito non può essere caricato. Seleziona un altro file")
 else:
     messagebox.showinfo("Informazione", "Il file predefinito non esiste. Seleziona un file.")
 
+# Reload the table when the file is modified (e.g. saved from LibreOffice)
+watcher = vigilante.Vigilante(window, lambda: file_url, reload_file)
+watcher.iniciar()
+
+# Startup measurement (perfil_arranque.py): report the first loop iteration
+# with the modules imported so far, then close
+if os.environ.get("LASER_MEDIR_ARRANQUE"):
+    window.after(0, lambda: (print("ventana_visible", *sorted(sys.modules), flush=True), window.destroy()))
+
 # Show window
 window.mainloop()
@@ -0,0 +1,259 @@
+"""Cache de presupuestos ya calculados, en memoria y en disco.
+
+Las mismas piezas estándar se presupuestan muchas veces al día. La clave
+es la pieza normalizada (motor.DatosPieza con números como float) más la
+versión de la tabla de tarifas (IndiceTarifas.version), así que al cambiar
+la tabla los presupuestos anteriores dejan de coincidir solos.
+
+Dos niveles:
+    memoria  OrderedDict con desalojo LRU (max_memoria entradas)
+    disco    SQLite (sobrevive a los reinicios), con límite de entradas
+             (se borran las menos usadas) y de edad en segundos
+
+Buscar nunca escribe en disco: los presupuestos nuevos y la fecha de uso
+de los encontrados se juntan en memoria y se escriben en una sola
+transacción con escribir_pendientes(), o al cerrar. La ventana sólo usa
+buscar_memoria() en el hilo de Tk; calcular(), escribir_pendientes() y
+retener_version() van al trabajador en segundo plano.
+
+Sólo se guardan presupuestos válidos: los errores se recalculan siempre.
+"""
+import collections
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import instrumentacion
+import motor
+
+# Ruta de la base en disco; "" la desactiva (sólo memoria)
+VARIABLE_RUTA = "LASER_CACHE_PRESUPUESTOS"
+RUTA = ".presupuestos.sqlite"
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS presupuestos (
+    clave   TEXT PRIMARY KEY,
+    version TEXT NOT NULL,
+    valores TEXT NOT NULL,
+    segundos REAL NOT NULL,
+    creado  REAL NOT NULL,
+    usado   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS presupuestos_usado ON presupuestos (usado);
+CREATE INDEX IF NOT EXISTS presupuestos_version ON presupuestos (version);
+"""
+
+
+def clave(version, datos):
+    """(versión de la tabla, pieza normalizada); en disco se guarda como JSON."""
+    return (version, datos.material.strip(), *map(float, datos[1:]))
+
+
+class CachePresupuestos:
+    def __init__(self, ruta=None, max_memoria=1024, max_disco=100_000, max_edad_s=30 * 24 * 3600,
+                 max_pendientes=256):
+        if ruta is None:
+            ruta = os.environ.get(VARIABLE_RUTA, RUTA)
+        self.ruta = ruta
+        self.max_memoria = max_memoria
+        self.max_disco = max_disco
+        self.max_edad_s = max_edad_s
+        self.max_pendientes = max_pendientes
+        self._memoria = collections.OrderedDict()
+        # Cambios aún no escritos en disco: presupuestos nuevos y fechas de uso
+        self._pendientes = {}
+        self._usados = {}
+        self._candado = threading.Lock()     # memoria y pendientes
+        self._candado_db = threading.Lock()  # conexión SQLite
+        self._conexion = None
+        self._escrituras = 0
+        self._entradas_disco = None  # se cuenta al escribir, nunca en resumen()
+        self.estadisticas = {
+            "aciertos_memoria": 0,
+            "aciertos_disco": 0,
+            "fallos": 0,
+            # Tiempo de cálculo de las entradas encontradas menos el de buscarlas
+            # (neto: puede ser negativo si el cálculo es más barato que el disco)
+            "segundos_ahorrados": 0.0,
+        }
+
+    def _db(self):
+        # Se abre al primer uso; si no se puede, se sigue sólo en memoria
+        if self._conexion is None and self.ruta:
+            try:
+                self._conexion = sqlite3.connect(self.ruta, check_same_thread=False)
+                self._conexion.execute("PRAGMA journal_mode=WAL")
+                self._conexion.execute("PRAGMA synchronous=NORMAL")
+                self._conexion.executescript(_ESQUEMA)
+            except sqlite3.Error:
+                self._conexion = None
+                self.ruta = ""
+        return self._conexion
+
+    def buscar_memoria(self, indice, datos):
+        """Presupuesto guardado en memoria, o None; nunca toca el disco.
+
+        Es lo único que la ventana hace en el hilo de Tk: si falta, calcular()
+        va al trabajador.
+        """
+        return self._buscar_memoria(clave(indice.version, datos), time.perf_counter(), time.time())
+
+    def _buscar_memoria(self, llave, inicio, ahora):
+        with self._candado:
+            guardado = self._memoria.get(llave) or self._pendientes.get(llave)
+            if guardado is not None and ahora - guardado[2] <= self.max_edad_s:
+                self.estadisticas["aciertos_memoria"] += 1
+                return self._acierto(llave, guardado, ahora, inicio)
+        return None
+
+    def calcular(self, indice, datos):
+        """motor.calcular_presupuesto(indice, datos), usando el cache si se puede.
+
+        Puede leer el disco (si no está en memoria) y, si se juntan más de
+        max_pendientes cambios, escribirlo: en la ventana va al trabajador.
+        Los presupuestos nuevos y las fechas de uso quedan pendientes hasta
+        escribir_pendientes() (o cerrar()).
+        """
+        llave = clave(indice.version, datos)
+        inicio = time.perf_counter()
+        ahora = time.time()
+        presupuesto = self._buscar_memoria(llave, inicio, ahora)
+        if presupuesto is not None:
+            return presupuesto
+        with instrumentacion.tramo("cache/disco"):
+            guardado = self._leer_disco(llave)
+        if guardado is not None:
+            with self._candado:
+                self.estadisticas["aciertos_disco"] += 1
+                return self._acierto(llave, guardado, ahora, inicio)
+
+        inicio = time.perf_counter()
+        presupuesto = motor.calcular_presupuesto(indice, datos)
+        guardado = (presupuesto, time.perf_counter() - inicio, time.time())
+        with self._candado:
+            self.estadisticas["fallos"] += 1
+            self._recordar(llave, guardado)
+            self._pendientes[llave] = guardado
+            lleno = len(self._pendientes) + len(self._usados) > self.max_pendientes
+        if lleno:
+            self.escribir_pendientes()
+        return presupuesto
+
+    def _acierto(self, llave, guardado, ahora, inicio):
+        # Con el candado tomado: el uso se anota en memoria, no en disco
+        self._recordar(llave, guardado)
+        self._usados[llave] = ahora
+        presupuesto, segundos, _ = guardado
+        self.estadisticas["segundos_ahorrados"] += segundos - (time.perf_counter() - inicio)
+        return presupuesto
+
+    def _recordar(self, llave, guardado):
+        # guardado = (Presupuesto, segundos que costó calcularlo, fecha de creación)
+        self._memoria[llave] = guardado
+        self._memoria.move_to_end(llave)
+        while len(self._memoria) > self.max_memoria:
+            self._memoria.popitem(last=False)
+
+    def _leer_disco(self, llave):
+        # Sólo lectura: las entradas vencidas se borran al podar
+        with self._candado_db:
+            db = self._db()
+            if db is None:
+                return None
+            fila = db.execute("SELECT valores, segundos, creado FROM presupuestos WHERE clave = ?",
+                              (json.dumps(llave),)).fetchone()
+        if fila is None or time.time() - fila[2] > self.max_edad_s:
+            return None
+        return motor.Presupuesto(*json.loads(fila[0])), fila[1], fila[2]
+
+    def escribir_pendientes(self):
+        """Escribe en una transacción los presupuestos nuevos y las fechas de uso.
+
+        Pensado para llamarse fuera del hilo de la ventana (app.py lo envía
+        al trabajador después de cada cálculo).
+        """
+        with self._candado:
+            pendientes, self._pendientes = self._pendientes, {}
+            usados, self._usados = self._usados, {}
+        if not pendientes and not usados and self._entradas_disco is not None:
+            return
+        with self._candado_db:
+            db = self._db()
+            if db is None:
+                return
+            with instrumentacion.tramo("cache/escritura"):
+                with db:
+                    db.executemany(
+                        "INSERT OR REPLACE INTO presupuestos VALUES (?, ?, ?, ?, ?, ?)",
+                        [(json.dumps(llave), llave[0], json.dumps(list(presupuesto)), segundos, creado,
+                          usados.pop(llave, creado))
+                         for llave, (presupuesto, segundos, creado) in pendientes.items()])
+                    db.executemany("UPDATE presupuestos SET usado = ? WHERE clave = ?",
+                                   [(usado, json.dumps(llave)) for llave, usado in usados.items()])
+                    # Los límites se aplican cada tanto, no en cada escritura
+                    self._escrituras += 1
+                    if self._escrituras % 20 == 1:
+                        self._podar(db, time.time())
+            self._entradas_disco = db.execute("SELECT COUNT(*) FROM presupuestos").fetchone()[0]
+
+    def _podar(self, db, ahora):
+        db.execute("DELETE FROM presupuestos WHERE creado < ?", (ahora - self.max_edad_s,))
+        db.execute(
+            "DELETE FROM presupuestos WHERE clave IN ("
+            " SELECT clave FROM presupuestos ORDER BY usado DESC LIMIT -1 OFFSET ?)",
+            (self.max_disco,))
+
+    def retener_version(self, version):
+        """Borra los presupuestos de otras versiones de la tabla (al recargarla)."""
+        with self._candado:
+            for guardados in (self._memoria, self._pendientes, self._usados):
+                for llave in [ll for ll in guardados if ll[0] != version]:
+                    del guardados[llave]
+        with self._candado_db:
+            db = self._db()
+            if db is not None:
+                with db:
+                    db.execute("DELETE FROM presupuestos WHERE version != ?", (version,))
+                self._entradas_disco = db.execute("SELECT COUNT(*) FROM presupuestos").fetchone()[0]
+
+    def limpiar(self):
+        with self._candado:
+            self._memoria.clear()
+            self._pendientes.clear()
+            self._usados.clear()
+        with self._candado_db:
+            db = self._db()
+            if db is not None:
+                with db:
+                    db.execute("DELETE FROM presupuestos")
+                self._entradas_disco = 0
+
+    def resumen(self):
+        """Contadores, entradas por nivel y tasa de aciertos."""
+        with self._candado:
+            resumen = dict(self.estadisticas)
+            resumen["entradas_memoria"] = len(self._memoria)
+            resumen["pendientes"] = len(self._pendientes)
+        # Sin consultar el disco: la cuenta se actualiza al escribir (None hasta entonces)
+        resumen["entradas_disco"] = self._entradas_disco if self.ruta else 0
+        aciertos = resumen["aciertos_memoria"] + resumen["aciertos_disco"]
+        consultas = aciertos + resumen["fallos"]
+        resumen["tasa_aciertos"] = aciertos / consultas if consultas else 0.0
+        return resumen
+
+    def linea_resumen(self):
+        """Resumen en una línea para el registro o la ventana."""
+        r = self.resumen()
+        return (f"Cache: {r['tasa_aciertos']:.0%} hit "
+                f"({r['aciertos_memoria']} mem, {r['aciertos_disco']} disco, {r['fallos']} calcolati), "
+                f"{r['entradas_memoria']}/{'?' if r['entradas_disco'] is None else r['entradas_disco']} voci, "
+                f"{r['segundos_ahorrados'] * 1000:.2f} ms risparmiati")
+
+    def cerrar(self):
+        self.escribir_pendientes()
+        with self._candado_db:
+            if self._conexion is not None:
+                self._conexion.close()
+                self._conexion = None
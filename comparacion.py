@@ -0,0 +1,105 @@
+"""Comparación de una pieza en todos los materiales y espesores de la tabla.
+
+"¿Y en Inox 2 mm en vez de Acero 3 mm?": en lugar de presupuestar fila por
+fila, las fórmulas de motor.py se aplican de una vez sobre las columnas de
+IndiceTarifas.arrays() (CW, 1, 2, Duracion, Costo) con la geometría y las
+tarifas de la pieza fijas. El resultado es una matriz ordenada por total,
+con la opción más económica y la más rápida señaladas.
+
+    matriz = comparar(indice, {"perimetro": 1200, "aujeros": 4, ...})
+    matriz.datos["Material"][matriz.economica], matriz.datos["total"][matriz.economica]
+
+Las filas de la tabla con datos inválidos (CW cero, duración vacía, ...)
+quedan al final con el mismo mensaje que daría motor.py.
+"""
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+import instrumentacion
+import lote
+import motor
+
+# Columna de las notas en tabla_virtual.COLUMNAS_COMPARACION y sus textos
+COLUMNA_NOTA = "nota"
+ECONOMICA = "più economico"
+RAPIDA = "più veloce"
+
+
+class Comparacion(NamedTuple):
+    datos: dict                  # columna -> array, ya ordenadas por total
+    economica: Optional[int]     # posición de la más económica (None si ninguna es válida)
+    rapida: Optional[int]        # posición de la de menor tiempo de corte
+    validas: int
+
+    def __len__(self):
+        return len(self.datos["total"])
+
+    def fila(self, posicion):
+        """{columna: valor} de la posición `posicion` del ranking."""
+        return {clave: columna[posicion] for clave, columna in self.datos.items()}
+
+    def modelo(self):
+        """tabla_virtual.ResultadosLote de la matriz, con las dos mejores resaltadas."""
+        import tabla_virtual
+
+        modelo = tabla_virtual.ResultadosLote(tabla_virtual.COLUMNAS_COMPARACION, self.datos)
+        for posicion, etiqueta in ((self.rapida, "rapida"), (self.economica, "economica")):
+            if posicion is not None:
+                modelo.resaltadas[posicion] = etiqueta
+        return modelo
+
+
+def campos_de(datos):
+    """Campos numéricos de un motor.DatosPieza (material y espesor no cuentan)."""
+    return {campo: float(getattr(datos, campo))
+            for campo in lote.CAMPOS_PIEZA + lote.CAMPOS_TARIFA + ("tiempo_desplazamiento_horas",)}
+
+
+def comparar(indice, campos):
+    """Presupuesto de la pieza `campos` en cada fila de `indice`, ordenado por total.
+
+    `campos` tiene perimetro, aujeros, ancho, largo, neto_pack, costo_pack,
+    costo_maquina, costo_operario y opcionalmente tiempo_desplazamiento_horas.
+    """
+    for campo in lote.CAMPOS_PIEZA + lote.CAMPOS_TARIFA:
+        if campo not in campos or motor.es_vacio(campos[campo]):
+            raise motor.ErrorPresupuesto(f"Manca {campo}")
+    arrays = indice.arrays()
+    n = len(arrays["cw"])
+    with instrumentacion.tramo("comparacion/formulas"):
+        resultado = lote.calcular_sobre_tarifas(campos, arrays, np.full(n, "", dtype=object))
+
+    with instrumentacion.tramo("comparacion/orden"):
+        # Estable: a igual total queda el orden de la tabla; los inválidos (NaN) al final
+        orden = np.argsort(resultado["total"], kind="stable")
+        datos = {"puesto": np.arange(1, n + 1, dtype=float),
+                 "Material": arrays["material"][orden],
+                 "Espesor": arrays["espesor"][orden]}
+        for clave, columna in resultado.items():
+            datos[clave] = columna[orden]
+
+    validas = int(np.count_nonzero(~np.isnan(datos["total"])))
+    datos["puesto"][validas:] = np.nan
+    economica = rapida = None
+    notas = np.full(n, "", dtype=object)
+    if validas:
+        economica = 0
+        rapida = int(np.nanargmin(datos["tiempo_corte_horas"]))
+        notas[rapida] = RAPIDA
+        notas[economica] = ECONOMICA if rapida != economica else f"{ECONOMICA} e {RAPIDA}"
+    datos[COLUMNA_NOTA] = notas
+    return Comparacion(datos, economica, rapida, validas)
+
+
+def resumen(matriz):
+    """Líneas de texto con la opción más económica y la más rápida."""
+    if matriz.economica is None:
+        return ["Nessuna riga della tabella dà un preventivo valido."]
+    lineas = []
+    for titulo, posicion in (("Più economico", matriz.economica), ("Più veloce", matriz.rapida)):
+        fila = matriz.fila(posicion)
+        lineas.append(f"{titulo}: {fila['Material']} {fila['Espesor']:g} mm, "
+                      f"{fila['total']:.2f} EUR, {fila['tiempo_corte_horas'] * 60:.2f} min")
+    lineas.append(f"{matriz.validas} di {len(matriz)} combinazioni valide")
+    return lineas
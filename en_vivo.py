@@ -0,0 +1,105 @@
+"""Presupuesto en vivo: la cadena de motor.py como grafo incremental.
+
+Las entradas son los textos de los campos (con los nombres de motor.CAMPOS),
+el material, el espesor y el índice de tarifas. Cambiar un campo recalcula
+sólo lo que depende de él, por ejemplo:
+
+    costo_operario -> total
+    perimetro      -> tiempos -> consumo_gas -> costo_gas/costo_maquina -> total
+    material       -> fila (búsqueda en el índice) -> ...
+"""
+import grafo
+import motor
+
+# Mientras la tabla se carga en segundo plano
+CARGANDO = "Tabella delle tariffe in caricamento..."
+
+
+def _convertidor(mensaje):
+    def convertir(texto):
+        if motor.es_vacio(texto):
+            raise motor.ErrorPresupuesto(mensaje)
+        try:
+            return float(texto)
+        except ValueError:
+            raise motor.ErrorPresupuesto(motor.NUMEROS_INVALIDOS) from None
+    return convertir
+
+
+def _buscar_fila(indice, material, espesor):
+    if indice is None:
+        raise motor.ErrorPresupuesto(CARGANDO)
+    if not material or motor.es_vacio(espesor):
+        raise motor.ErrorPresupuesto(motor.SIN_MATERIAL)
+    try:
+        espesor = float(espesor)
+    except ValueError:
+        raise motor.ErrorPresupuesto(motor.NUMEROS_INVALIDOS) from None
+    return motor.buscar_tarifa(indice, material, espesor)
+
+
+def _consumo_gas(fila, tiempos, neto_pack):
+    return motor.calcular_consumo_gas(fila, tiempos[2], neto_pack)
+
+
+def _costo_maquina(tiempos, costo_maquina):
+    return tiempos[2] * costo_maquina
+
+
+def _costo_gas(consumo, costo_pack):
+    return consumo * costo_pack
+
+
+def _total(costo_gas, costo_maquina, costo_peso, costo_operario):
+    return costo_gas + costo_maquina + costo_peso + costo_operario
+
+
+def crear_grafo():
+    g = grafo.Grafo()
+    g.entrada("indice")
+    g.entrada("material", "")
+    g.entrada("espesor", "")
+    for campo, mensaje in motor.CAMPOS:
+        g.entrada(campo, "")
+        g.nodo(f"valor_{campo}", _convertidor(mensaje), campo)
+
+    g.nodo("fila", _buscar_fila, "indice", "material", "espesor")
+    g.nodo("tiempos", motor.calcular_tiempo_corte, "fila", "valor_perimetro", "valor_aujeros")
+    g.nodo("consumo_gas", _consumo_gas, "fila", "tiempos", "valor_neto_pack")
+    g.nodo("costo_gas", _costo_gas, "consumo_gas", "valor_costo_pack")
+    g.nodo("costo_maquina", _costo_maquina, "tiempos", "valor_costo_maquina")
+    g.nodo("costo_peso", motor.calcular_costo_peso, "fila", "valor_ancho", "valor_largo")
+    g.nodo("total", _total, "costo_gas", "costo_maquina", "costo_peso", "valor_costo_operario")
+    return g
+
+
+def datos(g):
+    """motor.DatosPieza con los valores actuales del grafo; lanza el primer error."""
+    fila = g.valor("fila")
+    return motor.DatosPieza(
+        material=fila.material,
+        espesor=fila.espesor,
+        **{campo: g.valor(f"valor_{campo}") for campo, _ in motor.CAMPOS},
+    )
+
+
+def campos(g):
+    """{campo: número} de los campos de la pieza, sin material ni espesor; lanza el primer error."""
+    return {campo: g.valor(f"valor_{campo}") for campo, _ in motor.CAMPOS}
+
+
+def presupuesto(g):
+    """Presupuesto con los valores actuales del grafo; lanza el primer error."""
+    total = g.valor("total")
+    tiempo_corte, tiempo_aujeros, tiempo_total = g.valor("tiempos")
+    return motor.Presupuesto(
+        tiempo_corte_horas=tiempo_corte,
+        tiempo_aujeros_horas=tiempo_aujeros,
+        tiempo_total_horas=tiempo_total,
+        consumo_gas=g.valor("consumo_gas"),
+        costo_gas=g.valor("costo_gas"),
+        costo_maquina=g.valor("costo_maquina"),
+        costo_peso=g.valor("costo_peso"),
+        costo_operario=g.valor("valor_costo_operario"),
+        total=total,
+    )
@@ -0,0 +1,161 @@
+"""Geometría de dibujos DXF con cache por contenido y carpetas en paralelo.
+
+La clave del cache es el sha256 del archivo (más lector_dxf.VERSION): un
+dibujo que no cambió no se vuelve a leer aunque se haya copiado o
+renombrado, y uno modificado se lee de nuevo aunque conserve el nombre.
+El cache vive en una base SQLite (.geometrias.sqlite, o la ruta de
+LASER_CACHE_DXF; "" lo desactiva).
+
+Una carpeta se lee así: se calculan los hashes, se sirven los aciertos y
+sólo los dibujos nuevos se reparten entre procesos.
+
+    cache = CacheGeometrias()
+    geometria = cache.leer("pieza.dxf")
+    for ruta, geometria, error in cache.leer_carpeta("dibujos/", trabajadores=8):
+        ...
+"""
+import concurrent.futures
+import glob
+import json
+import os
+import sqlite3
+import threading
+
+import instantanea
+import lector_dxf
+import motor
+
+VARIABLE_RUTA = "LASER_CACHE_DXF"
+RUTA = ".geometrias.sqlite"
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS geometrias (
+    huella  TEXT PRIMARY KEY,  -- sha256 del archivo y versión del lector
+    valores TEXT NOT NULL      -- GeometriaDXF como JSON
+);
+"""
+
+
+def _leer_con_error(ruta):
+    # En los procesos trabajadores: un dibujo roto no detiene la carpeta
+    try:
+        return lector_dxf.leer_dxf(ruta), ""
+    except motor.ErrorPresupuesto as e:
+        return None, str(e)
+
+
+class CacheGeometrias:
+    def __init__(self, ruta=None):
+        if ruta is None:
+            ruta = os.environ.get(VARIABLE_RUTA, RUTA)
+        self.ruta = ruta
+        self._conexion = None
+        self._candado = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def _db(self):
+        # Se abre al primer uso; si no se puede, se sigue sin cache
+        if self._conexion is None and self.ruta:
+            try:
+                self._conexion = sqlite3.connect(self.ruta, check_same_thread=False)
+                self._conexion.execute("PRAGMA journal_mode=WAL")
+                self._conexion.executescript(_ESQUEMA)
+            except sqlite3.Error:
+                self._conexion = None
+                self.ruta = ""
+        return self._conexion
+
+    def cerrar(self):
+        if self._conexion is not None:
+            self._conexion.close()
+            self._conexion = None
+
+    @staticmethod
+    def huella(ruta):
+        return f"{instantanea.huella(ruta)}:{lector_dxf.VERSION}"
+
+    def _buscar(self, huella):
+        with self._candado:
+            db = self._db()
+            if db is None:
+                return None
+            fila = db.execute("SELECT valores FROM geometrias WHERE huella = ?", (huella,)).fetchone()
+        if fila is None:
+            return None
+        valores = json.loads(fila[0])
+        valores["inicios"] = [tuple(punto) for punto in valores["inicios"]]
+        return lector_dxf.GeometriaDXF(**valores)
+
+    def _guardar(self, huella, geometria):
+        with self._candado:
+            db = self._db()
+            if db is None:
+                return
+            with db:
+                db.execute("INSERT OR REPLACE INTO geometrias VALUES (?, ?)",
+                           (huella, json.dumps(geometria._asdict())))
+
+    def leer(self, ruta):
+        """GeometriaDXF de `ruta`, del cache si el contenido ya se leyó.
+
+        Los errores son ErrorPresupuesto, como en lector_dxf.leer_dxf.
+        """
+        try:
+            huella = self.huella(ruta)
+        except OSError as e:
+            raise motor.ErrorPresupuesto(f"Impossibile leggere {ruta}: {e.strerror or e}") from None
+        geometria = self._buscar(huella)
+        if geometria is not None:
+            self.aciertos += 1
+            return geometria
+        geometria = lector_dxf.leer_dxf(ruta)
+        self.fallos += 1
+        self._guardar(huella, geometria)
+        return geometria
+
+    @staticmethod
+    def dxf_de_carpeta(carpeta):
+        return sorted(ruta for ruta in glob.glob(os.path.join(carpeta, "*"))
+                      if ruta.lower().endswith(".dxf") and os.path.isfile(ruta))
+
+    def leer_carpeta(self, rutas, trabajadores=os.cpu_count() or 1):
+        """[(ruta, GeometriaDXF o None, error)] de una carpeta (sus *.dxf) o lista de archivos.
+
+        El orden es el de las rutas (alfabético para una carpeta).
+        """
+        if isinstance(rutas, str):
+            rutas = self.dxf_de_carpeta(rutas)
+        resultados = {}
+        pendientes = {}  # huella -> rutas con ese contenido
+        for ruta in rutas:
+            try:
+                huella = self.huella(ruta)
+            except OSError as e:
+                resultados[ruta] = (None, f"Impossibile leggere {ruta}: {e.strerror or e}")
+                continue
+            geometria = self._buscar(huella)
+            if geometria is not None:
+                self.aciertos += 1
+                resultados[ruta] = (geometria, "")
+            else:
+                pendientes.setdefault(huella, []).append(ruta)
+
+        # Un solo proceso trabajador por dibujo distinto (las copias se leen una vez)
+        trabajos = [(huella, rutas_iguales[0]) for huella, rutas_iguales in pendientes.items()]
+        if trabajadores <= 1 or len(trabajos) <= 1:
+            leidos = [_leer_con_error(ruta) for _, ruta in trabajos]
+        else:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=trabajadores) as pool:
+                leidos = list(pool.map(_leer_con_error, (ruta for _, ruta in trabajos),
+                                       chunksize=max(1, len(trabajos) // (4 * trabajadores))))
+        for (huella, _), (geometria, error) in zip(trabajos, leidos):
+            self.fallos += 1
+            if geometria is not None:
+                self._guardar(huella, geometria)
+            for ruta in pendientes[huella]:
+                resultados[ruta] = (geometria, error)
+        return [(ruta, *resultados[ruta]) for ruta in rutas]
+
+    def linea_resumen(self):
+        return f"Geometrie: {self.aciertos} dalla cache, {self.fallos} lette"
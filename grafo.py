@@ -0,0 +1,86 @@
+"""Grafo de dependencias con recálculo incremental.
+
+Las entradas se fijan con `fijar`; sólo los nodos que dependen (directa o
+indirectamente) de una entrada que cambió se marcan como sucios y se
+recalculan en `recalcular`, en orden topológico. Un nodo que lanza
+ErrorPresupuesto guarda el error y lo transmite a sus dependientes sin
+ejecutarlos.
+"""
+from motor import ErrorPresupuesto
+
+
+class Grafo:
+    def __init__(self):
+        self._funciones = {}     # nodo -> (funcion, dependencias)
+        self._dependientes = {}  # nombre -> nodos que lo usan
+        self._valores = {}
+        self._errores = {}
+        self._sucios = set()
+        # Los nodos se registran después de sus dependencias: el orden de
+        # registro ya es un orden topológico
+        self._orden = []
+        # Nodos ejecutados en el último recalcular() (para diagnóstico)
+        self.recalculados = []
+
+    def entrada(self, nombre, valor=None):
+        self._valores[nombre] = valor
+        self._dependientes.setdefault(nombre, [])
+
+    def nodo(self, nombre, funcion, *dependencias):
+        for dependencia in dependencias:
+            if dependencia not in self._dependientes:
+                raise KeyError(f"dependencia desconocida: {dependencia}")
+            self._dependientes[dependencia].append(nombre)
+        self._funciones[nombre] = (funcion, dependencias)
+        self._dependientes[nombre] = []
+        self._orden.append(nombre)
+        self._sucios.add(nombre)
+
+    def fijar(self, nombre, valor):
+        """Cambia una entrada. Devuelve False si el valor era el mismo."""
+        if self._valores.get(nombre) is valor or self._valores.get(nombre) == valor:
+            return False
+        self._valores[nombre] = valor
+        pendientes = list(self._dependientes[nombre])
+        while pendientes:
+            dependiente = pendientes.pop()
+            if dependiente not in self._sucios:
+                self._sucios.add(dependiente)
+                pendientes.extend(self._dependientes[dependiente])
+        return True
+
+    def recalcular(self):
+        """Recalcula los nodos sucios. Devuelve la lista de nodos ejecutados."""
+        recalculados = []
+        if self._sucios:
+            for nombre in self._orden:
+                if nombre not in self._sucios:
+                    continue
+                funcion, dependencias = self._funciones[nombre]
+                error = next((self._errores[d] for d in dependencias if d in self._errores), None)
+                if error is None:
+                    try:
+                        self._valores[nombre] = funcion(*(self._valores[d] for d in dependencias))
+                        self._errores.pop(nombre, None)
+                    except ErrorPresupuesto as e:
+                        error = e
+                    recalculados.append(nombre)
+                if error is not None:
+                    self._valores[nombre] = None
+                    self._errores[nombre] = error
+            self._sucios.clear()
+        self.recalculados = recalculados
+        return recalculados
+
+    def valor(self, nombre):
+        """Valor actual del nodo (recalcula si hace falta); lanza su error si lo tiene."""
+        if self._sucios:
+            self.recalcular()
+        if nombre in self._errores:
+            raise self._errores[nombre]
+        return self._valores[nombre]
+
+    def error(self, nombre):
+        if self._sucios:
+            self.recalcular()
+        return self._errores.get(nombre)
@@ -0,0 +1,203 @@
+"""Rangos de costo por Monte Carlo en lugar de un único presupuesto.
+
+La velocidad de corte real (CW), los tiempos por agujero (columnas 1 y 2)
+y la duración del pack de gas varían un ±10-20% en las máquinas. Cada
+columna recibe una tolerancia (distribución y amplitud relativa), se
+sortean los factores de todas las muestras de una vez y las fórmulas de
+lote.formulas se evalúan sobre arrays (piezas, muestras): no hay bucles
+de Python por muestra. El resultado son los percentiles p5/p50/p95 del
+total y de cada componente.
+
+    tolerancias = leer_tolerancias("cw=0.15,duracion=normal:0.1")
+    rangos = simular(indice, datos, tolerancias, muestras=100_000)
+    rangos["total"].p95
+
+Para un lote todas las piezas usan los mismos factores sorteados (números
+aleatorios comunes): los percentiles de cada pieza son los mismos y las
+diferencias entre piezas no llevan ruido de muestreo.
+"""
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+import instrumentacion
+import lote
+import motor
+
+PERCENTILES = (5, 50, 95)
+MUESTRAS = 100_000
+# Elementos (piezas x muestras) por bloque al simular un lote: acota la memoria
+ELEMENTOS_BLOQUE = 2_000_000
+# Un factor no baja de aquí (una normal ancha podría dar CW negativo)
+FACTOR_MINIMO = 0.05
+
+# Columnas de la tabla que varían, con los nombres aceptados en leer_tolerancias
+COLUMNAS = {
+    "cw": ("cw", "CW"),
+    "tiempo_1": ("tiempo_1", "1"),
+    "tiempo_2": ("tiempo_2", "2"),
+    "duracion": ("duracion", "Duracion"),
+}
+
+# Componentes con rango (Costo_operario es fijo)
+COMPONENTES = ("tiempo_corte_horas", "cantidad_gas_dict", "costo_gas", "costo_maquina", "costo_peso", "total")
+
+
+class Tolerancia(NamedTuple):
+    distribucion: str  # "uniforme" (±relativa), "normal" (desvío relativa) o "triangular" (±relativa)
+    relativa: float
+
+
+class Rango(NamedTuple):
+    p5: float
+    p50: float
+    p95: float
+    media: float
+
+
+DISTRIBUCIONES = ("uniforme", "normal", "triangular")
+TOLERANCIAS = {columna: Tolerancia("uniforme", 0.15) for columna in COLUMNAS}
+
+
+def _tolerancia(texto):
+    distribucion, _, valor = texto.rpartition(":")
+    distribucion = distribucion.strip().lower() or "uniforme"
+    if distribucion not in DISTRIBUCIONES:
+        raise motor.ErrorPresupuesto(f"Distribuzione sconosciuta: {distribucion} (usa {', '.join(DISTRIBUCIONES)})")
+    try:
+        relativa = float(valor.strip().rstrip("%")) / (100 if valor.strip().endswith("%") else 1)
+    except ValueError:
+        raise motor.ErrorPresupuesto(f"Tolleranza non valida: {texto}") from None
+    if relativa < 0:
+        raise motor.ErrorPresupuesto(f"Tolleranza negativa: {texto}")
+    return Tolerancia(distribucion, relativa)
+
+
+def leer_tolerancias(texto):
+    """{columna: Tolerancia} desde "cw=0.15,duracion=normal:10%,2=triangular:0.2".
+
+    Un elemento sin "columna=" vale para todas las columnas; las que no se
+    nombran no varían (salvo que el texto esté vacío: TOLERANCIAS).
+    """
+    if not texto or not texto.strip():
+        return dict(TOLERANCIAS)
+    nombres = {nombre.lower(): columna for columna, alias in COLUMNAS.items() for nombre in alias}
+    tolerancias = {}
+    for parte in texto.split(","):
+        if not parte.strip():
+            continue
+        nombre, igual, valor = parte.partition("=")
+        if not igual:
+            tolerancias.update(dict.fromkeys(COLUMNAS, _tolerancia(parte)))
+            continue
+        columna = nombres.get(nombre.strip().lower())
+        if columna is None:
+            raise motor.ErrorPresupuesto(f"Colonna senza tolleranza possibile: {nombre.strip()} "
+                                         f"(usa {', '.join(alias[1] for alias in COLUMNAS.values())})")
+        tolerancias[columna] = _tolerancia(valor)
+    return tolerancias
+
+
+def factores(tolerancias, muestras=MUESTRAS, semilla=None):
+    """{columna: array (muestras,)} de factores multiplicativos alrededor de 1."""
+    generador = np.random.default_rng(semilla)
+    resultado = {}
+    for columna, tolerancia in tolerancias.items():
+        r = tolerancia.relativa
+        if tolerancia.distribucion == "normal":
+            desvio = generador.normal(0.0, r, muestras)
+        elif tolerancia.distribucion == "triangular":
+            desvio = generador.triangular(-r, 0.0, r, muestras) if r else np.zeros(muestras)
+        else:
+            desvio = generador.uniform(-r, r, muestras)
+        resultado[columna] = np.maximum(1.0 + desvio, FACTOR_MINIMO)
+    return resultado
+
+
+def _rangos(columnas, campos):
+    # {componente: (p5, p50, p95, media)} sobre el último eje (muestras)
+    forma = np.shape(columnas["total"])
+    rangos = {}
+    for componente in ("tiempo_corte_horas", "cantidad_gas_dict", "total"):
+        valores = np.broadcast_to(columnas[componente], forma)
+        rangos[componente] = (*np.percentile(valores, PERCENTILES, axis=-1), valores.mean(axis=-1))
+    # Los costos de máquina y gas son proporcionales al tiempo y al consumo: sus
+    # percentiles son los escalados (sin ordenar otra vez; con factor negativo se invierten)
+    for componente, origen, campo in (("costo_maquina", "tiempo_corte_horas", "costo_maquina"),
+                                      ("costo_gas", "cantidad_gas_dict", "costo_pack")):
+        p5, p50, p95, media = (valor * campos[campo] for valor in rangos[origen])
+        rangos[componente] = (np.minimum(p5, p95), p50, np.maximum(p5, p95), media)
+    # costo_peso no depende de las columnas que varían
+    costo_peso = np.broadcast_to(columnas["costo_peso"], forma)[..., 0]
+    rangos["costo_peso"] = (costo_peso,) * 4
+    return {componente: rangos[componente] for componente in COMPONENTES}
+
+
+def simular(indice, datos, tolerancias=None, muestras=MUESTRAS, semilla=None):
+    """{componente: Rango} del presupuesto de `datos` (motor.DatosPieza).
+
+    Valida igual que motor.py (los errores son ErrorPresupuesto).
+    """
+    fila = motor.buscar_tarifa(indice, datos.material, datos.espesor)
+    motor.calcular_con_fila(fila, datos)
+    tolerancias = TOLERANCIAS if tolerancias is None else tolerancias
+    with instrumentacion.tramo("incertidumbre/muestras"):
+        variacion = factores(tolerancias, muestras, semilla)
+    tarifa = {columna: getattr(fila, columna) * variacion.get(columna, 1.0) for columna in lote.CAMPOS_TARIFA_TABLA}
+    with instrumentacion.tramo("incertidumbre/formulas"):
+        campos = datos._asdict()
+        columnas = lote.formulas(campos, tarifa)
+        return {componente: Rango(*(float(valor) for valor in valores))
+                for componente, valores in _rangos(columnas, campos).items()}
+
+
+def columnas_rango():
+    """Nombres de las columnas que agrega simular_lote, p. ej. total_p95."""
+    return [f"{componente}_{nombre}" for componente in COMPONENTES for nombre in Rango._fields]
+
+
+def simular_lote(indice, trabajos, valores=None, tolerancias=None, muestras=10_000, semilla=None):
+    """DataFrame con columnas_rango() para cada fila de `trabajos` (NaN en las filas con error).
+
+    Mismas entradas que lote.calcular_lote; las piezas se simulan por
+    bloques de ELEMENTOS_BLOQUE / muestras filas.
+    """
+    valores = valores or {}
+    tolerancias = TOLERANCIAS if tolerancias is None else tolerancias
+    base = lote.calcular_lote(indice, trabajos, valores)
+    validas = np.flatnonzero(base[lote.COLUMNA_ERROR].to_numpy() == "")
+
+    salida = np.full((len(trabajos), len(columnas_rango())), np.nan)
+    if len(validas):
+        posiciones = lote.posiciones_tarifa(
+            indice, trabajos["Material"].to_numpy(dtype=object)[validas],
+            pd.to_numeric(trabajos["Espesor"], errors="coerce").to_numpy(dtype=float)[validas])
+        arrays = indice.arrays()
+        campos = {campo: lote.numeros(trabajos, campo, valores)[validas]
+                  for campo in lote.CAMPOS_PIEZA + lote.CAMPOS_TARIFA}
+        with instrumentacion.tramo("incertidumbre/muestras"):
+            variacion = factores(tolerancias, muestras, semilla)
+
+        paso = max(1, ELEMENTOS_BLOQUE // muestras)
+        for inicio in range(0, len(validas), paso):
+            bloque = slice(inicio, inicio + paso)
+            # Piezas en el eje 0, muestras en el eje 1
+            tarifa = {columna: arrays[columna][posiciones[bloque], None] * variacion.get(columna, 1.0)
+                      for columna in lote.CAMPOS_TARIFA_TABLA}
+            campos_bloque = {campo: valores_campo[bloque] for campo, valores_campo in campos.items()}
+            with instrumentacion.tramo("incertidumbre/formulas"):
+                columnas = lote.formulas({campo: valores_campo[:, None]
+                                          for campo, valores_campo in campos_bloque.items()}, tarifa)
+                resumen = _rangos(columnas, campos_bloque)
+            salida[validas[bloque]] = np.column_stack(
+                [columna for componente in COMPONENTES for columna in resumen[componente]])
+    return pd.DataFrame(salida, columns=columnas_rango(), index=trabajos.index)
+
+
+def tabla(rangos):
+    """Texto con una línea por componente: p5, p50, p95 y media."""
+    lineas = [f"{'':20} {'p5':>12} {'p50':>12} {'p95':>12} {'media':>12}"]
+    for componente, rango in rangos.items():
+        lineas.append(f"{componente:20} " + " ".join(f"{valor:12.6f}" for valor in rango))
+    return "\n".join(lineas)
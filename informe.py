@@ -0,0 +1,297 @@
+"""Escritura de informes en .ods, .xlsx o .csv fila a fila.
+
+Los escritores reciben las filas como secuencias (sin DataFrame intermedio)
+y las vuelcan directamente al archivo; para .ods y .xlsx el XML de la hoja
+se escribe en streaming dentro del zip. Con agregar=True las filas nuevas
+se añaden a las de un informe existente con las mismas columnas.
+Salvo al agregar a un CSV (que se abre en modo "a"), cada informe se escribe
+en un temporal y se reemplaza al final, de modo que un error a mitad de
+camino nunca deja el archivo anterior a medias.
+"""
+import csv
+import math
+import numbers
+import os
+import zipfile
+
+import instrumentacion
+
+HOJA = "Sheet1"
+
+# Filas que se acumulan antes de escribir un bloque al archivo
+_FILAS_POR_BLOQUE = 1000
+
+
+class ErrorInforme(ValueError):
+    """El informe existente no es compatible con las filas a agregar."""
+
+
+def _numero(valor):
+    # Números (también los de NumPy) que no sean booleanos ni NaN/inf
+    return (isinstance(valor, numbers.Real) and not isinstance(valor, bool)
+            and math.isfinite(valor))
+
+
+def _vacio(valor):
+    return valor is None or (isinstance(valor, float) and math.isnan(valor))
+
+
+def _escapar(texto):
+    # Lo mismo que xml.sax.saxutils.quoteattr sin las comillas de fuera (saxutils
+    # importa urllib al arrancar); también vale dentro de atributos (name="...")
+    return (texto.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+            .replace('"', "&quot;"))
+
+
+def _texto_numero(valor):
+    if isinstance(valor, numbers.Integral):
+        return str(int(valor))
+    return repr(float(valor))
+
+
+class _Escritor:
+    def __init__(self, ruta, columnas, hoja=HOJA):
+        self.ruta = ruta
+        self.columnas = list(columnas)
+        self.nombre_hoja = hoja
+        self.filas = 0
+        self.temporal = f"{ruta}.{os.getpid()}.tmp"
+
+    def __enter__(self):
+        self.abrir()
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        if tipo is None:
+            self.cerrar()
+            os.replace(self.temporal, self.ruta)
+        else:
+            self.cerrar()
+            if os.path.exists(self.temporal):
+                os.remove(self.temporal)
+        return False
+
+    def escribir(self, filas):
+        bloque = []
+        for fila in filas:
+            bloque.append(fila)
+            if len(bloque) >= _FILAS_POR_BLOQUE:
+                self._escribir_bloque(bloque)
+                bloque = []
+        if bloque:
+            self._escribir_bloque(bloque)
+
+    def _escribir_bloque(self, filas):
+        raise NotImplementedError
+
+    def abrir(self):
+        raise NotImplementedError
+
+    def cerrar(self):
+        raise NotImplementedError
+
+
+class EscritorCSV(_Escritor):
+    def abrir(self):
+        self.archivo = open(self.temporal, "w", newline="", encoding="utf-8")
+        self.csv = csv.writer(self.archivo)
+        self.csv.writerow(self.columnas)
+
+    def _escribir_bloque(self, filas):
+        self.csv.writerows(
+            ["" if _vacio(v) else v for v in fila] for fila in filas)
+        self.filas += len(filas)
+
+    def cerrar(self):
+        self.archivo.close()
+
+
+_CONTENIDO_ODS = (
+    '<?xml version="1.0" encoding="UTF-8"?>'
+    '<office:document-content'
+    ' xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0"'
+    ' xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0"'
+    ' xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0"'
+    ' office:version="1.2"><office:body><office:spreadsheet>'
+    '<table:table table:name="{hoja}">'
+)
+_FIN_ODS = '</table:table></office:spreadsheet></office:body></office:document-content>'
+_MANIFIESTO_ODS = (
+    '<?xml version="1.0" encoding="UTF-8"?>'
+    '<manifest:manifest xmlns:manifest="urn:oasis:names:tc:opendocument:xmlns:manifest:1.0" manifest:version="1.2">'
+    '<manifest:file-entry manifest:full-path="/" manifest:media-type="application/vnd.oasis.opendocument.spreadsheet"/>'
+    '<manifest:file-entry manifest:full-path="content.xml" manifest:media-type="text/xml"/>'
+    '</manifest:manifest>'
+)
+
+
+def _celda_ods(valor):
+    if _vacio(valor):
+        return "<table:table-cell/>"
+    if _numero(valor):
+        texto = _texto_numero(valor)
+        return (f'<table:table-cell office:value-type="float" office:value="{texto}">'
+                f'<text:p>{texto}</text:p></table:table-cell>')
+    return (f'<table:table-cell office:value-type="string">'
+            f'<text:p>{_escapar(str(valor))}</text:p></table:table-cell>')
+
+
+class EscritorODS(_Escritor):
+    def abrir(self):
+        self.zip = zipfile.ZipFile(self.temporal, "w", zipfile.ZIP_DEFLATED)
+        # El tipo MIME debe ir primero y sin comprimir
+        self.zip.writestr(zipfile.ZipInfo("mimetype"), "application/vnd.oasis.opendocument.spreadsheet",
+                          compress_type=zipfile.ZIP_STORED)
+        self.zip.writestr("META-INF/manifest.xml", _MANIFIESTO_ODS)
+        self.contenido = self.zip.open("content.xml", "w")
+        self.contenido.write(_CONTENIDO_ODS.format(hoja=_escapar(self.nombre_hoja)).encode("utf-8"))
+        self._escribir_bloque([self.columnas])
+        self.filas = 0
+
+    def _escribir_bloque(self, filas):
+        partes = []
+        for fila in filas:
+            partes.append("<table:table-row>")
+            partes.extend(_celda_ods(v) for v in fila)
+            partes.append("</table:table-row>")
+        self.contenido.write("".join(partes).encode("utf-8"))
+        self.filas += len(filas)
+
+    def cerrar(self):
+        self.contenido.write(_FIN_ODS.encode("utf-8"))
+        self.contenido.close()
+        self.zip.close()
+
+
+_TIPOS_XLSX = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+_RELACIONES_XLSX = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_LIBRO_XLSX = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"'
+    ' xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{hoja}" sheetId="1" r:id="rId1"/></sheets></workbook>'
+)
+_RELACIONES_LIBRO_XLSX = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+_HOJA_XLSX = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_FIN_HOJA_XLSX = '</sheetData></worksheet>'
+
+
+def _celda_xlsx(valor):
+    if _vacio(valor):
+        return "<c/>"
+    if _numero(valor):
+        return f"<c><v>{_texto_numero(valor)}</v></c>"
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{_escapar(str(valor))}</t></is></c>'
+
+
+class EscritorXLSX(_Escritor):
+    def abrir(self):
+        self.zip = zipfile.ZipFile(self.temporal, "w", zipfile.ZIP_DEFLATED)
+        self.zip.writestr("[Content_Types].xml", _TIPOS_XLSX)
+        self.zip.writestr("_rels/.rels", _RELACIONES_XLSX)
+        self.zip.writestr("xl/workbook.xml", _LIBRO_XLSX.format(hoja=_escapar(self.nombre_hoja)))
+        self.zip.writestr("xl/_rels/workbook.xml.rels", _RELACIONES_LIBRO_XLSX)
+        self.hoja = self.zip.open("xl/worksheets/sheet1.xml", "w")
+        self.hoja.write(_HOJA_XLSX.encode("utf-8"))
+        self.numero_fila = 0
+        self._escribir_bloque([self.columnas])
+        self.filas = 0
+
+    def _escribir_bloque(self, filas):
+        partes = []
+        for fila in filas:
+            self.numero_fila += 1
+            partes.append(f'<row r="{self.numero_fila}">')
+            partes.extend(_celda_xlsx(v) for v in fila)
+            partes.append("</row>")
+        self.hoja.write("".join(partes).encode("utf-8"))
+        self.filas += len(filas)
+
+    def cerrar(self):
+        self.hoja.write(_FIN_HOJA_XLSX.encode("utf-8"))
+        self.hoja.close()
+        self.zip.close()
+
+
+ESCRITORES = {".csv": EscritorCSV, ".ods": EscritorODS, ".xlsx": EscritorXLSX}
+
+
+def abrir_escritor(ruta, columnas, hoja=HOJA):
+    """Escritor según la extensión de `ruta` (usar con `with`).
+
+    `hoja` es el nombre de la hoja en .ods/.xlsx (en .csv no se usa).
+    """
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension not in ESCRITORES:
+        raise ErrorInforme(f"Formato di rapporto non supportato: {extension}")
+    return ESCRITORES[extension](ruta, columnas, hoja)
+
+
+def _filas_existentes(ruta):
+    # Columnas y filas de un informe .ods/.xlsx ya escrito
+    if os.path.splitext(ruta)[1].lower() == ".ods":
+        import lector_ods
+        columnas = lector_ods.leer_columnas(ruta)
+    else:
+        import pandas as pd
+        columnas = {c: s.to_numpy() for c, s in pd.read_excel(ruta).items()}
+    return [str(c) for c in columnas], zip(*(a.tolist() for a in columnas.values()))
+
+
+def _agregar_csv(ruta, columnas, filas):
+    # En CSV basta con añadir al final después de comprobar el encabezado
+    with open(ruta, newline="", encoding="utf-8") as archivo:
+        columnas_previas = next(csv.reader(archivo), [])
+    if columnas_previas != columnas:
+        raise ErrorInforme("Le colonne del rapporto esistente non coincidono con quelle nuove.")
+    escritas = 0
+    with open(ruta, "a", newline="", encoding="utf-8") as archivo:
+        escritor = csv.writer(archivo)
+        for fila in filas:
+            escritor.writerow(["" if _vacio(v) else v for v in fila])
+            escritas += 1
+    return escritas
+
+
+def escribir_informe(ruta, columnas, filas, agregar=False):
+    """Escribe `filas` (secuencias en el orden de `columnas`) en `ruta`.
+
+    Con agregar=True y un informe existente, sus filas se conservan y las
+    nuevas se escriben a continuación (en .ods/.xlsx el archivo se reescribe).
+    Devuelve el número de filas de `filas` escritas (sin contar las previas).
+    """
+    columnas = [str(c) for c in columnas]
+    previas = []
+    if agregar and os.path.exists(ruta) and os.path.getsize(ruta) > 0:
+        if os.path.splitext(ruta)[1].lower() == ".csv":
+            return _agregar_csv(ruta, columnas, filas)
+        columnas_previas, previas = _filas_existentes(ruta)
+        if columnas_previas != columnas:
+            raise ErrorInforme("Le colonne del rapporto esistente non coincidono con quelle nuove.")
+
+    with instrumentacion.tramo("informe/escribir"), abrir_escritor(ruta, columnas) as escritor:
+        escritor.escribir(previas)
+        conservadas = escritor.filas
+        escritor.escribir(filas)
+    return escritor.filas - conservadas
@@ -0,0 +1,159 @@
+"""Instantánea binaria de la hoja 'date' junto al archivo de origen.
+
+Formato (un solo archivo, mapeable en memoria):
+    b"LASERTAB" | uint32 largo de cabecera | cabecera JSON | columnas
+
+La cabecera guarda la versión del formato, el sha256 del archivo de origen,
+el número de filas y, para cada columna, su nombre, dtype y posición. Cada
+columna está alineada a 8 bytes y se lee con np.frombuffer sobre un mmap,
+sin copiar. Si el origen cambia (otro hash) la instantánea se descarta.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+
+import numpy as np
+
+MAGICO = b"LASERTAB"
+VERSION = 1
+
+# Variable de entorno para desactivar la instantánea (mediciones y pruebas)
+DESACTIVAR = "LASER_SIN_INSTANTANEA"
+
+
+def activada():
+    return not os.environ.get(DESACTIVAR)
+
+
+def ruta_instantanea(archivo):
+    carpeta, nombre = os.path.split(os.path.abspath(archivo))
+    return os.path.join(carpeta, f".{nombre}.tabla")
+
+
+def huella(archivo):
+    """sha256 del contenido del archivo de origen."""
+    h = hashlib.sha256()
+    with open(archivo, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def _alinear(n):
+    return (n + 7) & ~7
+
+
+def _columna_a_array(valores):
+    valores = np.asarray(valores)
+    if valores.dtype.kind in "iuf":
+        return valores
+    # Texto: cadena vacía en lugar de NaN (las celdas vacías vuelven como NaN)
+    return np.array(["" if v != v or v is None else str(v) for v in valores], dtype=str)
+
+
+def guardar(archivo, hoja, sha=None):
+    """Escribe la instantánea de `hoja` para `archivo`. Devuelve la ruta escrita.
+
+    `hoja` es {nombre: valores} por columna (un DataFrame también sirve).
+    """
+    sha = sha or huella(archivo)
+    nombres = list(hoja.keys())
+    arrays = [np.ascontiguousarray(_columna_a_array(hoja[c])) for c in nombres]
+
+    columnas = []
+    posicion = 0
+    for nombre, array in zip(nombres, arrays):
+        columnas.append({
+            "nombre": nombre.item() if hasattr(nombre, "item") else nombre,
+            "dtype": array.dtype.str,
+            "posicion": posicion,
+            "bytes": array.nbytes,
+        })
+        posicion = _alinear(posicion + array.nbytes)
+
+    cabecera = json.dumps({
+        "version": VERSION,
+        "sha256": sha,
+        "filas": len(arrays[0]) if arrays else 0,
+        "columnas": columnas,
+    }).encode("utf-8")
+    inicio_datos = _alinear(len(MAGICO) + 4 + len(cabecera))
+
+    destino = ruta_instantanea(archivo)
+    temporal = f"{destino}.{os.getpid()}.tmp"
+    with open(temporal, "wb") as f:
+        f.write(MAGICO)
+        f.write(struct.pack("<I", len(cabecera)))
+        f.write(cabecera)
+        f.write(b"\0" * (inicio_datos - f.tell()))
+        for columna, array in zip(columnas, arrays):
+            f.write(b"\0" * (inicio_datos + columna["posicion"] - f.tell()))
+            f.write(array.tobytes())
+    # Reemplazo atómico: un lector nunca ve un archivo a medio escribir
+    os.replace(temporal, destino)
+    return destino
+
+
+def leer_columnas(archivo, sha=None):
+    """Columnas de la instantánea como {nombre: ndarray}, o None si no sirve.
+
+    Los arrays numéricos apuntan directamente al mmap del archivo.
+    """
+    destino = ruta_instantanea(archivo)
+    try:
+        with open(destino, "rb") as f:
+            datos = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    if datos[:len(MAGICO)] != MAGICO:
+        return None
+    (largo,) = struct.unpack_from("<I", datos, len(MAGICO))
+    inicio = len(MAGICO) + 4
+    try:
+        cabecera = json.loads(bytes(datos[inicio:inicio + largo]))
+    except ValueError:
+        return None
+    if cabecera.get("version") != VERSION or cabecera.get("sha256") != (sha or huella(archivo)):
+        return None
+
+    inicio_datos = _alinear(inicio + largo)
+    columnas = {}
+    for columna in cabecera["columnas"]:
+        dtype = np.dtype(columna["dtype"])
+        columnas[columna["nombre"]] = np.frombuffer(
+            datos, dtype=dtype,
+            count=columna["bytes"] // dtype.itemsize,
+            offset=inicio_datos + columna["posicion"],
+        )
+    return columnas
+
+
+def leer_hoja(archivo, sha=None):
+    """{nombre: array} como los de lector_ods.leer_columnas, o None si no sirve.
+
+    Las columnas de texto vuelven a tener NaN en las celdas vacías.
+    """
+    columnas = leer_columnas(archivo, sha)
+    if columnas is None:
+        return None
+
+    datos = {}
+    for nombre, array in columnas.items():
+        if array.dtype.kind == "U":
+            array = np.where(array == "", np.nan, array.astype(object))
+        datos[nombre] = array
+    return datos
+
+
+def cargar(archivo, sha=None):
+    """DataFrame de la instantánea, o None si falta o está desactualizada."""
+    datos = leer_hoja(archivo, sha)
+    if datos is None:
+        return None
+
+    import pandas as pd
+
+    return pd.DataFrame(datos)
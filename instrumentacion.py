@@ -0,0 +1,140 @@
+"""Tramos de tiempo en los caminos de carga y cálculo, desactivados por defecto.
+
+    with instrumentacion.tramo("carga/parseo"):
+        ...
+
+Desactivada, `tramo` devuelve siempre el mismo contexto vacío: el costo es
+una llamada y una comprobación. Se activa con la variable de entorno
+LASER_PERFIL=1, con `--profile` (presupuesto.py, app.py) o con activar().
+
+Cada tramo guarda cuenta, total y una ventana de las últimas VENTANA
+duraciones, de la que salen p50/p95/p99. resumen() da todo como dict y
+volcar_json() lo escribe a un archivo. perfilar() ejecuta una sola llamada
+con cProfile (por ejemplo, un clic en "Calcolare i Dati").
+"""
+import collections
+import os
+import threading
+import time
+
+VARIABLE = "LASER_PERFIL"
+
+# Duraciones recientes por tramo usadas para los percentiles
+VENTANA = 2048
+
+activada = bool(os.environ.get(VARIABLE))
+
+_candado = threading.Lock()
+_tramos = {}  # nombre -> [cuenta, total_s, deque de duraciones]
+
+
+def activar(valor=True):
+    global activada
+    activada = bool(valor)
+
+
+def registrar(nombre, segundos):
+    with _candado:
+        datos = _tramos.get(nombre)
+        if datos is None:
+            datos = _tramos[nombre] = [0, 0.0, collections.deque(maxlen=VENTANA)]
+        datos[0] += 1
+        datos[1] += segundos
+        datos[2].append(segundos)
+
+
+class _Tramo:
+    __slots__ = ("nombre", "inicio")
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        registrar(self.nombre, time.perf_counter() - self.inicio)
+        return False
+
+
+class _TramoVacio:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        return False
+
+
+_VACIO = _TramoVacio()
+
+
+def tramo(nombre):
+    """Contexto que mide su bloque como `nombre` (si la instrumentación está activada)."""
+    if not activada:
+        return _VACIO
+    return _Tramo(nombre)
+
+
+def _percentil(ordenados, p):
+    # Rango más cercano
+    return ordenados[min(len(ordenados) - 1, int(p / 100 * len(ordenados)))]
+
+
+def resumen():
+    """{tramo: {cuenta, total_ms, medio_ms, p50_ms, p95_ms, p99_ms, max_ms}}."""
+    with _candado:
+        copia = {nombre: (cuenta, total, sorted(ventana)) for nombre, (cuenta, total, ventana) in _tramos.items()}
+    return {
+        nombre: {
+            "cuenta": cuenta,
+            "total_ms": total * 1000,
+            "medio_ms": total / cuenta * 1000,
+            "p50_ms": _percentil(ordenados, 50) * 1000,
+            "p95_ms": _percentil(ordenados, 95) * 1000,
+            "p99_ms": _percentil(ordenados, 99) * 1000,
+            "max_ms": ordenados[-1] * 1000,
+        }
+        for nombre, (cuenta, total, ordenados) in sorted(copia.items())
+    }
+
+
+def tabla():
+    """resumen() como texto de columnas, para la consola."""
+    lineas = [f"{'tramo':28} {'cuenta':>8} {'total ms':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"]
+    for nombre, datos in resumen().items():
+        lineas.append(f"{nombre:28} {datos['cuenta']:8d} {datos['total_ms']:10.3f} "
+                      f"{datos['p50_ms']:9.4f} {datos['p95_ms']:9.4f} {datos['p99_ms']:9.4f}")
+    return "\n".join(lineas)
+
+
+def volcar_json(ruta):
+    import json
+
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        json.dump(resumen(), archivo, indent=2)
+
+
+def limpiar():
+    with _candado:
+        _tramos.clear()
+
+
+def perfilar(funcion, *args, ruta=None, lineas=15):
+    """Ejecuta funcion(*args) con cProfile. Devuelve (resultado, texto de estadísticas).
+
+    Con `ruta` también guarda el perfil completo (abrir con pstats o snakeviz).
+    """
+    import cProfile
+    import io
+    import pstats
+
+    perfil = cProfile.Profile()
+    resultado = perfil.runcall(funcion, *args)
+    if ruta:
+        perfil.dump_stats(ruta)
+    salida = io.StringIO()
+    pstats.Stats(perfil, stream=salida).sort_stats("cumulative").print_stats(lineas)
+    return resultado, salida.getvalue()
@@ -0,0 +1,358 @@
+"""Lector en streaming de dibujos DXF (ASCII) para presupuestar una pieza.
+
+Lee el archivo de a pares (código de grupo, valor) sin cargarlo entero y
+sólo mira la sección ENTITIES (y $INSUNITS de la cabecera). Entidades
+soportadas: LINE, ARC, CIRCLE, LWPOLYLINE y POLYLINE/VERTEX (con bulge).
+Las demás (SPLINE, ELLIPSE, INSERT de bloques, textos, cotas...) se cuentan
+en `ignoradas` para avisar, pero no suman corte.
+
+Resultado (GeometriaDXF, en mm):
+    perimetro   largo total de corte: todas las entidades
+    aujeros     contornos cerrados dentro de otro contorno
+    ancho/largo extensión del dibujo en x / y
+    contornos   contornos cerrados (círculos, polilíneas cerradas y cadenas
+                de líneas/arcos que se cierran)
+    abiertos    cadenas que no se cierran (dibujo incompleto)
+    inicios     punto de inicio de cada contorno o cadena (para recorrido.py)
+
+Los extremos de líneas y arcos se unen en cadenas con una tolerancia de
+TOLERANCIA (en unidades del dibujo).
+"""
+import math
+from typing import NamedTuple
+
+import motor
+
+# Cambia si cambia el cálculo: invalida el cache de geometrías
+VERSION = 2
+
+TOLERANCIA = 1e-3
+
+# $INSUNITS -> mm
+_UNIDADES = {0: 1.0, 1: 25.4, 2: 304.8, 4: 1.0, 5: 10.0, 6: 1000.0, 8: 0.0000254, 9: 0.0254, 10: 914.4}
+
+_BINARIO = "AutoCAD Binary DXF"
+
+
+class GeometriaDXF(NamedTuple):
+    perimetro: float
+    aujeros: int
+    ancho: float
+    largo: float
+    contornos: int
+    abiertos: int
+    entidades: int
+    ignoradas: dict
+    inicios: list
+
+
+class _Caja:
+    __slots__ = ("x0", "y0", "x1", "y1")
+
+    def __init__(self):
+        self.x0 = self.y0 = math.inf
+        self.x1 = self.y1 = -math.inf
+
+    def agregar(self, x, y):
+        if x < self.x0:
+            self.x0 = x
+        if x > self.x1:
+            self.x1 = x
+        if y < self.y0:
+            self.y0 = y
+        if y > self.y1:
+            self.y1 = y
+
+    def unir(self, otra):
+        self.agregar(otra.x0, otra.y0)
+        self.agregar(otra.x1, otra.y1)
+
+    def vacia(self):
+        return self.x0 > self.x1
+
+    def area(self):
+        return (self.x1 - self.x0) * (self.y1 - self.y0)
+
+    def contiene(self, otra):
+        return (self.x0 <= otra.x0 and otra.x1 <= self.x1 and self.y0 <= otra.y0 and otra.y1 <= self.y1
+                and (self.x0, self.y0, self.x1, self.y1) != (otra.x0, otra.y0, otra.x1, otra.y1))
+
+
+def _pares(archivo):
+    # (código, valor) de a dos líneas; el código puede venir con espacios
+    primera = archivo.readline()
+    if primera.startswith(_BINARIO):
+        raise motor.ErrorPresupuesto("DXF binario non supportato: salvare il disegno come DXF ASCII.")
+    linea = primera
+    while linea:
+        valor = archivo.readline()
+        try:
+            codigo = int(linea.lstrip("\ufeff"))
+        except ValueError:
+            raise motor.ErrorPresupuesto(f"File DXF non valido (codice di gruppo: {linea.strip()!r})") from None
+        yield codigo, valor.strip()
+        linea = archivo.readline()
+
+
+def _arco(caja, cx, cy, r, inicio, barrido):
+    """Agrega a `caja` un arco antihorario (radianes) y devuelve (largo, punto inicial, punto final)."""
+    fin = inicio + barrido
+    puntos = [(cx + r * math.cos(inicio), cy + r * math.sin(inicio)), (cx + r * math.cos(fin), cy + r * math.sin(fin))]
+    # Extremos en los ejes que caen dentro del barrido
+    cuarto = math.ceil(inicio / (math.pi / 2))
+    while cuarto * math.pi / 2 <= fin + 1e-12:
+        angulo = cuarto * math.pi / 2
+        puntos.append((cx + r * math.cos(angulo), cy + r * math.sin(angulo)))
+        cuarto += 1
+    for x, y in puntos:
+        caja.agregar(x, y)
+    return r * barrido, puntos[0], puntos[1]
+
+
+def _tramo_bulge(caja, x1, y1, x2, y2, bulge):
+    """Largo de un tramo de polilínea; con bulge es un arco de ángulo 4·atan(bulge)."""
+    cuerda = math.hypot(x2 - x1, y2 - y1)
+    if bulge == 0 or cuerda == 0:
+        caja.agregar(x1, y1)
+        caja.agregar(x2, y2)
+        return cuerda
+    angulo = 4 * math.atan(bulge)
+    # Centro a la izquierda de la cuerda (antihorario) o a la derecha (horario)
+    distancia = cuerda / (2 * math.tan(angulo / 2))
+    cx = (x1 + x2) / 2 - distancia * (y2 - y1) / cuerda
+    cy = (y1 + y2) / 2 + distancia * (x2 - x1) / cuerda
+    radio = math.hypot(x1 - cx, y1 - cy)
+    if angulo > 0:
+        inicio = math.atan2(y1 - cy, x1 - cx)
+    else:
+        inicio = math.atan2(y2 - cy, x2 - cx)
+    largo, _, _ = _arco(caja, cx, cy, radio, inicio, abs(angulo))
+    return largo
+
+
+class _Acumulador:
+    def __init__(self):
+        self.perimetro = 0.0
+        self.caja = _Caja()
+        self.cerrados = []  # (caja, inicio)
+        self.tramos = []    # (inicio, fin, caja) de líneas, arcos y polilíneas abiertas
+        self.entidades = 0
+        self.ignoradas = {}
+
+    def cerrado(self, caja, inicio):
+        self.cerrados.append((caja, inicio))
+        self.caja.unir(caja)
+
+    def tramo(self, inicio, fin, caja):
+        self.tramos.append((inicio, fin, caja))
+        self.caja.unir(caja)
+
+    def linea(self, datos):
+        x1, y1, x2, y2 = (float(datos.get(c, 0.0)) for c in (10, 20, 11, 21))
+        caja = _Caja()
+        caja.agregar(x1, y1)
+        caja.agregar(x2, y2)
+        self.perimetro += math.hypot(x2 - x1, y2 - y1)
+        self.tramo((x1, y1), (x2, y2), caja)
+
+    def circulo(self, datos):
+        cx, cy, r = float(datos.get(10, 0.0)), float(datos.get(20, 0.0)), float(datos.get(40, 0.0))
+        caja = _Caja()
+        caja.agregar(cx - r, cy - r)
+        caja.agregar(cx + r, cy + r)
+        self.perimetro += 2 * math.pi * r
+        self.cerrado(caja, (cx + r, cy))
+
+    def arco(self, datos):
+        cx, cy, r = float(datos.get(10, 0.0)), float(datos.get(20, 0.0)), float(datos.get(40, 0.0))
+        inicio = math.radians(float(datos.get(50, 0.0)))
+        barrido = (math.radians(float(datos.get(51, 360.0))) - inicio) % (2 * math.pi) or 2 * math.pi
+        caja = _Caja()
+        largo, desde, hasta = _arco(caja, cx, cy, r, inicio, barrido)
+        self.perimetro += largo
+        if barrido >= 2 * math.pi - 1e-12:
+            self.cerrado(caja, desde)
+        else:
+            self.tramo(desde, hasta, caja)
+
+    def polilinea(self, vertices, cerrada):
+        # vertices: [(x, y, bulge)]
+        if not vertices:
+            return
+        caja = _Caja()
+        largo = 0.0
+        pares = list(zip(vertices, vertices[1:]))
+        if cerrada:
+            pares.append((vertices[-1], vertices[0]))
+        for (x1, y1, bulge), (x2, y2, _) in pares:
+            largo += _tramo_bulge(caja, x1, y1, x2, y2, bulge)
+        caja.agregar(vertices[0][0], vertices[0][1])
+        self.perimetro += largo
+        inicio, fin = vertices[0][:2], vertices[-1][:2]
+        if cerrada or (len(vertices) > 2 and math.dist(inicio, fin) <= TOLERANCIA):
+            self.cerrado(caja, inicio)
+        else:
+            self.tramo(inicio, fin, caja)
+
+    def ignorar(self, tipo):
+        self.ignoradas[tipo] = self.ignoradas.get(tipo, 0) + 1
+
+    def cadenas(self):
+        """(cerradas, abiertas): tramos unidos por sus extremos, como [(caja, inicio)]."""
+        padre = list(range(len(self.tramos)))
+
+        def raiz(i):
+            while padre[i] != i:
+                padre[i] = padre[padre[i]]
+                i = padre[i]
+            return i
+
+        # Extremos redondeados a la tolerancia -> tramos que los tocan
+        extremos = {}
+        for numero, (inicio, fin, _) in enumerate(self.tramos):
+            for punto in (inicio, fin):
+                clave = (round(punto[0] / TOLERANCIA), round(punto[1] / TOLERANCIA))
+                extremos.setdefault(clave, []).append(numero)
+        for tramos in extremos.values():
+            for otro in tramos[1:]:
+                padre[raiz(otro)] = raiz(tramos[0])
+
+        grupos = {}
+        for numero in range(len(self.tramos)):
+            grupos.setdefault(raiz(numero), []).append(numero)
+        # Una cadena es cerrada si cada extremo lo comparten un número par de tramos
+        impares = {raiz(tramos[0]) for tramos in extremos.values() if len(tramos) % 2}
+        cerradas, abiertas = [], []
+        for cabeza, numeros in grupos.items():
+            caja = _Caja()
+            for numero in numeros:
+                caja.unir(self.tramos[numero][2])
+            (abiertas if cabeza in impares else cerradas).append((caja, self.tramos[numeros[0]][0]))
+        return cerradas, abiertas
+
+    def resultado(self, escala):
+        cerradas, abiertas = self.cadenas()
+        contornos = self.cerrados + cerradas
+        # Un contorno es agujero si está dentro de un contorno exterior (de mayor a menor área)
+        exteriores = []
+        aujeros = 0
+        for caja, _ in sorted(contornos, key=lambda contorno: -contorno[0].area()):
+            if any(exterior.contiene(caja) for exterior in exteriores):
+                aujeros += 1
+            else:
+                exteriores.append(caja)
+        caja = self.caja
+        ancho = 0.0 if caja.vacia() else (caja.x1 - caja.x0) * escala
+        largo = 0.0 if caja.vacia() else (caja.y1 - caja.y0) * escala
+        return GeometriaDXF(
+            perimetro=self.perimetro * escala,
+            aujeros=aujeros,
+            ancho=ancho,
+            largo=largo,
+            contornos=len(contornos),
+            abiertos=len(abiertas),
+            entidades=self.entidades,
+            ignoradas=dict(sorted(self.ignoradas.items())),
+            inicios=[(x * escala, y * escala) for _, (x, y) in contornos + abiertas],
+        )
+
+
+_SIMPLES = {"LINE": _Acumulador.linea, "CIRCLE": _Acumulador.circulo, "ARC": _Acumulador.arco}
+
+
+def leer_dxf(ruta):
+    """GeometriaDXF de un archivo .dxf.
+
+    Todos los errores (archivo que no se puede abrir, valores no numéricos,
+    dibujo sin nada que cortar) son ErrorPresupuesto.
+    """
+    try:
+        # Los DXF anteriores a 2007 vienen en la página de códigos del sistema;
+        # los números y nombres de entidad son ASCII igual
+        with open(ruta, encoding="utf-8", errors="replace") as archivo:
+            geometria = _leer(_pares(archivo))
+    except motor.ErrorPresupuesto:
+        raise
+    except OSError as e:
+        raise motor.ErrorPresupuesto(f"Impossibile leggere {ruta}: {e.strerror or e}") from None
+    except ValueError as e:
+        raise motor.ErrorPresupuesto(f"File DXF non valido ({ruta}): {e}") from None
+    if geometria.entidades == 0 or geometria.perimetro == 0:
+        raise motor.ErrorPresupuesto(f"Nessuna entità da tagliare in {ruta} (LINE, ARC, CIRCLE, LWPOLYLINE, POLYLINE).")
+    return geometria
+
+
+def _leer(pares):
+    acumulador = _Acumulador()
+    escala = 1.0
+    seccion = None
+    variable = None
+    tipo = None      # entidad en curso
+    datos = {}
+    vertices = []    # LWPOLYLINE o POLYLINE en curso
+    cerrada = False
+    en_polilinea = False  # entre POLYLINE y SEQEND
+
+    def terminar():
+        nonlocal en_polilinea, vertices, cerrada
+        if tipo is None:
+            return
+        if tipo in _SIMPLES:
+            _SIMPLES[tipo](acumulador, datos)
+        elif tipo == "LWPOLYLINE":
+            acumulador.polilinea(vertices, cerrada)
+        elif tipo == "VERTEX" and en_polilinea:
+            vertices.append((float(datos.get(10, 0.0)), float(datos.get(20, 0.0)), float(datos.get(42, 0.0))))
+            return
+        elif tipo == "SEQEND" and en_polilinea:
+            acumulador.polilinea(vertices, cerrada)
+            en_polilinea = False
+            return
+        elif tipo == "POLYLINE":
+            # Los VERTEX que siguen, hasta SEQEND, son de esta polilínea
+            en_polilinea = True
+            vertices = []
+            cerrada = bool(int(datos.get(70, 0)) & 1)
+        else:
+            acumulador.ignorar(tipo)
+            return
+        acumulador.entidades += 1
+
+    for codigo, valor in pares:
+        if codigo == 0:
+            if seccion == "ENTITIES":
+                terminar()
+            tipo, datos = None, {}
+            if valor == "SECTION":
+                seccion = "?"
+            elif valor == "ENDSEC":
+                seccion = None
+            elif valor == "EOF":
+                break
+            elif seccion == "ENTITIES":
+                tipo = valor
+                if tipo == "LWPOLYLINE":
+                    vertices, cerrada = [], False
+            continue
+        if seccion == "?" and codigo == 2:
+            seccion = valor
+        elif seccion == "HEADER":
+            if codigo == 9:
+                variable = valor
+            elif variable == "$INSUNITS" and codigo == 70:
+                escala = _UNIDADES.get(int(valor), 1.0)
+        elif seccion == "ENTITIES" and tipo is not None:
+            if tipo == "LWPOLYLINE":
+                if codigo == 10:
+                    vertices.append([float(valor), 0.0, 0.0])
+                elif codigo == 20 and vertices:
+                    vertices[-1][1] = float(valor)
+                elif codigo == 42 and vertices:
+                    vertices[-1][2] = float(valor)
+                elif codigo == 70:
+                    cerrada = bool(int(valor) & 1)
+            elif codigo not in datos:
+                datos[codigo] = valor
+    if seccion == "ENTITIES":
+        terminar()
+    return acumulador.resultado(escala)
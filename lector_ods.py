@@ -0,0 +1,245 @@
+"""Lector en streaming de una sola hoja de un archivo .ods.
+
+En lugar de construir el DOM completo del libro (como hace el motor "odf"
+de pandas), se lee content.xml desde el zip por bloques con expat, se
+ignora todo lo que no es la hoja pedida y se deja de leer al cerrarse su
+tabla. Las repeticiones (number-columns-repeated / number-rows-repeated)
+de celdas y filas vacías sólo mueven la posición, sin expandirse; las de
+celdas con valor se copian las veces necesarias.
+
+El resultado es el mismo que pd.read_excel(..., engine="odf", sheet_name=hoja)
+para tablas simples: primera fila como encabezado, filas vacías
+intermedias como NaN, números enteros como int64 y el resto como float64
+u object.
+"""
+import zipfile
+from xml.parsers import expat
+
+import numpy as np
+
+_TABLE = "urn:oasis:names:tc:opendocument:xmlns:table:1.0"
+_OFFICE = "urn:oasis:names:tc:opendocument:xmlns:office:1.0"
+_TEXT = "urn:oasis:names:tc:opendocument:xmlns:text:1.0"
+
+_TABLA = f"{_TABLE} table"
+_FILA = f"{_TABLE} table-row"
+_CELDA = f"{_TABLE} table-cell"
+_CELDA_CUBIERTA = f"{_TABLE} covered-table-cell"
+_PARRAFO = f"{_TEXT} p"
+_ESPACIO = f"{_TEXT} s"
+_TABULADOR = f"{_TEXT} tab"
+_SALTO = f"{_TEXT} line-break"
+
+_NOMBRE = f"{_TABLE} name"
+_REPETIR_COLUMNAS = f"{_TABLE} number-columns-repeated"
+_REPETIR_FILAS = f"{_TABLE} number-rows-repeated"
+_TIPO = f"{_OFFICE} value-type"
+_VALOR = f"{_OFFICE} value"
+
+_NUMERICOS = ("float", "percentage", "currency")
+
+_TAMANO_BLOQUE = 64 * 1024
+
+
+class _FinDeHoja(Exception):
+    pass
+
+
+class _Columna:
+    """Columna creciente: float64 mientras sea numérica, object si aparece texto."""
+
+    __slots__ = ("numeros", "objetos", "largo", "enteros")
+
+    def __init__(self, filas_previas):
+        capacidad = max(16, filas_previas * 2)
+        self.numeros = np.full(capacidad, np.nan)
+        self.objetos = None
+        self.largo = filas_previas
+        self.enteros = True
+
+    def agregar(self, valor, veces):
+        fin = self.largo + veces
+        if self.objetos is not None:
+            if isinstance(valor, float) and valor.is_integer():
+                valor = int(valor)
+            self.objetos.extend([valor] * veces)
+        elif valor is None or isinstance(valor, float):
+            if fin > len(self.numeros):
+                nuevo = np.full(max(fin, len(self.numeros) * 2), np.nan)
+                nuevo[:self.largo] = self.numeros[:self.largo]
+                self.numeros = nuevo
+            if valor is not None:
+                self.numeros[self.largo:fin] = valor
+                if not valor.is_integer():
+                    self.enteros = False
+        else:
+            # Pasar a object conservando lo ya leído
+            previos = self.numeros[:self.largo]
+            self.objetos = [None if v != v else (int(v) if v.is_integer() else v) for v in previos.tolist()]
+            self.objetos.extend([valor] * veces)
+            self.numeros = None
+        self.largo = fin
+
+    def array(self):
+        if self.objetos is not None:
+            return np.array([np.nan if v is None else v for v in self.objetos], dtype=object)
+        valores = self.numeros[:self.largo]
+        if self.enteros and not np.isnan(valores).any():
+            return valores.astype(np.int64)
+        return valores.copy()
+
+
+class _Lector:
+    def __init__(self, hoja):
+        self.hoja = hoja
+        self.dentro = False
+        self.encontrada = False
+        self.encabezado = None
+        self.columnas = []
+        self.filas = 0
+        self.vacias = 0
+        # Estado de la fila y la celda actuales
+        self.celdas = None
+        self.repetir_fila = 1
+        self.posicion = 0
+        self.tipo = None
+        self.valor = None
+        self.repetir_celda = 1
+        self.texto = None
+        self.parrafos = 0
+
+    def inicio(self, nombre, atributos):
+        if not self.dentro:
+            if nombre == _TABLA and self.hoja in (None, atributos.get(_NOMBRE)):
+                self.dentro = self.encontrada = True
+            return
+        if nombre == _FILA:
+            self.celdas = {}
+            self.posicion = 0
+            self.repetir_fila = int(atributos.get(_REPETIR_FILAS, 1))
+        elif nombre in (_CELDA, _CELDA_CUBIERTA):
+            self.tipo = atributos.get(_TIPO)
+            self.valor = atributos.get(_VALOR)
+            self.repetir_celda = int(atributos.get(_REPETIR_COLUMNAS, 1))
+            self.texto = [] if self.tipo is not None else None
+            self.parrafos = 0
+        elif self.texto is not None:
+            if nombre == _PARRAFO:
+                if self.parrafos:
+                    self.texto.append("\n")
+                self.parrafos += 1
+            elif nombre == _ESPACIO:
+                self.texto.append(" " * int(atributos.get(f"{_TEXT} c", 1)))
+            elif nombre == _TABULADOR:
+                self.texto.append("\t")
+            elif nombre == _SALTO:
+                self.texto.append("\n")
+
+    def caracteres(self, datos):
+        if self.texto is not None and self.parrafos:
+            self.texto.append(datos)
+
+    def fin(self, nombre):
+        if not self.dentro:
+            return
+        if nombre in (_CELDA, _CELDA_CUBIERTA):
+            valor = self._valor_celda()
+            if valor is not None:
+                for i in range(self.posicion, self.posicion + self.repetir_celda):
+                    self.celdas[i] = valor
+            # Las celdas vacías repetidas sólo avanzan la posición
+            self.posicion += self.repetir_celda
+            self.texto = None
+        elif nombre == _FILA:
+            if self.celdas:
+                self._agregar_fila(self.celdas, self.repetir_fila)
+            else:
+                # Las filas vacías sólo se cuentan: se agregan si después
+                # aparecen datos y las del final (a veces repetidas un
+                # millón de veces) nunca se expanden
+                repetir = self.repetir_fila
+                if self.encabezado is None:
+                    self.encabezado = {}
+                    repetir -= 1
+                self.vacias += repetir
+            self.celdas = None
+        elif nombre == _TABLA:
+            raise _FinDeHoja
+
+    def _valor_celda(self):
+        if self.tipo is None:
+            return None
+        if self.tipo in _NUMERICOS:
+            return float(self.valor)
+        if self.tipo == "boolean":
+            return self.valor == "true"
+        texto = "".join(self.texto)
+        return texto if texto or self.tipo != "string" else None
+
+    def _agregar_fila(self, celdas, veces):
+        if self.encabezado is None:
+            self.encabezado = dict(celdas)
+            veces -= 1
+            if not veces:
+                return
+        if self.vacias:
+            for columna in self.columnas:
+                columna.agregar(None, self.vacias)
+            self.filas += self.vacias
+            self.vacias = 0
+        ancho = max(max(celdas) + 1, len(self.columnas))
+        while len(self.columnas) < ancho:
+            self.columnas.append(_Columna(self.filas))
+        for i, columna in enumerate(self.columnas):
+            columna.agregar(celdas.get(i), veces)
+        self.filas += veces
+
+    def resultado(self):
+        if not self.encontrada:
+            raise ValueError(f"Worksheet named '{self.hoja}' not found")
+        if self.encabezado is None:
+            return {}
+
+        ancho = max(len(self.columnas), max(self.encabezado, default=-1) + 1)
+        while len(self.columnas) < ancho:
+            self.columnas.append(_Columna(self.filas))
+            self.columnas[-1].agregar(None, 0)
+
+        resultado = {}
+        for i, columna in enumerate(self.columnas):
+            nombre = self.encabezado.get(i)
+            if isinstance(nombre, float) and nombre.is_integer():
+                nombre = int(nombre)
+            elif nombre is None:
+                nombre = f"Unnamed: {i}"
+            resultado[nombre] = columna.array()
+        return resultado
+
+
+def leer_columnas(archivo, hoja=None):
+    """Columnas de la hoja como {encabezado: ndarray}, en orden.
+
+    Con hoja=None se lee la primera hoja del libro.
+    """
+    lector = _Lector(hoja)
+    parser = expat.ParserCreate(namespace_separator=" ")
+    parser.buffer_text = True
+    parser.StartElementHandler = lector.inicio
+    parser.EndElementHandler = lector.fin
+    parser.CharacterDataHandler = lector.caracteres
+
+    with zipfile.ZipFile(archivo) as libro, libro.open("content.xml") as contenido:
+        try:
+            for bloque in iter(lambda: contenido.read(_TAMANO_BLOQUE), b""):
+                parser.Parse(bloque, False)
+            parser.Parse(b"", True)
+        except _FinDeHoja:
+            pass
+    return lector.resultado()
+
+
+def leer_hoja(archivo, hoja=None):
+    """La hoja como DataFrame, equivalente a pd.read_excel(engine="odf")."""
+    import pandas as pd
+
+    return pd.DataFrame(leer_columnas(archivo, hoja))
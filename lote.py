@@ -0,0 +1,211 @@
+"""Presupuestos por lotes: todas las piezas de un pedido en una sola pasada NumPy.
+
+La tabla de trabajos tiene una fila por pieza con las columnas Material,
+Espesor, perimetro, aujeros, ancho y largo, y opcionalmente neto_pack,
+costo_pack, costo_maquina y costo_operario (si faltan se usan los valores
+por defecto). Las filas inválidas no detienen el lote: su resultado queda
+en NaN y la columna "errore" lleva el mismo mensaje que daría motor.py.
+
+Para archivos enormes, procesar_csv_por_bloques lee la entrada por bloques,
+los reparte entre procesos y escribe los resultados en el orden de entrada
+sin tener nunca el archivo completo en memoria.
+"""
+import collections
+import concurrent.futures
+
+import numpy as np
+import pandas as pd
+
+import instrumentacion
+import lector_ods
+import motor
+
+# Mismas claves que costos_dict / Presupuesto.como_dict()
+COLUMNAS_RESULTADO = (
+    "costo_gas",
+    "costo_maquina",
+    "costo_peso",
+    "total",
+    "cantidad_gas_dict",
+    "tiempo_corte_horas",
+    "Costo_operario",
+)
+COLUMNA_ERROR = "errore"
+
+CAMPOS_PIEZA = ("perimetro", "aujeros", "ancho", "largo")
+CAMPOS_TARIFA = ("neto_pack", "costo_pack", "costo_maquina", "costo_operario")
+# Columnas numéricas de IndiceTarifas.arrays() que usan las fórmulas
+CAMPOS_TARIFA_TABLA = ("cw", "tiempo_1", "tiempo_2", "duracion", "costo")
+
+
+def leer_trabajos(ruta):
+    """Tabla de trabajos desde .csv, .ods (primera hoja) o .xlsx."""
+    if ruta.endswith(".csv"):
+        return pd.read_csv(ruta)
+    if ruta.endswith(".ods"):
+        return lector_ods.leer_hoja(ruta)
+    return pd.read_excel(ruta)
+
+
+def posiciones_tarifa(indice, materiales, espesores):
+    """Posición de cada (material, espesor) en indice.arrays(), -1 si no existe."""
+    buscadas = pd.MultiIndex.from_arrays([
+        np.asarray(materiales, dtype=object),
+        np.asarray(espesores, dtype=float),
+    ])
+    return indice.claves().get_indexer(buscadas)
+
+
+def numeros(trabajos, campo, valores):
+    """Columna `campo` como floats; los vacíos toman valores[campo] si existe."""
+    if campo in trabajos:
+        columna = pd.to_numeric(trabajos[campo], errors="coerce").to_numpy(dtype=float)
+        if campo in valores:
+            columna = np.where(np.isnan(columna), float(valores[campo]), columna)
+        return columna
+    if campo in valores:
+        return np.full(len(trabajos), float(valores[campo]))
+    raise motor.ErrorPresupuesto(f"Colonna mancante: {campo}")
+
+
+def calcular_lote(indice, trabajos, valores=None):
+    """Resultados de todas las filas de `trabajos` (mismo índice que la entrada).
+
+    `valores` da los valores por defecto de los campos de tarifa
+    (neto_pack, costo_pack, costo_maquina, costo_operario).
+    """
+    valores = valores or {}
+    n = len(trabajos)
+    for columna in ("Material", "Espesor"):
+        if columna not in trabajos:
+            raise motor.ErrorPresupuesto(f"Colonna mancante: {columna}")
+
+    materiales = trabajos["Material"].to_numpy(dtype=object)
+    espesores = pd.to_numeric(trabajos["Espesor"], errors="coerce").to_numpy(dtype=float)
+    campos = {campo: numeros(trabajos, campo, valores) for campo in CAMPOS_PIEZA + CAMPOS_TARIFA}
+
+    # Unión indexada contra la tabla de tarifas
+    with instrumentacion.tramo("lote/union"):
+        posiciones = posiciones_tarifa(indice, materiales, espesores)
+    encontrada = posiciones >= 0
+    tomar = np.where(encontrada, posiciones, 0)
+    arrays = indice.arrays()
+    tarifa = {campo: arrays[campo][tomar] for campo in CAMPOS_TARIFA_TABLA}
+
+    # Errores en el mismo orden de validación que motor.py; vale el primero
+    errores = np.full(n, "", dtype=object)
+    sin_material = pd.isna(materiales) | (materiales == "")
+    _marcar(errores, sin_material | np.isnan(espesores), motor.SIN_MATERIAL)
+    _marcar(errores, np.logical_or.reduce([np.isnan(c) for c in campos.values()]), motor.NUMEROS_INVALIDOS)
+    _marcar(errores, ~encontrada, motor.SIN_DATOS)
+    return pd.DataFrame(calcular_sobre_tarifas(campos, tarifa, errores), index=trabajos.index)
+
+
+def _marcar(errores, mascara, mensaje):
+    errores[mascara & (errores == "")] = mensaje
+
+
+def calcular_sobre_tarifas(campos, tarifa, errores):
+    """Fórmulas de motor.py sobre filas de tarifa ya alineadas; {columna: array}.
+
+    `tarifa` tiene las columnas de IndiceTarifas.arrays() (cw, tiempo_1, ...),
+    `campos` los de la pieza y la tarifa (arrays o números sueltos) y
+    `errores` los mensajes ya encontrados ("" si ninguno); se completa aquí.
+    """
+    cw = tarifa["cw"]
+    _marcar(errores, np.isnan(cw) | (cw == 0), motor.CW_CERO)
+    _marcar(errores, np.isnan(tarifa["tiempo_1"]) | np.isnan(tarifa["tiempo_2"]), motor.TIEMPOS_INVALIDOS)
+    _marcar(errores, np.isnan(tarifa["duracion"]), motor.DURACION_VACIA)
+    _marcar(errores, tarifa["duracion"] == 0, motor.DURACION_CERO)
+
+    with np.errstate(divide="ignore", invalid="ignore"), instrumentacion.tramo("lote/formulas"):
+        columnas = formulas(campos, tarifa)
+
+    invalida = errores != ""
+    resultado = {}
+    for nombre in COLUMNAS_RESULTADO:
+        resultado[nombre] = np.where(invalida, np.nan, columnas[nombre])
+    resultado[COLUMNA_ERROR] = errores
+    return resultado
+
+
+def formulas(campos, tarifa):
+    """Cadena de motor.py sin validar, {columna de COLUMNAS_RESULTADO: array}.
+
+    Los campos y las columnas de tarifa pueden ser números o arrays de
+    formas compatibles (broadcasting), por ejemplo (piezas, 1) y (muestras,).
+    """
+    tiempo_total = campos["perimetro"] / tarifa["cw"] + campos["aujeros"] * (tarifa["tiempo_1"] + tarifa["tiempo_2"])
+    consumo = tiempo_total * campos["neto_pack"] / tarifa["duracion"]
+    # Como en motor.py: el desplazamiento en vacío ocupa la máquina pero no gasta gas
+    tiempo_total = tiempo_total + campos.get("tiempo_desplazamiento_horas", 0.0)
+    costo_gas = consumo * campos["costo_pack"]
+    costo_maquina = tiempo_total * campos["costo_maquina"]
+    costo_peso = campos["ancho"] * campos["largo"] / 1_000_000 * tarifa["costo"]
+    costo_operario = campos["costo_operario"]
+    total = costo_gas + costo_maquina + costo_peso + costo_operario
+    return dict(zip(COLUMNAS_RESULTADO, (
+        costo_gas, costo_maquina, costo_peso, total, consumo, tiempo_total, costo_operario)))
+
+
+# Índice de tarifas de cada proceso trabajador: se recibe una sola vez al
+# iniciar el proceso, no con cada bloque
+_indice_trabajador = None
+
+
+def _iniciar_trabajador(indice):
+    global _indice_trabajador
+    _indice_trabajador = indice
+
+
+def _procesar_bloque(bloque, valores):
+    # Devuelve el bloque ya convertido a CSV para repartir también ese costo
+    resultados = calcular_lote(_indice_trabajador, bloque, valores)
+    salida = bloque.join(resultados, rsuffix="_risultato")
+    errores = int((resultados[COLUMNA_ERROR] != "").sum())
+    return salida.to_csv(index=False, header=False), list(salida.columns), len(salida), errores
+
+
+def procesar_csv_por_bloques(indice, entrada, salida, valores=None, trabajadores=1, tamano_bloque=100_000):
+    """Presupuesta un CSV de trabajos de cualquier tamaño escribiendo otro CSV.
+
+    Como mucho 2 * trabajadores bloques están en vuelo a la vez, así que la
+    memoria depende de tamano_bloque y no del tamaño del archivo. El orden
+    de salida es el de entrada. Devuelve (filas, filas con error).
+    """
+    valores = valores or {}
+    bloques = pd.read_csv(entrada, chunksize=tamano_bloque)
+    filas = errores = 0
+
+    with open(salida, "w", newline="", encoding="utf-8") as destino:
+        encabezado_escrito = False
+
+        def escribir(resultado):
+            nonlocal filas, errores, encabezado_escrito
+            texto, columnas, n, n_errores = resultado
+            if not encabezado_escrito:
+                pd.DataFrame(columns=columnas).to_csv(destino, index=False)
+                encabezado_escrito = True
+            destino.write(texto)
+            filas += n
+            errores += n_errores
+
+        if trabajadores <= 1:
+            _iniciar_trabajador(indice)
+            for bloque in bloques:
+                escribir(_procesar_bloque(bloque, valores))
+            return filas, errores
+
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=trabajadores,
+                initializer=_iniciar_trabajador,
+                initargs=(indice,)) as pool:
+            en_vuelo = collections.deque()
+            for bloque in bloques:
+                en_vuelo.append(pool.submit(_procesar_bloque, bloque, valores))
+                if len(en_vuelo) >= 2 * trabajadores:
+                    escribir(en_vuelo.popleft().result())
+            while en_vuelo:
+                escribir(en_vuelo.popleft().result())
+
+    return filas, errores
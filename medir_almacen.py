@@ -0,0 +1,80 @@
+"""Mide la latencia de una búsqueda puntual (material, espesor) en la tabla.
+
+Compara:
+    read_excel + máscara   el camino original de app.py: leer la hoja con
+                           pd.read_excel en cada cálculo y filtrar con una
+                           máscara booleana
+    máscara                sólo el filtro, con el DataFrame ya leído
+    SQLite                 VistaTarifas.buscar (sentencia preparada sobre el
+                           índice (máquina, material, espesor, vigente_desde))
+    IndiceTarifas          búsqueda en el diccionario en memoria
+
+    python medir_almacen.py [--busquedas 20000] [--lecturas 20]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import almacen_tarifas
+import tarifas
+
+AQUI = os.path.dirname(os.path.abspath(__file__))
+
+
+def _medir(funcion, claves):
+    # Microsegundos por búsqueda
+    inicio = time.perf_counter()
+    for material, espesor in claves:
+        funcion(material, espesor)
+    return (time.perf_counter() - inicio) / len(claves) * 1e6
+
+
+def medir(busquedas, lecturas, archivo=os.path.join(AQUI, "date.ods"), semilla=0):
+    indice = tarifas.indice_tarifas(archivo)
+    todas = list(indice.filas)
+    azar = np.random.default_rng(semilla)
+    claves = [todas[i] for i in azar.integers(0, len(todas), busquedas)]
+    df = pd.read_excel(archivo, engine="odf", sheet_name=tarifas.HOJA)
+
+    def con_lectura(material, espesor):
+        hoja = pd.read_excel(archivo, engine="odf", sheet_name=tarifas.HOJA)
+        return hoja[(hoja["Material"] == material) & (hoja["Espesor"] == espesor)]
+
+    def con_mascara(material, espesor):
+        return df[(df["Material"] == material) & (df["Espesor"] == espesor)]
+
+    resultados = {}
+    resultados["read_excel + máscara"] = _medir(con_lectura, claves[:lecturas])
+    resultados["máscara (hoja ya leída)"] = _medir(con_mascara, claves)
+    with tempfile.TemporaryDirectory() as carpeta:
+        almacen = almacen_tarifas.AlmacenTarifas(os.path.join(carpeta, "tarifas.sqlite"))
+        # Varias máquinas y versiones, para que el índice no tenga sólo una tabla
+        for maquina in ("Laser1", "Laser2", "Laser3"):
+            for mes in range(1, 13, 3):
+                almacen.importar(archivo, maquina, f"2026-{mes:02d}-01")
+        vista = almacen.vista("Laser2", "2026-08-15")
+        resultados["SQLite (sentencia preparada)"] = _medir(vista.buscar, claves)
+        almacen.cerrar()
+    resultados["IndiceTarifas (dict)"] = _medir(indice.buscar, claves)
+    return resultados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--busquedas", type=int, default=20_000)
+    parser.add_argument("--lecturas", type=int, default=20,
+                        help="búsquedas con read_excel (mucho más lentas)")
+    args = parser.parse_args(argv)
+
+    for nombre, microsegundos in medir(args.busquedas, args.lecturas).items():
+        print(f"{nombre:30} {microsegundos:14,.1f} µs/búsqueda")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
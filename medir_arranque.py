@@ -0,0 +1,91 @@
+"""Mide el arranque en frío con y sin la instantánea binaria de la tabla.
+
+Cada medición lanza un proceso nuevo y cuenta hasta tener el índice de
+tarifas listo para presupuestar, que es lo que acelera la instantánea. Con
+pantalla disponible se lanza app.py (la tabla se carga en segundo plano
+después de mostrar la ventana, así que se espera a su señal "listo");
+sin pantalla, un proceso que sólo importa y carga la tabla.
+
+    python medir_arranque.py [--archivo date.ods] [--repeticiones 5]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import instantanea
+
+AQUI = os.path.dirname(os.path.abspath(__file__))
+
+# Proceso sin ventana: importar y dejar el índice listo
+CODIGO_SIN_VENTANA = "import sys, tarifas; tarifas.indice_tarifas(sys.argv[1]); print('listo', flush=True)"
+
+
+def _hay_pantalla():
+    if sys.platform.startswith("linux") and not os.environ.get("DISPLAY"):
+        return False
+    try:
+        import tkinter
+        tkinter.Tk().destroy()
+        return True
+    except Exception:
+        return False
+
+
+def _lanzar(archivo, con_ventana, sin_instantanea):
+    entorno = dict(os.environ)
+    entorno.pop(instantanea.DESACTIVAR, None)
+    if sin_instantanea:
+        entorno[instantanea.DESACTIVAR] = "1"
+
+    if con_ventana:
+        entorno["LASER_MEDIR_ARRANQUE"] = "1"
+        comando = [sys.executable, os.path.join(AQUI, "app.py")]
+    else:
+        comando = [sys.executable, "-c", CODIGO_SIN_VENTANA, archivo]
+
+    inicio = time.perf_counter()
+    proceso = subprocess.Popen(comando, cwd=AQUI, env=entorno, stdout=subprocess.PIPE, text=True)
+    for linea in proceso.stdout:
+        # app.py escribe antes "ventana_visible": no cuenta, la tabla aún no está
+        if linea.startswith("listo"):
+            transcurrido = time.perf_counter() - inicio
+            break
+    else:
+        raise RuntimeError(f"el proceso terminó sin señal de arranque: {comando}")
+    proceso.wait()
+    return transcurrido
+
+
+def medir(archivo, repeticiones, con_ventana):
+    resultados = {}
+    for nombre, sin_instantanea in (("sin_instantanea", True), ("con_instantanea", False)):
+        if not sin_instantanea:
+            # Asegurar que la instantánea existe antes de medir con ella
+            _lanzar(archivo, False, False)
+        tiempos = [_lanzar(archivo, con_ventana, sin_instantanea) for _ in range(repeticiones)]
+        resultados[nombre] = tiempos
+    return resultados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--archivo", default=os.path.join(AQUI, "date.ods"))
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    con_ventana = _hay_pantalla()
+    etapa = "índice listo en app.py" if con_ventana else "índice listo (sin pantalla)"
+    resultados = medir(args.archivo, args.repeticiones, con_ventana)
+
+    print(f"Arranque en frío hasta {etapa}, {args.repeticiones} repeticiones:")
+    for nombre, tiempos in resultados.items():
+        print(f"  {nombre:16} mediana {statistics.median(tiempos) * 1000:8.1f} ms"
+              f"   mín {min(tiempos) * 1000:8.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""Mide la velocidad de escritura de informes (filas/segundo) por formato.
+
+Compara los escritores de informe.py con DataFrame.to_excel / to_csv de
+pandas sobre los mismos resultados de un lote generado al azar.
+
+    python medir_informes.py [--filas 20000] [--filas-pandas-ods 2000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import informe
+import lote
+import tarifas
+
+AQUI = os.path.dirname(os.path.abspath(__file__))
+
+
+def resultados_de_prueba(filas, archivo=os.path.join(AQUI, "date.ods"), semilla=0):
+    """Trabajos al azar sobre la tabla de tarifas y sus resultados por lotes."""
+    indice = tarifas.indice_tarifas(archivo)
+    arrays = indice.arrays()
+    azar = np.random.default_rng(semilla)
+    elegidas = azar.integers(0, len(arrays["cw"]), filas)
+    trabajos = pd.DataFrame({
+        "Material": arrays["material"][elegidas],
+        "Espesor": arrays["espesor"][elegidas],
+        "perimetro": azar.uniform(100, 5000, filas),
+        "aujeros": azar.integers(0, 50, filas),
+        "ancho": azar.uniform(10, 1000, filas),
+        "largo": azar.uniform(10, 1000, filas),
+    })
+    valores = {"neto_pack": 10, "costo_pack": 80, "costo_maquina": 60, "costo_operario": 25}
+    return trabajos.join(lote.calcular_lote(indice, trabajos, valores))
+
+
+def _medir(funcion, filas):
+    inicio = time.perf_counter()
+    funcion()
+    return filas / (time.perf_counter() - inicio)
+
+
+def medir(filas, filas_pandas_ods):
+    df = resultados_de_prueba(filas)
+    df_pandas_ods = df.head(filas_pandas_ods)
+    resultados = {}
+    with tempfile.TemporaryDirectory() as carpeta:
+        for extension in informe.ESCRITORES:
+            ruta = os.path.join(carpeta, f"informe{extension}")
+            resultados[f"informe {extension}"] = _medir(
+                lambda: informe.escribir_informe(ruta, df.columns, df.itertuples(index=False, name=None)), filas)
+
+        ruta = os.path.join(carpeta, "pandas.csv")
+        resultados["pandas .csv"] = _medir(lambda: df.to_csv(ruta, index=False), filas)
+        ruta = os.path.join(carpeta, "pandas.ods")
+        resultados["pandas .ods (odf)"] = _medir(
+            lambda: df_pandas_ods.to_excel(ruta, index=False, engine="odf"), len(df_pandas_ods))
+        try:
+            import openpyxl  # noqa: F401
+        except ImportError:
+            pass
+        else:
+            ruta = os.path.join(carpeta, "pandas.xlsx")
+            resultados["pandas .xlsx (openpyxl)"] = _medir(
+                lambda: df_pandas_ods.to_excel(ruta, index=False), len(df_pandas_ods))
+    return resultados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filas", type=int, default=20_000)
+    parser.add_argument("--filas-pandas-ods", type=int, default=2_000,
+                        help="filas para to_excel (mucho más lento)")
+    args = parser.parse_args(argv)
+
+    for nombre, velocidad in medir(args.filas, args.filas_pandas_ods).items():
+        print(f"{nombre:26} {velocidad:12,.0f} filas/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
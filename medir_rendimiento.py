@@ -0,0 +1,270 @@
+"""Banco de rendimiento sin pantalla: carga, búsqueda, presupuesto, lotes e informes.
+
+Genera tablas de tarifas con el esquema de date.ods (hoja 'date', mismas
+columnas) y listas de trabajos al azar, y mide:
+
+    carga        leer e indexar la tabla .ods, en frío y con la instantánea (ms)
+    busqueda     una búsqueda (material, espesor) y la lista de espesores de
+                 un material, lo que hace actualizar_espesores (µs)
+    presupuesto  un presupuesto completo con motor.py (µs)
+    lote         presupuestos por segundo de lote.calcular_lote (filas/s)
+    informe      escritura de resultados por formato (filas/s)
+    memoria      pico de memoria al cargar la tabla y al calcular el lote (MB)
+
+Los resultados se guardan en JSON y se comparan con una base guardada
+antes; una métrica peor que la base más la tolerancia es una regresión y
+el programa termina con código 1.
+
+    python medir_rendimiento.py --guardar base.json          # guardar la base
+    python medir_rendimiento.py --base base.json --tolerancia 0.25
+    python medir_rendimiento.py --rapido                     # tamaños chicos
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import informe
+import instantanea
+import lote
+import motor
+import tarifas
+
+TABLAS = (100, 1_000, 10_000, 100_000)
+TRABAJOS = (1, 1_000, 100_000, 1_000_000)
+TABLAS_RAPIDO = (100, 1_000)
+TRABAJOS_RAPIDO = (1, 1_000, 10_000)
+FILAS_INFORME = 20_000
+
+# Columnas de la hoja 'date', en el orden del archivo original
+COLUMNAS_TABLA = ("Material", "Espesor", "Presión ", "Ugello ", "Consumo", "Duracion",
+                  1, 2, "CW ", "Impulso ", "M1", "Costo")
+
+VALORES = {"neto_pack": 10, "costo_pack": 80, "costo_maquina": 60, "costo_operario": 25}
+
+
+def tabla_de_prueba(filas, semilla=0):
+    """{columna: valores} de una tabla de tarifas con `filas` claves distintas."""
+    azar = np.random.default_rng(semilla)
+    por_material = 20
+    materiales = np.array([f"Material {i // por_material:05d}" for i in range(filas)], dtype=object)
+    espesores = 0.5 + (np.arange(filas) % por_material) * 0.5
+    return {
+        "Material": materiales,
+        "Espesor": espesores,
+        "Presión ": azar.uniform(0.5, 20, filas).round(1),
+        "Ugello ": azar.choice(["1.5 S", "2.0 D", "3.0 D"], filas).astype(object),
+        "Consumo": azar.uniform(1, 60, filas).round(2),
+        "Duracion": azar.uniform(1, 40, filas).round(2),
+        1: azar.uniform(0.0001, 0.001, filas),
+        2: azar.uniform(0.0001, 0.001, filas),
+        "CW ": azar.uniform(300, 30_000, filas).round(0),
+        "Impulso ": azar.uniform(0, 100, filas).round(0),
+        "M1": azar.uniform(0, 10, filas).round(1),
+        "Costo": azar.uniform(5, 200, filas).round(2),
+    }
+
+
+def escribir_tabla(ruta, tabla):
+    with informe.abrir_escritor(ruta, COLUMNAS_TABLA, hoja=tarifas.HOJA) as escritor:
+        escritor.escribir(zip(*(tabla[c] for c in COLUMNAS_TABLA)))
+
+
+def trabajos_de_prueba(indice, filas, semilla=0):
+    """Lista de trabajos al azar sobre las claves del índice (5% con errores)."""
+    arrays = indice.arrays()
+    azar = np.random.default_rng(semilla)
+    elegidas = azar.integers(0, len(arrays["cw"]), filas)
+    espesores = arrays["espesor"][elegidas].copy()
+    espesores[azar.random(filas) < 0.05] = 999.0  # sin tarifa
+    return pd.DataFrame({
+        "Material": arrays["material"][elegidas],
+        "Espesor": espesores,
+        "perimetro": azar.uniform(100, 5000, filas),
+        "aujeros": azar.integers(0, 50, filas),
+        "ancho": azar.uniform(10, 1000, filas),
+        "largo": azar.uniform(10, 1000, filas),
+    })
+
+
+def _mejor_de(funcion, repeticiones=5):
+    # Mínimo de varias corridas: lo menos afectado por el resto de la máquina
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos)
+
+
+def _pico_mb(funcion):
+    tracemalloc.start()
+    try:
+        funcion()
+        return tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+
+
+class Resultados(dict):
+    """nombre -> {"valor", "unidad", "mejor": "menor" | "mayor"}."""
+
+    def agregar(self, nombre, valor, unidad, mejor="menor"):
+        self[nombre] = {"valor": float(valor), "unidad": unidad, "mejor": mejor}
+        print(f"  {nombre:40} {valor:14,.2f} {unidad}", flush=True)
+
+
+def _cargar(ruta, con_instantanea):
+    tarifas.limpiar_cache()
+    # La variable sólo vale durante esta carga: después queda como estaba
+    previo = os.environ.get(instantanea.DESACTIVAR)
+    if con_instantanea:
+        os.environ.pop(instantanea.DESACTIVAR, None)
+    else:
+        os.environ[instantanea.DESACTIVAR] = "1"
+    try:
+        return tarifas.indice_tarifas(ruta)
+    finally:
+        if previo is None:
+            os.environ.pop(instantanea.DESACTIVAR, None)
+        else:
+            os.environ[instantanea.DESACTIVAR] = previo
+
+
+def medir_tabla(resultados, carpeta, filas, repeticiones):
+    ruta = os.path.join(carpeta, f"tabla_{filas}.ods")
+    escribir_tabla(ruta, tabla_de_prueba(filas))
+    vueltas = max(1, repeticiones if filas <= 10_000 else 1)
+
+    resultados.agregar(f"carga/{filas}/frio", _mejor_de(lambda: _cargar(ruta, False), vueltas) * 1000, "ms")
+    _cargar(ruta, True)  # genera la instantánea
+    resultados.agregar(f"carga/{filas}/instantanea", _mejor_de(lambda: _cargar(ruta, True), vueltas) * 1000, "ms")
+    indice = _cargar(ruta, True)
+
+    claves = list(indice.filas)
+    azar = np.random.default_rng(1)
+    muestra = [claves[i] for i in azar.integers(0, len(claves), 10_000)]
+    resultados.agregar(f"busqueda/{filas}/clave", _mejor_de(
+        lambda: [indice.buscar(m, e) for m, e in muestra], repeticiones) / len(muestra) * 1e6, "µs")
+    resultados.agregar(f"busqueda/{filas}/espesores", _mejor_de(
+        lambda: [indice.espesores.get(m, []) for m, _ in muestra], repeticiones) / len(muestra) * 1e6, "µs")
+
+    piezas = [motor.DatosPieza(m, e, 1200.0, 4.0, 300.0, 500.0, 10.0, 80.0, 60.0, 25.0) for m, e in muestra[:1000]]
+    resultados.agregar(f"presupuesto/{filas}", _mejor_de(
+        lambda: [motor.calcular_presupuesto(indice, d) for d in piezas], repeticiones) / len(piezas) * 1e6, "µs")
+
+    resultados.agregar(f"memoria/{filas}/carga", _pico_mb(lambda: _cargar(ruta, False)), "MB")
+    return indice
+
+
+def medir_lotes(resultados, indice, trabajos, repeticiones):
+    for filas in trabajos:
+        lista = trabajos_de_prueba(indice, filas)
+        vueltas = repeticiones if filas <= 100_000 else 1
+        segundos = _mejor_de(lambda: lote.calcular_lote(indice, lista, VALORES), vueltas)
+        resultados.agregar(f"lote/{filas}", filas / segundos, "filas/s", "mayor")
+    resultados.agregar(f"memoria/lote/{filas}", _pico_mb(lambda: lote.calcular_lote(indice, lista, VALORES)), "MB")
+
+
+def medir_informes(resultados, carpeta, indice, filas):
+    trabajos = trabajos_de_prueba(indice, filas)
+    salida = trabajos.join(lote.calcular_lote(indice, trabajos, VALORES))
+    for extension in informe.ESCRITORES:
+        ruta = os.path.join(carpeta, f"informe{extension}")
+        segundos = _mejor_de(lambda: informe.escribir_informe(
+            ruta, salida.columns, salida.itertuples(index=False, name=None)), 3)
+        resultados.agregar(f"informe/{extension[1:]}", filas / segundos, "filas/s", "mayor")
+
+
+def medir(tablas, trabajos, filas_informe, repeticiones=5):
+    resultados = Resultados()
+    anterior = os.environ.get(instantanea.DESACTIVAR)
+    try:
+        with tempfile.TemporaryDirectory() as carpeta:
+            indice = None
+            for filas in tablas:
+                indice = medir_tabla(resultados, carpeta, filas, repeticiones)
+            # Lotes e informes sobre la tabla más grande medida
+            medir_lotes(resultados, indice, trabajos, repeticiones)
+            medir_informes(resultados, carpeta, indice, filas_informe)
+    finally:
+        tarifas.limpiar_cache()
+        if anterior is None:
+            os.environ.pop(instantanea.DESACTIVAR, None)
+        else:
+            os.environ[instantanea.DESACTIVAR] = anterior
+    return resultados
+
+
+def comparar(resultados, base, tolerancia):
+    """Lista de (nombre, valor, valor_base) que empeoraron más que la tolerancia."""
+    regresiones = []
+    for nombre, medida in resultados.items():
+        anterior = base.get(nombre)
+        if anterior is None:
+            continue
+        valor, referencia = medida["valor"], anterior["valor"]
+        if medida["mejor"] == "menor":
+            peor = valor > referencia * (1 + tolerancia)
+        else:
+            peor = valor < referencia * (1 - tolerancia)
+        if peor:
+            regresiones.append((nombre, valor, referencia))
+    return regresiones
+
+
+def _tamanos(texto):
+    return tuple(int(t) for t in texto.split(",") if t)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tablas", type=_tamanos, help="filas de las tablas de tarifas, p.ej. 100,1000")
+    parser.add_argument("--trabajos", type=_tamanos, help="filas de las listas de trabajos, p.ej. 1,1000")
+    parser.add_argument("--filas-informe", type=int, default=FILAS_INFORME)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--rapido", action="store_true", help="tamaños chicos (segundos en vez de minutos)")
+    parser.add_argument("--guardar", help="escribe los resultados en este JSON")
+    parser.add_argument("--base", help="JSON de una corrida anterior para comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.2,
+                        help="empeoramiento relativo aceptado respecto a la base (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    tablas = args.tablas or (TABLAS_RAPIDO if args.rapido else TABLAS)
+    trabajos = args.trabajos or (TRABAJOS_RAPIDO if args.rapido else TRABAJOS)
+    filas_informe = min(args.filas_informe, 2_000) if args.rapido else args.filas_informe
+
+    resultados = medir(tablas, trabajos, filas_informe, args.repeticiones)
+
+    if args.guardar:
+        with open(args.guardar, "w", encoding="utf-8") as archivo:
+            json.dump({
+                "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "maquina": platform.platform(),
+                "resultados": resultados,
+            }, archivo, indent=2, ensure_ascii=False)
+
+    if args.base:
+        with open(args.base, encoding="utf-8") as archivo:
+            base = json.load(archivo)["resultados"]
+        regresiones = comparar(resultados, base, args.tolerancia)
+        for nombre, valor, referencia in regresiones:
+            unidad = resultados[nombre]["unidad"]
+            print(f"REGRESIÓN  {nombre}: {valor:,.2f} {unidad} (base {referencia:,.2f} {unidad})")
+        if regresiones:
+            return 1
+        print(f"Sin regresiones respecto a {args.base} (tolerancia {args.tolerancia:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+"""Generador de carga para servicio.py: presupuestos por segundo y latencias.
+
+Abre N conexiones keep-alive contra el servicio y en cada una pide
+presupuestos uno tras otro durante D segundos, con piezas al azar sobre los
+materiales y espesores que devuelve /materiales. Informa pedidos por
+segundo, p50/p95/p99 de la latencia y los errores.
+
+    python medir_servicio.py --arrancar --archivo date.ods          # arranca el servicio y lo mide
+    python medir_servicio.py --url http://127.0.0.1:8765 --conexiones 64 --duracion 10
+    python medir_servicio.py --arrancar --lote 1000 --guardar servicio.json
+
+Con --lote N cada pedido es un /lote de N piezas (las filas por segundo
+son pedidos/s x N).
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import urllib.parse
+
+import numpy as np
+
+PERCENTILES = (50, 95, 99)
+# Valores por defecto con que se arranca el servicio (--arrancar)
+VALORES_SERVICIO = ("--neto-pack", "10", "--costo-pack", "50", "--maquina", "60", "--operario", "25")
+
+
+class _Cliente:
+    """Una conexión HTTP/1.1 keep-alive: escribe un pedido y lee su respuesta."""
+
+    def __init__(self, lector, escritor, host):
+        self.lector = lector
+        self.escritor = escritor
+        self.host = host
+
+    @classmethod
+    async def abrir(cls, host, puerto):
+        lector, escritor = await asyncio.open_connection(host, puerto)
+        return cls(lector, escritor, host)
+
+    async def pedir(self, metodo, ruta, objeto=None):
+        cuerpo = b"" if objeto is None else json.dumps(objeto).encode("utf-8")
+        self.escritor.write(f"{metodo} {ruta} HTTP/1.1\r\nHost: {self.host}\r\n"
+                            f"Content-Type: application/json\r\nContent-Length: {len(cuerpo)}\r\n\r\n"
+                            .encode("latin-1") + cuerpo)
+        cabecera = await self.lector.readuntil(b"\r\n\r\n")
+        lineas = cabecera.decode("latin-1").split("\r\n")
+        estado = int(lineas[0].split(" ", 2)[1])
+        largo = 0
+        for linea in lineas[1:]:
+            nombre, _, valor = linea.partition(":")
+            if nombre.strip().lower() == "content-length":
+                largo = int(valor)
+        return estado, json.loads(await self.lector.readexactly(largo)) if largo else None
+
+    def cerrar(self):
+        self.escritor.close()
+
+
+def piezas_al_azar(materiales, cantidad, semilla=0):
+    """Piezas válidas sobre {material: [espesores]} (lo que devuelve /materiales)."""
+    generador = random.Random(semilla)
+    claves = [(material, espesor) for material, espesores in materiales.items() for espesor in espesores]
+    return [{"material": material, "espesor": espesor,
+             "perimetro": round(generador.uniform(100, 5000), 1),
+             "aujeros": generador.randint(0, 40),
+             "ancho": round(generador.uniform(50, 1500), 1),
+             "largo": round(generador.uniform(50, 3000), 1)}
+            for material, espesor in (generador.choice(claves) for _ in range(cantidad))]
+
+
+async def _trabajar(cliente, ruta, pedidos, fin, latencias, errores):
+    indice = 0
+    while time.perf_counter() < fin:
+        inicio = time.perf_counter()
+        estado, _ = await cliente.pedir("POST", ruta, pedidos[indice % len(pedidos)])
+        latencias.append(time.perf_counter() - inicio)
+        if estado != 200:
+            errores[estado] = errores.get(estado, 0) + 1
+        indice += 1
+
+
+async def medir(host, puerto, conexiones=32, duracion=5.0, lote=0, semilla=0):
+    """{pedidos, segundos, pedidos_s, filas_s, p50_ms, p95_ms, p99_ms, max_ms, errores}."""
+    cliente = await _Cliente.abrir(host, puerto)
+    _, materiales = await cliente.pedir("GET", "/materiales")
+    cliente.cerrar()
+    if not materiales:
+        raise SystemExit("Il servizio non ha materiali in tabella")
+
+    piezas = piezas_al_azar(materiales, 4096, semilla)
+    if lote:
+        ruta = "/lote"
+        pedidos = [{"trabajos": [piezas[(i * lote + j) % len(piezas)] for j in range(lote)]} for i in range(8)]
+    else:
+        ruta, pedidos = "/presupuesto", piezas
+
+    clientes = [await _Cliente.abrir(host, puerto) for _ in range(conexiones)]
+    latencias, errores = [], {}
+    inicio = time.perf_counter()
+    fin = inicio + duracion
+    try:
+        await asyncio.gather(*(_trabajar(cliente, ruta, pedidos[i::conexiones] or pedidos, fin, latencias, errores)
+                               for i, cliente in enumerate(clientes)))
+    finally:
+        for cliente in clientes:
+            cliente.cerrar()
+    segundos = time.perf_counter() - inicio
+
+    ms = np.array(latencias) * 1000
+    p50, p95, p99 = np.percentile(ms, PERCENTILES) if len(ms) else (np.nan,) * 3
+    return {
+        "pedidos": len(latencias),
+        "segundos": segundos,
+        "pedidos_s": len(latencias) / segundos,
+        "filas_s": len(latencias) * (lote or 1) / segundos,
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "max_ms": float(ms.max()) if len(ms) else float("nan"),
+        "errores": {str(estado): cantidad for estado, cantidad in errores.items()},
+    }
+
+
+def arrancar_servicio(archivo, workers, puerto=0):
+    """Proceso de servicio.py en un puerto libre; devuelve (proceso, puerto)."""
+    proceso = subprocess.Popen(
+        [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "servicio.py"),
+         "--archivo", archivo, "--puerto", str(puerto), "--workers", str(workers), *VALORES_SERVICIO],
+        stderr=subprocess.PIPE, text=True)
+    # servicio.py avisa por stderr cuando ya escucha: "In ascolto su http://host:puerto ..."
+    linea = proceso.stderr.readline()
+    if "In ascolto su" not in linea:
+        proceso.kill()
+        raise SystemExit(f"Il servizio non è partito: {linea.strip()}{proceso.stderr.read()}")
+    return proceso, int(linea.split("http://", 1)[1].split()[0].rsplit(":", 1)[1])
+
+
+def detener_servicio(proceso, espera_s=10):
+    """SIGTERM: servicio.py deja de escuchar y cierra su pool antes de salir."""
+    proceso.terminate()
+    try:
+        proceso.wait(espera_s)
+    except subprocess.TimeoutExpired:
+        proceso.kill()
+        proceso.wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Misura richieste/s e latenze di servicio.py")
+    parser.add_argument("--url", default="http://127.0.0.1:8765", help="servizio già in esecuzione")
+    parser.add_argument("--arrancar", action="store_true", help="avvia servicio.py su una porta libera")
+    parser.add_argument("--archivo", default="date.ods", help="tabella delle tariffe per --arrancar")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processi del servizio (--arrancar)")
+    parser.add_argument("--conexiones", type=int, default=32, help="connessioni keep-alive simultanee")
+    parser.add_argument("--duracion", type=float, default=5.0, help="secondi di carico")
+    parser.add_argument("--lote", type=int, default=0, help="pezzi per richiesta /lote (0: /presupuesto)")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--guardar", help="scrive i risultati in questo JSON")
+    args = parser.parse_args(argv)
+
+    proceso = None
+    if args.arrancar:
+        proceso, puerto = arrancar_servicio(args.archivo, args.workers)
+        host = "127.0.0.1"
+    else:
+        url = urllib.parse.urlsplit(args.url)
+        host, puerto = url.hostname, url.port or 80
+    try:
+        resultado = asyncio.run(medir(host, puerto, args.conexiones, args.duracion, args.lote, args.semilla))
+    finally:
+        if proceso is not None:
+            detener_servicio(proceso)
+
+    print(f"  {'pedidos':12} {resultado['pedidos']:14,d}")
+    print(f"  {'pedidos/s':12} {resultado['pedidos_s']:14,.1f}")
+    if args.lote:
+        print(f"  {'filas/s':12} {resultado['filas_s']:14,.1f}")
+    for nombre in ("p50_ms", "p95_ms", "p99_ms", "max_ms"):
+        print(f"  {nombre:12} {resultado[nombre]:14,.2f}")
+    print(f"  {'errores':12} {sum(resultado['errores'].values()):14,d} {resultado['errores'] or ''}")
+
+    if args.guardar:
+        resultado.update(conexiones=args.conexiones, lote=args.lote, python=platform.python_version(),
+                         cpu=os.cpu_count())
+        with open(args.guardar, "w", encoding="utf-8") as archivo:
+            json.dump(resultado, archivo, indent=2)
+    return 1 if resultado["errores"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""Motor de presupuestos sin interfaz gráfica.
+
+Recibe los datos de la pieza ya tipados, busca la fila de tarifas una sola
+vez y recorre la cadena tiempo de corte -> gas -> costos sin repetir cálculos.
+Los errores se señalan con ErrorPresupuesto (mensajes listos para mostrar).
+"""
+from typing import NamedTuple
+
+import instrumentacion
+
+
+class ErrorPresupuesto(ValueError):
+    """Datos de entrada o de la tabla de tarifas no válidos."""
+
+
+class DatosPieza(NamedTuple):
+    material: str
+    espesor: float
+    perimetro: float       # mm
+    aujeros: float
+    ancho: float           # mm
+    largo: float           # mm
+    neto_pack: float       # m3
+    costo_pack: float      # EUR
+    costo_maquina: float   # EUR/h
+    costo_operario: float  # EUR
+    # Recorrido en vacío entre agujeros/contornos (recorrido.py); 0 sin geometría
+    tiempo_desplazamiento_horas: float = 0.0
+
+
+class Presupuesto(NamedTuple):
+    tiempo_corte_horas: float
+    tiempo_aujeros_horas: float
+    tiempo_total_horas: float
+    consumo_gas: float     # m3
+    costo_gas: float
+    costo_maquina: float
+    costo_peso: float
+    costo_operario: float
+    total: float
+    tiempo_desplazamiento_horas: float = 0.0  # incluido en tiempo_total_horas
+
+    @property
+    def tiempo_total_minutos(self):
+        return self.tiempo_total_horas * 60
+
+    def como_dict(self):
+        """Resultado con las mismas claves que usaba costos_dict en app.py."""
+        return {
+            "costo_gas": self.costo_gas,
+            "costo_maquina": self.costo_maquina,
+            "costo_peso": self.costo_peso,
+            "total": self.total,
+            "cantidad_gas_dict": self.consumo_gas,
+            "tiempo_corte_horas": self.tiempo_total_horas,
+            "Costo_operario": self.costo_operario,
+        }
+
+
+# Mensajes de error (también los usa el cálculo por lotes)
+SIN_MATERIAL = "Per favore, seleziona materiale e spessore."
+NUMEROS_INVALIDOS = "Per favore, inserisci valori numerici validi."
+SIN_DATOS = "Non sono stati trovati dati con i criteri selezionati."
+CW_CERO = "Il valore di CW non può essere zero."
+TIEMPOS_INVALIDOS = "I tempi non sono validi."
+DURACION_VACIA = "Il campo 'Durazione' è vuoto o mancante. Per favore, inserisci la durata del pack."
+DURACION_CERO = "La durata del pack non può essere zero."
+
+
+# Campos numéricos de la pieza, en el orden de la ventana, con el mensaje
+# a mostrar si el usuario los dejó vacíos
+CAMPOS = (
+    ("perimetro", "Per favore, inserisci un perimetro."),
+    ("aujeros", "Per favore, inserisci la quantità di fori."),
+    ("neto_pack", "Per favore, inserisci il contenuto netto del pack."),
+    ("costo_pack", "Per favore, inserisci il costo del pack."),
+    ("costo_maquina", "Per favore, inserisci il costo della macchina."),
+    ("ancho", "Per favore, inserisci l'ancho."),
+    ("costo_operario", "Per favore, inserisci l'costo ore operari."),
+    ("largo", "Per favore, inserisci il largo."),
+)
+
+
+def es_vacio(valor):
+    """None, "" o NaN (celdas vacías leídas por pandas)."""
+    return valor is None or valor == "" or valor != valor
+
+
+def buscar_tarifa(indice, material, espesor):
+    """FilaTarifa de (material, espesor) en el índice de la tabla."""
+    fila = indice.buscar(material, espesor)
+    if fila is None:
+        raise ErrorPresupuesto(SIN_DATOS)
+    return fila
+
+
+def calcular_tiempo_corte(fila, perimetro, aujeros):
+    """Tiempos en horas: (corte del perímetro, agujeros, total)."""
+    # Verificar que 'cw' no sea cero para evitar la división por cero
+    if es_vacio(fila.cw) or fila.cw == 0:
+        raise ErrorPresupuesto(CW_CERO)
+    if es_vacio(fila.tiempo_1) or es_vacio(fila.tiempo_2):
+        raise ErrorPresupuesto(TIEMPOS_INVALIDOS)
+
+    tiempo_corte = perimetro / fila.cw
+    tiempo_aujeros = aujeros * (fila.tiempo_1 + fila.tiempo_2)
+    return tiempo_corte, tiempo_aujeros, tiempo_corte + tiempo_aujeros
+
+
+def calcular_consumo_gas(fila, tiempo_total_horas, neto_pack):
+    """Consumo de gas en m3 para el tiempo de corte dado."""
+    if es_vacio(fila.duracion):
+        raise ErrorPresupuesto(DURACION_VACIA)
+    if fila.duracion == 0:
+        raise ErrorPresupuesto(DURACION_CERO)
+    return (tiempo_total_horas * neto_pack) / fila.duracion
+
+
+def calcular_costo_peso(fila, ancho, largo):
+    """Costo del material de la pieza (EUR)."""
+    area_m2 = (ancho * largo) / 1_000_000  # mm² -> m²
+    return area_m2 * fila.costo
+
+
+def calcular_con_fila(fila, datos):
+    """Cadena completa de cálculo a partir de una fila de tarifas ya buscada."""
+    tiempo_corte, tiempo_aujeros, tiempo_total = calcular_tiempo_corte(
+        fila, datos.perimetro, datos.aujeros)
+    consumo = calcular_consumo_gas(fila, tiempo_total, datos.neto_pack)
+    # El desplazamiento en vacío ocupa la máquina pero no gasta gas
+    tiempo_total += datos.tiempo_desplazamiento_horas
+
+    costo_gas = consumo * datos.costo_pack
+    costo_maquina = tiempo_total * datos.costo_maquina
+    costo_peso = calcular_costo_peso(fila, datos.ancho, datos.largo)
+    total = costo_gas + costo_maquina + costo_peso + datos.costo_operario
+
+    return Presupuesto(
+        tiempo_corte_horas=tiempo_corte,
+        tiempo_aujeros_horas=tiempo_aujeros,
+        tiempo_total_horas=tiempo_total,
+        consumo_gas=consumo,
+        costo_gas=costo_gas,
+        costo_maquina=costo_maquina,
+        costo_peso=costo_peso,
+        costo_operario=datos.costo_operario,
+        total=total,
+        tiempo_desplazamiento_horas=datos.tiempo_desplazamiento_horas,
+    )
+
+
+def calcular_presupuesto(indice, datos):
+    """Busca la tarifa de la pieza en el índice y calcula el presupuesto completo."""
+    if instrumentacion.activada:
+        return _calcular_presupuesto_medido(indice, datos)
+    fila = buscar_tarifa(indice, datos.material, datos.espesor)
+    return calcular_con_fila(fila, datos)
+
+
+def _calcular_presupuesto_medido(indice, datos):
+    # Mismo cálculo con un tramo por etapa; aparte para no pagar los tramos
+    # vacíos en cada presupuesto cuando la instrumentación está desactivada
+    with instrumentacion.tramo("calculo/busqueda"):
+        fila = buscar_tarifa(indice, datos.material, datos.espesor)
+    with instrumentacion.tramo("calculo/formulas"):
+        return calcular_con_fila(fila, datos)
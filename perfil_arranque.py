@@ -0,0 +1,138 @@
+"""Perfil de arranque de app.py y app2.py con límites de regresión.
+
+Para cada ventana lanza un proceso nuevo con `python -X importtime` y muestra:
+    - el tiempo total de importación y los módulos de primer nivel más caros
+    - el tiempo hasta la primera vuelta de mainloop (ventana visible), si hay
+      pantalla; sin pantalla sólo se importan los módulos que importa la ventana
+    - si algún módulo pesado (pandas, numpy, odf) se importó antes de la ventana:
+      esos se cargan después, en segundo plano, al leer la tabla
+
+Termina con código 1 si se supera algún límite, para usarlo como control
+antes de publicar un cambio.
+
+    python perfil_arranque.py [--repeticiones 3] [--top 10]
+"""
+import argparse
+import ast
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from medir_arranque import AQUI, _hay_pantalla
+
+VENTANAS = ("app.py", "app2.py")
+
+# Límites (ms) sobre la mediana de las repeticiones
+LIMITE_IMPORTACIONES_MS = 200
+LIMITE_VENTANA_MS = 1500
+
+# No deben importarse antes de mostrar la ventana
+MODULOS_PESADOS = ("pandas", "numpy", "odf")
+
+
+def importaciones_de(script):
+    """Módulos que el script importa en su nivel superior."""
+    arbol = ast.parse(open(os.path.join(AQUI, script), encoding="utf-8").read())
+    modulos = []
+    for nodo in arbol.body:
+        if isinstance(nodo, ast.Import):
+            modulos.extend(alias.name for alias in nodo.names)
+        elif isinstance(nodo, ast.ImportFrom) and nodo.module:
+            modulos.extend(f"{nodo.module}.{alias.name}" if nodo.module == "tkinter" else nodo.module
+                           for alias in nodo.names)
+    return list(dict.fromkeys(modulos))
+
+
+def leer_importtime(texto):
+    """[(módulo, propio_us, acumulado_us, nivel)] de la salida de -X importtime."""
+    registros = []
+    for linea in texto.splitlines():
+        if not linea.startswith("import time:") or "self [us]" in linea:
+            continue
+        partes = linea[len("import time:"):].split("|")
+        propio, acumulado, nombre = int(partes[0]), int(partes[1]), partes[2]
+        nivel = (len(nombre) - len(nombre.lstrip(" ")) - 1) // 2
+        registros.append((nombre.strip(), propio, acumulado, nivel))
+    return registros
+
+
+def _lanzar(script, con_ventana):
+    entorno = dict(os.environ, LASER_MEDIR_ARRANQUE="1")
+    if con_ventana:
+        comando = [sys.executable, "-X", "importtime", os.path.join(AQUI, script)]
+    else:
+        codigo = "; ".join(f"import {m}" for m in importaciones_de(script))
+        comando = [sys.executable, "-X", "importtime", "-c",
+                   f"{codigo}; import sys; print('ventana_visible', *sorted(sys.modules), flush=True)"]
+
+    inicio = time.perf_counter()
+    proceso = subprocess.Popen(comando, cwd=AQUI, env=entorno, text=True,
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    ventana = None
+    for linea in proceso.stdout:
+        if linea.startswith("ventana_visible"):
+            ventana = time.perf_counter() - inicio
+            # La señal lleva los módulos importados hasta ese momento
+            cargados = set(linea.split()[1:])
+            break
+    _, errores = proceso.communicate()
+    if ventana is None:
+        raise RuntimeError(f"{script} terminó sin mostrar la ventana:\n{errores[-2000:]}")
+    # Lo que se importó después (la lectura de la tabla en segundo plano) no cuenta
+    registros = [r for r in leer_importtime(errores) if r[0] in cargados]
+    return ventana, registros
+
+
+def perfilar(script, repeticiones, con_ventana):
+    ventanas, totales, ultimo = [], [], None
+    for _ in range(repeticiones):
+        ventana, registros = _lanzar(script, con_ventana)
+        ventanas.append(ventana * 1000)
+        totales.append(sum(acumulado for _, _, acumulado, nivel in registros if nivel == 0) / 1000)
+        ultimo = registros
+    primer_nivel = sorted((r for r in ultimo if r[3] == 0), key=lambda r: r[2], reverse=True)
+    return {
+        "ventana_ms": statistics.median(ventanas),
+        "importaciones_ms": statistics.median(totales),
+        "mas_caros": [(nombre, acumulado / 1000) for nombre, _, acumulado, _ in primer_nivel],
+        "pesados": sorted({r[0].split(".")[0] for r in ultimo} & set(MODULOS_PESADOS)),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10, help="módulos más caros a mostrar")
+    parser.add_argument("--limite-importaciones-ms", type=float, default=LIMITE_IMPORTACIONES_MS)
+    parser.add_argument("--limite-ventana-ms", type=float, default=LIMITE_VENTANA_MS)
+    args = parser.parse_args(argv)
+
+    con_ventana = _hay_pantalla()
+    fallos = []
+    for script in VENTANAS:
+        perfil = perfilar(script, args.repeticiones, con_ventana)
+        print(f"{script}: importaciones {perfil['importaciones_ms']:.1f} ms", end="")
+        if con_ventana:
+            print(f", ventana visible {perfil['ventana_ms']:.1f} ms")
+        else:
+            print(f", sin pantalla: proceso hasta importar todo {perfil['ventana_ms']:.1f} ms")
+        for nombre, milisegundos in perfil["mas_caros"][:args.top]:
+            print(f"    {nombre:32} {milisegundos:8.1f} ms")
+
+        if perfil["importaciones_ms"] > args.limite_importaciones_ms:
+            fallos.append(f"{script}: importaciones {perfil['importaciones_ms']:.1f} ms "
+                          f"> {args.limite_importaciones_ms:.0f} ms")
+        if con_ventana and perfil["ventana_ms"] > args.limite_ventana_ms:
+            fallos.append(f"{script}: ventana {perfil['ventana_ms']:.1f} ms > {args.limite_ventana_ms:.0f} ms")
+        if perfil["pesados"]:
+            fallos.append(f"{script}: importa {', '.join(perfil['pesados'])} antes de mostrar la ventana")
+
+    for fallo in fallos:
+        print(f"LÍMITE SUPERADO  {fallo}")
+    return 1 if fallos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,490 @@
+"""Reparto de un lote de trabajos entre varias máquinas láser.
+
+Cada máquina tiene su tabla de tarifas y su perfil (costo_maquina, ...):
+con lote.calcular_lote se obtienen, de una vez por máquina, las horas de
+corte (tiempo_corte_horas) y el costo de cada trabajo en cada máquina.
+Cambiar de material en una máquina cuesta `cambio_material` horas y
+cambiar sólo de espesor `cambio_espesor`; en cada máquina los trabajos se
+cortan agrupados por material y espesor, así que su tiempo de preparación
+depende sólo de cuántos materiales y espesores distintos le tocan.
+
+    maquinas = maquinas_de_almacen(almacen_tarifas.AlmacenTarifas("tarifas.sqlite"))
+    plan = planificar(maquinas, trabajos, cambio_material=0.5, objetivo="makespan", limite_s=2)
+    plan.makespan, plan.utilizacion()
+
+El reparto inicial es una planificación por lista: los trabajos, del más
+largo al más corto, van a la máquina donde terminarían antes (o donde
+cuestan menos, con objetivo "costo"), evaluando todas las máquinas a la
+vez con NumPy. Después, hasta agotar `limite_s`, una búsqueda local mueve
+trabajos sueltos, bloques de un mismo material y espesor e intercambia
+pares de trabajos mientras mejore el objetivo.
+"""
+import os
+import time
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+import instrumentacion
+import lote
+import motor
+import tarifas
+
+OBJETIVOS = ("makespan", "costo")
+CAMBIO_MATERIAL = 0.5  # h
+CAMBIO_ESPESOR = 0.1   # h
+LIMITE_S = 2.0
+# Trabajos de cada máquina que se prueban en los intercambios (los más largos)
+CANDIDATOS_INTERCAMBIO = 200
+_EPS = 1e-9
+
+COLUMNAS_PLAN = ("maquina", "posicion", "inicio_h", "fin_h", "horas", "costo", lote.COLUMNA_ERROR)
+
+
+class Maquina(NamedTuple):
+    nombre: str
+    indice: object  # IndiceTarifas (o lo que acepte lote.calcular_lote)
+    valores: dict   # neto_pack, costo_pack, costo_maquina, costo_operario
+
+
+class Plan(NamedTuple):
+    maquinas: list          # nombres
+    asignacion: np.ndarray  # máquina de cada trabajo (-1: ninguna puede cortarlo)
+    posicion: np.ndarray    # orden del trabajo en su máquina (desde 1; 0 sin máquina)
+    inicio: np.ndarray      # horas desde el comienzo
+    fin: np.ndarray
+    horas: np.ndarray       # horas de corte del trabajo en su máquina
+    costo: np.ndarray       # costo del trabajo en su máquina
+    errores: np.ndarray     # mensaje de los trabajos sin máquina
+    corte: np.ndarray       # horas de corte por máquina
+    preparacion: np.ndarray # horas de cambio de material/espesor por máquina
+    costo_preparacion: float
+    makespan: float
+
+    @property
+    def costo_total(self):
+        return float(np.nansum(self.costo)) + self.costo_preparacion
+
+    def utilizacion(self):
+        """Fracción del makespan que cada máquina pasa cortando."""
+        if self.makespan <= 0:
+            return np.zeros(len(self.maquinas))
+        return self.corte / self.makespan
+
+    def tabla(self):
+        """DataFrame con COLUMNAS_PLAN, una fila por trabajo."""
+        nombres = np.array(list(self.maquinas) + [""], dtype=object)
+        return pd.DataFrame({
+            "maquina": nombres[self.asignacion],
+            "posicion": self.posicion,
+            "inicio_h": self.inicio,
+            "fin_h": self.fin,
+            "horas": self.horas,
+            "costo": self.costo,
+            lote.COLUMNA_ERROR: self.errores,
+        })
+
+    def orden_de_corte(self):
+        """Filas ordenadas por máquina y posición, con los trabajos sin máquina al final."""
+        maquina = np.where(self.asignacion < 0, len(self.maquinas), self.asignacion)
+        return np.lexsort((self.posicion, maquina))
+
+    def resumen(self):
+        """Una línea por máquina y una con el total."""
+        lineas = []
+        utilizacion = self.utilizacion()
+        for k, nombre in enumerate(self.maquinas):
+            trabajos = int(np.count_nonzero(self.asignacion == k))
+            lineas.append(f"{nombre}: {trabajos} lavori, {self.corte[k] + self.preparacion[k]:.2f} h "
+                          f"(taglio {self.corte[k]:.2f} h, preparazione {self.preparacion[k]:.2f} h), "
+                          f"utilizzo {utilizacion[k]:.1%}")
+        sin_maquina = int(np.count_nonzero(self.asignacion < 0))
+        lineas.append(f"Makespan {self.makespan:.2f} h, costo {self.costo_total:.2f} EUR "
+                      f"(preparazione {self.costo_preparacion:.2f} EUR), {sin_maquina} lavori senza macchina")
+        return lineas
+
+
+def maquinas_de_almacen(almacen, nombres=None, fecha=None, valores=None):
+    """Máquinas de la base de tarifas (todas si `nombres` es None), con la versión vigente en `fecha`.
+
+    `valores` completa los campos que falten en el perfil de cada máquina.
+    """
+    maquinas = []
+    for nombre in nombres or almacen.maquinas():
+        vista = almacen.vista(nombre, fecha)
+        maquinas.append(Maquina(nombre, vista.indice(), dict(valores or {}, **almacen.perfil(nombre))))
+    return maquinas
+
+
+def maquinas_de_tabla(ruta, valores=None):
+    """Máquinas desde una tabla con columnas maquina, archivo (tarifas .ods/.xlsx) y campos de tarifa opcionales.
+
+    Las rutas relativas de `archivo` se buscan junto a la tabla; `valores`
+    completa los campos de tarifa vacíos.
+    """
+    tabla = lote.leer_trabajos(ruta)
+    for columna in ("maquina", "archivo"):
+        if columna not in tabla:
+            raise motor.ErrorPresupuesto(f"Colonna mancante: {columna}")
+    maquinas = []
+    for fila in tabla.to_dict("records"):
+        archivo = str(fila["archivo"])
+        if not os.path.isabs(archivo):
+            archivo = os.path.join(os.path.dirname(ruta), archivo)
+        propios = {campo: float(fila[campo]) for campo in lote.CAMPOS_TARIFA
+                   if campo in fila and not motor.es_vacio(fila[campo])}
+        maquinas.append(Maquina(str(fila["maquina"]), tarifas.indice_tarifas(archivo), dict(valores or {}, **propios)))
+    if not maquinas:
+        raise motor.ErrorPresupuesto("Nessuna macchina nella tabella.")
+    return maquinas
+
+
+def matrices(maquinas, trabajos):
+    """(horas, costos, errores): arrays (trabajos, máquinas), inf donde la máquina no puede.
+
+    Con una columna `cantidad` las horas y el costo son los de todas las piezas.
+    `errores` tiene el mensaje de la primera máquina para los trabajos que
+    ninguna puede cortar.
+    """
+    n, m = len(trabajos), len(maquinas)
+    cantidad = lote.numeros(trabajos, "cantidad", {"cantidad": 1.0})
+    horas = np.full((n, m), np.inf)
+    costos = np.full((n, m), np.inf)
+    errores = np.full(n, "", dtype=object)
+    for k, maquina in enumerate(maquinas):
+        try:
+            with instrumentacion.tramo("planificador/presupuestos"):
+                resultados = lote.calcular_lote(maquina.indice, trabajos, maquina.valores)
+        except motor.ErrorPresupuesto as e:
+            raise motor.ErrorPresupuesto(f"{maquina.nombre}: {e}") from None
+        error = resultados[lote.COLUMNA_ERROR].to_numpy(dtype=object)
+        validas = error == ""
+        horas[validas, k] = resultados["tiempo_corte_horas"].to_numpy()[validas] * cantidad[validas]
+        costos[validas, k] = resultados["total"].to_numpy()[validas] * cantidad[validas]
+        errores[(errores == "") & ~validas] = error[(errores == "") & ~validas]
+    errores[np.isfinite(horas).any(axis=1)] = ""
+    return horas, costos, errores
+
+
+def familias(trabajos):
+    """(familia, material): códigos de (Material, Espesor) y de Material, ordenados por nombre y espesor."""
+    materiales = trabajos["Material"].astype(str).str.strip().to_numpy(dtype=object)
+    espesores = pd.to_numeric(trabajos["Espesor"], errors="coerce").to_numpy(dtype=float)
+    familia, _ = pd.factorize(pd.MultiIndex.from_arrays([materiales, espesores]), sort=True)
+    material, _ = pd.factorize(materiales, sort=True)
+    return familia, material
+
+
+class _Estado:
+    """Asignación en curso con las cargas por máquina y los contadores de materiales y espesores."""
+
+    def __init__(self, horas, costos, familia, material, cambio_material, cambio_espesor, costo_hora, plazo):
+        n, m = horas.shape
+        self.plazo = plazo
+        self.horas = horas
+        self.costos = costos
+        self.familia = familia
+        self.material = material
+        self.cambio_material = cambio_material
+        self.cambio_espesor = cambio_espesor
+        self.costo_hora = costo_hora
+        self.asignacion = np.full(n, -1)
+        self.corte = np.zeros(m)
+        self.costo = np.zeros(m)
+        self.por_familia = np.zeros((m, familia.max() + 1 if n else 0), dtype=np.int64)
+        self.por_material = np.zeros((m, material.max() + 1 if n else 0), dtype=np.int64)
+        self.n_familias = np.zeros(m, dtype=np.int64)
+        self.n_materiales = np.zeros(m, dtype=np.int64)
+
+    def preparacion(self, n_familias, n_materiales):
+        # Bloques ordenados por material y espesor: un cambio de material por
+        # material extra y un cambio de espesor por cada espesor extra del mismo material
+        return (np.maximum(n_materiales - 1, 0) * self.cambio_material
+                + np.maximum(n_familias - n_materiales, 0) * self.cambio_espesor)
+
+    def cargas(self):
+        return self.corte + self.preparacion(self.n_familias, self.n_materiales)
+
+    def costos_totales(self):
+        return self.costo + self.preparacion(self.n_familias, self.n_materiales) * self.costo_hora
+
+    def agregar(self, trabajos, k):
+        trabajos = np.atleast_1d(trabajos)
+        self.asignacion[trabajos] = k
+        self.corte[k] += self.horas[trabajos, k].sum()
+        self.costo[k] += self.costos[trabajos, k].sum()
+        np.add.at(self.por_familia[k], self.familia[trabajos], 1)
+        np.add.at(self.por_material[k], self.material[trabajos], 1)
+        self.n_familias[k] = np.count_nonzero(self.por_familia[k])
+        self.n_materiales[k] = np.count_nonzero(self.por_material[k])
+
+    def quitar(self, trabajos):
+        trabajos = np.atleast_1d(trabajos)
+        k = self.asignacion[trabajos[0]]
+        self.asignacion[trabajos] = -1
+        self.corte[k] -= self.horas[trabajos, k].sum()
+        self.costo[k] -= self.costos[trabajos, k].sum()
+        np.subtract.at(self.por_familia[k], self.familia[trabajos], 1)
+        np.subtract.at(self.por_material[k], self.material[trabajos], 1)
+        self.n_familias[k] = np.count_nonzero(self.por_familia[k])
+        self.n_materiales[k] = np.count_nonzero(self.por_material[k])
+        return k
+
+    def mover(self, trabajos, k):
+        self.quitar(trabajos)
+        self.agregar(trabajos, k)
+
+    def con_uno_mas(self, trabajos, k):
+        """(carga, costo) de la máquina k si se le agrega cada uno de `trabajos` por separado."""
+        n_familias = self.n_familias[k] + (self.por_familia[k, self.familia[trabajos]] == 0)
+        n_materiales = self.n_materiales[k] + (self.por_material[k, self.material[trabajos]] == 0)
+        preparacion = self.preparacion(n_familias, n_materiales)
+        return (self.corte[k] + self.horas[trabajos, k] + preparacion,
+                self.costo[k] + self.costos[trabajos, k] + preparacion * self.costo_hora[k])
+
+    def con_uno_menos(self, trabajos, k):
+        """(carga, costo) de la máquina k si se le quita cada uno de `trabajos` por separado."""
+        n_familias = self.n_familias[k] - (self.por_familia[k, self.familia[trabajos]] == 1)
+        n_materiales = self.n_materiales[k] - (self.por_material[k, self.material[trabajos]] == 1)
+        preparacion = self.preparacion(n_familias, n_materiales)
+        return (self.corte[k] - self.horas[trabajos, k] + preparacion,
+                self.costo[k] - self.costos[trabajos, k] + preparacion * self.costo_hora[k])
+
+
+def _asignar_por_lista(estado, objetivo):
+    # Del trabajo más largo (en su mejor máquina) al más corto
+    posibles = np.isfinite(estado.horas).any(axis=1)
+    minimo = np.where(posibles, np.min(estado.horas, axis=1, initial=np.inf, where=np.isfinite(estado.horas)), 0.0)
+    orden = np.flatnonzero(posibles)[np.argsort(-minimo[posibles], kind="stable")]
+    m = estado.horas.shape[1]
+    todas = np.arange(m)
+    for j in orden:
+        f, a = estado.familia[j], estado.material[j]
+        n_familias = estado.n_familias + (estado.por_familia[:, f] == 0)
+        n_materiales = estado.n_materiales + (estado.por_material[:, a] == 0)
+        preparacion = estado.preparacion(n_familias, n_materiales)
+        carga = estado.corte + estado.horas[j] + preparacion
+        if objetivo == "costo":
+            costo = (estado.costos[j] + (preparacion - estado.preparacion(estado.n_familias, estado.n_materiales))
+                     * estado.costo_hora)
+            # Menor costo; a igual costo (máquinas iguales), la que termina antes
+            caben = carga <= estado.plazo + _EPS
+            if caben.any():
+                costo = np.where(caben, costo, np.inf)
+            k = todas[np.lexsort((carga, np.round(costo, 9)))[0]]
+        else:
+            k = int(np.argmin(carga))
+        estado.agregar(j, k)
+
+
+def _mejor_movimiento(estado, objetivo, trabajos, c):
+    # Mejor destino para uno de `trabajos` (todos en c): (ganancia, trabajo, destino) o None
+    m = estado.horas.shape[1]
+    cargas = estado.cargas()
+    carga_c, costo_c = estado.con_uno_menos(trabajos, c)
+    costos = estado.costos_totales()
+    mejor = None
+    for k in range(m):
+        if k == c:
+            continue
+        carga_k, costo_k = estado.con_uno_mas(trabajos, k)
+        if objetivo == "costo":
+            ganancia = (costos[c] + costos[k]) - (costo_c + costo_k)
+            ganancia[carga_k > estado.plazo + _EPS] = -np.inf
+        else:
+            ganancia = cargas[c] - np.maximum(carga_c, carga_k)
+        ganancia = np.where(np.isfinite(carga_k), ganancia, -np.inf)
+        i = int(np.argmax(ganancia))
+        if ganancia[i] > _EPS and (mejor is None or ganancia[i] > mejor[0]):
+            mejor = (float(ganancia[i]), trabajos[i], k)
+    return mejor
+
+
+def _mejor_bloque(estado, objetivo, trabajos, c):
+    # Mover todos los trabajos de un material y espesor de c a otra máquina: ahorra su preparación
+    m = estado.horas.shape[1]
+    cargas = estado.cargas()
+    costos = estado.costos_totales()
+    mejor = None
+    for f in np.unique(estado.familia[trabajos]):
+        bloque = trabajos[estado.familia[trabajos] == f]
+        if len(bloque) == 1:
+            continue  # ya lo prueba _mejor_movimiento
+        a = estado.material[bloque[0]]
+        n_familias_c = estado.n_familias[c] - 1
+        n_materiales_c = estado.n_materiales[c] - (estado.por_material[c, a] == len(bloque))
+        preparacion_c = estado.preparacion(n_familias_c, n_materiales_c)
+        carga_c = estado.corte[c] - estado.horas[bloque, c].sum() + preparacion_c
+        costo_c = estado.costo[c] - estado.costos[bloque, c].sum() + preparacion_c * estado.costo_hora[c]
+        for k in range(m):
+            if k == c:
+                continue
+            horas_k = estado.horas[bloque, k].sum()
+            if not np.isfinite(horas_k):
+                continue
+            preparacion_k = estado.preparacion(estado.n_familias[k] + (estado.por_familia[k, f] == 0),
+                                               estado.n_materiales[k] + (estado.por_material[k, a] == 0))
+            carga_k = estado.corte[k] + horas_k + preparacion_k
+            if objetivo == "costo":
+                if carga_k > estado.plazo + _EPS:
+                    continue
+                costo_k = estado.costo[k] + estado.costos[bloque, k].sum() + preparacion_k * estado.costo_hora[k]
+                ganancia = (costos[c] + costos[k]) - (costo_c + costo_k)
+            else:
+                ganancia = cargas[c] - max(carga_c, carga_k)
+            if ganancia > _EPS and (mejor is None or ganancia > mejor[0]):
+                mejor = (float(ganancia), bloque, k)
+    return mejor
+
+
+def _intercambiar(estado, trabajos_c, c):
+    # Makespan: intercambiar un trabajo de la máquina crítica c con uno de otra máquina.
+    # Se filtra sin preparación (arrays) y se comprueban exactos los mejores candidatos.
+    cargas = estado.cargas()
+    objetivo = cargas[c]
+    if len(trabajos_c) > CANDIDATOS_INTERCAMBIO:
+        trabajos_c = trabajos_c[np.argsort(-estado.horas[trabajos_c, c])[:CANDIDATOS_INTERCAMBIO]]
+    for k in np.argsort(cargas):
+        if k == c:
+            continue
+        trabajos_k = np.flatnonzero(estado.asignacion == k)
+        if len(trabajos_k) > CANDIDATOS_INTERCAMBIO:
+            trabajos_k = trabajos_k[np.argsort(-estado.horas[trabajos_k, k])[:CANDIDATOS_INTERCAMBIO]]
+        if not len(trabajos_k):
+            continue
+        nueva_c = cargas[c] - estado.horas[trabajos_c, c][:, None] + estado.horas[trabajos_k, c][None, :]
+        nueva_k = cargas[k] - estado.horas[trabajos_k, k][None, :] + estado.horas[trabajos_c, k][:, None]
+        peor = np.maximum(nueva_c, nueva_k)
+        peor[~np.isfinite(peor)] = np.inf
+        for plano in np.argsort(peor, axis=None)[:5]:
+            i, l = np.unravel_index(plano, peor.shape)
+            if peor[i, l] >= objetivo - _EPS:
+                break
+            a, b = trabajos_c[i], trabajos_k[l]
+            estado.mover(a, k)
+            estado.mover(b, c)
+            nuevas = estado.cargas()
+            if max(nuevas[c], nuevas[k]) < objetivo - _EPS:
+                return True
+            estado.mover(b, k)
+            estado.mover(a, c)
+    return False
+
+
+def _mejorar(estado, objetivo, limite_s):
+    fin = time.perf_counter() + limite_s
+    m = estado.horas.shape[1]
+    while time.perf_counter() < fin:
+        if objetivo == "costo":
+            # Cualquier máquina: el mayor ahorro entre todas
+            mejor = None
+            for c in range(m):
+                trabajos = np.flatnonzero(estado.asignacion == c)
+                if not len(trabajos):
+                    continue
+                for candidato in (_mejor_movimiento(estado, objetivo, trabajos, c),
+                                  _mejor_bloque(estado, objetivo, trabajos, c)):
+                    if candidato is not None and (mejor is None or candidato[0] > mejor[0]):
+                        mejor = candidato
+            if mejor is None:
+                return
+            estado.mover(mejor[1], mejor[2])
+            continue
+
+        cargas = estado.cargas()
+        c = int(np.argmax(cargas))
+        trabajos = np.flatnonzero(estado.asignacion == c)
+        if not len(trabajos) or cargas[c] <= 0:
+            return  # nada asignado (lote vacío o ningún trabajo factible)
+        mejor = _mejor_movimiento(estado, objetivo, trabajos, c)
+        bloque = _mejor_bloque(estado, objetivo, trabajos, c)
+        if bloque is not None and (mejor is None or bloque[0] > mejor[0]):
+            mejor = bloque
+        if mejor is not None:
+            estado.mover(mejor[1], mejor[2])
+        elif not _intercambiar(estado, trabajos, c):
+            return
+
+
+def _secuencia(estado):
+    # Orden en cada máquina (material, espesor y del más largo al más corto) y horarios
+    n, m = estado.horas.shape
+    posicion = np.zeros(n, dtype=np.int64)
+    inicio = np.full(n, np.nan)
+    fin = np.full(n, np.nan)
+    preparacion = np.zeros(m)
+    for k in range(m):
+        trabajos = np.flatnonzero(estado.asignacion == k)
+        if not len(trabajos):
+            continue
+        trabajos = trabajos[np.lexsort((-estado.horas[trabajos, k], estado.familia[trabajos]))]
+        familia = estado.familia[trabajos]
+        material = estado.material[trabajos]
+        cambio = np.zeros(len(trabajos))
+        cambio[1:] = np.where(familia[1:] != familia[:-1],
+                              np.where(material[1:] != material[:-1], estado.cambio_material, estado.cambio_espesor),
+                              0.0)
+        duracion = estado.horas[trabajos, k]
+        fin[trabajos] = np.cumsum(cambio + duracion)
+        inicio[trabajos] = fin[trabajos] - duracion
+        posicion[trabajos] = np.arange(1, len(trabajos) + 1)
+        preparacion[k] = cambio.sum()
+    return posicion, inicio, fin, preparacion
+
+
+def planificar(maquinas, trabajos, cambio_material=CAMBIO_MATERIAL, cambio_espesor=CAMBIO_ESPESOR,
+               objetivo="makespan", limite_s=LIMITE_S, plazo_h=None):
+    """Plan de `trabajos` (tabla de lote, con `cantidad` opcional) en `maquinas`.
+
+    `objetivo` "makespan" minimiza la hora de fin de la última máquina y
+    "costo" la suma de los costos de los trabajos más el de las horas de
+    preparación (a costo_maquina de cada máquina); sin `plazo_h` (horas
+    máximas por máquina) el costo lleva todo a la máquina más barata.
+    `limite_s` acota la búsqueda local.
+    """
+    if objetivo not in OBJETIVOS:
+        raise motor.ErrorPresupuesto(f"Obiettivo sconosciuto: {objetivo} (usa {', '.join(OBJETIVOS)})")
+    if not maquinas:
+        raise motor.ErrorPresupuesto("Nessuna macchina da pianificare.")
+    horas, costos, errores = matrices(maquinas, trabajos)
+    familia, material = familias(trabajos)
+    costo_hora = np.array([float(maquina.valores.get("costo_maquina", 0.0)) for maquina in maquinas])
+    plazo = np.inf if plazo_h is None else float(plazo_h)
+
+    with instrumentacion.tramo("planificador/lista"):
+        estado = _Estado(horas, costos, familia, material, cambio_material, cambio_espesor, costo_hora, plazo)
+        _asignar_por_lista(estado, objetivo)
+        if objetivo == "costo":
+            # La lista por costo no ve que la primera preparación de cada máquina
+            # es gratis: a veces el reparto por makespan sale más barato
+            alternativa = _Estado(horas, costos, familia, material, cambio_material, cambio_espesor, costo_hora, plazo)
+            _asignar_por_lista(alternativa, "makespan")
+            if (alternativa.cargas().max() <= plazo + _EPS
+                    and alternativa.costos_totales().sum() < estado.costos_totales().sum()):
+                estado = alternativa
+    with instrumentacion.tramo("planificador/mejora"):
+        _mejorar(estado, objetivo, limite_s)
+
+    posicion, inicio, fin, preparacion = _secuencia(estado)
+    asignada = estado.asignacion >= 0
+    filas = np.flatnonzero(asignada)
+    horas_trabajo = np.full(len(trabajos), np.nan)
+    costo_trabajo = np.full(len(trabajos), np.nan)
+    horas_trabajo[filas] = horas[filas, estado.asignacion[filas]]
+    costo_trabajo[filas] = costos[filas, estado.asignacion[filas]]
+    corte = np.bincount(estado.asignacion[filas], weights=horas_trabajo[filas], minlength=len(maquinas))
+    return Plan(
+        maquinas=[maquina.nombre for maquina in maquinas],
+        asignacion=estado.asignacion,
+        posicion=posicion,
+        inicio=inicio,
+        fin=fin,
+        horas=horas_trabajo,
+        costo=costo_trabajo,
+        errores=errores,
+        corte=corte,
+        preparacion=preparacion,
+        costo_preparacion=float((preparacion * costo_hora).sum()),
+        makespan=float((corte + preparacion).max()),
+    )
@@ -0,0 +1,535 @@
+"""Presupuestos desde la línea de comandos, sin ventana.
+
+Ejemplos:
+    python presupuesto.py pieza --material Acero --espesor 2 --perimetro 1200 \\
+        --aujeros 4 --ancho 300 --largo 500 --neto-pack 10 --costo-pack 80 \\
+        --maquina 60 --operario 25
+    python presupuesto.py lote pedido.csv --salida resultados.csv \\
+        --neto-pack 10 --costo-pack 80 --maquina 60 --operario 25
+    python presupuesto.py lote historico.csv --salida resultados.csv \\
+        --chunk-size 200000 --workers 8 ...
+    python presupuesto.py anidar pedido.csv --hoja 1500x3000 --separacion 5 \\
+        --salida materiale.csv --workers 4
+    python presupuesto.py pieza ... --geometria agujeros.csv --velocidad-rapida 60
+    python presupuesto.py pieza --dxf pieza.dxf --material Acero --espesor 2 ...
+    python presupuesto.py pieza ... --incertidumbre "cw=0.15,duracion=normal:0.1" --muestras 100000
+    python presupuesto.py comparar --perimetro 1200 --aujeros 4 --ancho 300 --largo 500 \\
+        --neto-pack 10 --costo-pack 80 --maquina 60 --operario 25 --primeros 10
+    python presupuesto.py dxf dibujos/ --material Acero --espesor 2 --salida pedido.csv --workers 8
+    python presupuesto.py planificar pedido.csv --db tarifas.sqlite --cambio-material 0.5 \\
+        --objetivo makespan --limite 5 --salida plan.csv
+    python presupuesto.py importar date.ods --perfil Laser1 --desde 2026-01-01
+    python presupuesto.py pieza --db tarifas.sqlite --perfil Laser1 --fecha 2026-02-10 ...
+"""
+import argparse
+import json
+import os
+import sys
+
+import almacen_tarifas
+import cache_presupuestos
+import instrumentacion
+import motor
+import tarifas
+
+ARCHIVO = "date.ods"
+
+# lote, anidado y comparacion (pandas), informe y geometrias se importan sólo en los comandos que los usan:
+# un presupuesto de una pieza no necesita pandas
+
+
+def _agregar_archivo(parser):
+    parser.add_argument("--archivo", default=ARCHIVO, help="tabella delle tariffe .ods/.xlsx (foglio 'date')")
+
+
+def _agregar_almacen(parser):
+    parser.add_argument("--db", help="base di tariffe SQLite (invece di --archivo), vedi 'importar'")
+    parser.add_argument("--perfil", help="macchina della base di tariffe (con --db)")
+    parser.add_argument("--fecha", help="data della tariffa da usare, AAAA-MM-GG (default: oggi)")
+
+
+def _vista(args):
+    # Versión de la base vigente en --fecha para la máquina --perfil
+    if not args.perfil:
+        raise motor.ErrorPresupuesto("--db richiede --perfil (la macchina)")
+    return almacen_tarifas.AlmacenTarifas(args.db).vista(args.perfil, args.fecha)
+
+
+def _comando_pieza(args):
+    if args.db:
+        # Búsqueda puntual en la base; el perfil completa los valores que falten
+        indice = _vista(args)
+        valores = dict(indice.almacen.perfil(args.perfil), **_valores_tarifa(args))
+    else:
+        indice = tarifas.indice_tarifas(args.archivo)
+        valores = _valores_tarifa(args)
+    datos = motor.DatosPieza(material=args.material, espesor=args.espesor, **_campos_pieza(args, valores))
+    if args.sin_cache:
+        presupuesto = motor.calcular_presupuesto(indice, datos)
+    else:
+        cache = cache_presupuestos.CachePresupuestos()
+        presupuesto = cache.calcular(indice, datos)
+        # Al cerrar se escribe lo pendiente y se cuentan las entradas en disco
+        cache.cerrar()
+        if args.estadisticas_cache:
+            print(cache.linea_resumen(), file=sys.stderr)
+
+    rangos = None
+    if args.incertidumbre is not None:
+        import incertidumbre
+
+        rangos = incertidumbre.simular(indice, datos, incertidumbre.leer_tolerancias(args.incertidumbre),
+                                       muestras=args.muestras, semilla=args.semilla)
+
+    if args.json:
+        salida = presupuesto._asdict()
+        if rangos is not None:
+            salida["rangos"] = {componente: rango._asdict() for componente, rango in rangos.items()}
+        print(json.dumps(salida, indent=2))
+    else:
+        for campo, valor in presupuesto._asdict().items():
+            print(f"{campo:27} {valor:.6f}")
+        if rangos is not None:
+            print()
+            print(incertidumbre.tabla(rangos))
+    return 0
+
+
+def _campos_pieza(args, valores):
+    # Medidas (a mano o del --dxf), tarifas y recorrido en vacío de la pieza
+    for campo, opcion in (("neto_pack", "--neto-pack"), ("costo_pack", "--costo-pack"),
+                          ("costo_maquina", "--maquina"), ("costo_operario", "--operario")):
+        if campo not in valores:
+            raise motor.ErrorPresupuesto(f"Manca {opcion} (o il valore nel profilo della macchina)")
+    if args.dxf:
+        _medidas_dxf(args)
+    for campo in ("perimetro", "ancho", "largo"):
+        if getattr(args, campo) is None:
+            raise motor.ErrorPresupuesto(f"Manca --{campo} (o --dxf)")
+    return dict(
+        perimetro=args.perimetro,
+        aujeros=args.aujeros or 0.0,
+        ancho=args.ancho,
+        largo=args.largo,
+        **valores,
+        tiempo_desplazamiento_horas=_tiempo_desplazamiento(args) if args.geometria else 0.0,
+    )
+
+
+def _medidas_dxf(args):
+    # Las medidas que no se dieron a mano salen del dibujo
+    import geometrias
+
+    cache = geometrias.CacheGeometrias()
+    geometria = cache.leer(args.dxf)
+    cache.cerrar()
+    for campo in ("perimetro", "aujeros", "ancho", "largo"):
+        if getattr(args, campo) is None:
+            setattr(args, campo, getattr(geometria, campo))
+    if geometria.abiertos:
+        print(f"Attenzione: {geometria.abiertos} contorni aperti in {args.dxf}", file=sys.stderr)
+    if args.geometria is None and geometria.inicios:
+        args.geometria = args.dxf
+
+
+def _tiempo_desplazamiento(args):
+    # Orden de corte de los puntos de inicio y su recorrido en vacío (horas)
+    import recorrido
+
+    puntos = recorrido.leer_puntos(args.geometria)
+    orden, distancia = recorrido.ordenar(puntos, limite_s=args.limite_recorrido)
+    horas = recorrido.tiempo_desplazamiento(distancia, args.velocidad_rapida)
+    print(f"Percorso: {len(orden)} punti, {distancia / 1000:.2f} m in vuoto, "
+          f"{horas * 60:.2f} min a {args.velocidad_rapida:g} m/min", file=sys.stderr)
+    if args.orden_corte:
+        import informe
+
+        informe.escribir_informe(args.orden_corte, ("orden", "punto", "x", "y"), (
+            (numero, punto, *puntos[punto].tolist()) for numero, punto in enumerate(orden, 1)))
+    return horas
+
+
+def _valores_tarifa(args):
+    # Valores por defecto para las columnas de tarifa que falten en el lote
+    valores = {
+        "neto_pack": args.neto_pack,
+        "costo_pack": args.costo_pack,
+        "costo_maquina": args.maquina,
+        "costo_operario": args.operario,
+    }
+    return {campo: valor for campo, valor in valores.items() if valor is not None}
+
+
+def _comando_comparar(args):
+    import comparacion
+    import informe
+
+    if args.db:
+        vista = _vista(args)
+        indice = vista.indice()
+        valores = dict(vista.almacen.perfil(args.perfil), **_valores_tarifa(args))
+    else:
+        indice = tarifas.indice_tarifas(args.archivo)
+        valores = _valores_tarifa(args)
+    matriz = comparacion.comparar(indice, _campos_pieza(args, valores))
+
+    columnas = ("puesto", "Material", "Espesor", "tiempo_corte_horas", "cantidad_gas_dict", "costo_gas",
+                "costo_maquina", "costo_peso", "total", comparacion.COLUMNA_NOTA, "errore")
+    if args.salida:
+        informe.escribir_informe(args.salida, columnas, zip(*(matriz.datos[columna].tolist() for columna in columnas)))
+    else:
+        # Le prime --primeros righe e, se resta fuori, la più veloce
+        posiciones = list(range(min(args.primeros, matriz.validas)))
+        if matriz.rapida is not None and matriz.rapida not in posiciones:
+            posiciones.append(matriz.rapida)
+        print(f"{'#':>5} {'Materiale':12} {'Spessore':>8} {'Tempo h':>9} {'Gas m3':>9} {'Totale EUR':>11}  Nota")
+        for posicion in posiciones:
+            fila = matriz.fila(posicion)
+            print(f"{posicion + 1:5} {fila['Material']:12} {fila['Espesor']:8g} {fila['tiempo_corte_horas']:9.4f} "
+                  f"{fila['cantidad_gas_dict']:9.4f} {fila['total']:11.2f}  {fila[comparacion.COLUMNA_NOTA]}")
+    for linea in comparacion.resumen(matriz):
+        print(linea, file=sys.stderr)
+    return 0
+
+
+def _comando_lote(args):
+    import informe
+    import lote
+
+    if args.db:
+        vista = _vista(args)
+        indice = vista.indice()
+        valores = dict(vista.almacen.perfil(args.perfil), **_valores_tarifa(args))
+    else:
+        indice = tarifas.indice_tarifas(args.archivo)
+        valores = _valores_tarifa(args)
+    if args.chunk_size:
+        return _lote_por_bloques(args, indice, valores)
+
+    trabajos = lote.leer_trabajos(args.entrada)
+    resultados = lote.calcular_lote(indice, trabajos, valores)
+    if args.incertidumbre is not None:
+        import incertidumbre
+
+        resultados = resultados.join(incertidumbre.simular_lote(
+            indice, trabajos, valores, incertidumbre.leer_tolerancias(args.incertidumbre),
+            muestras=args.muestras, semilla=args.semilla))
+    salida = trabajos.join(resultados, rsuffix="_risultato")
+
+    if args.salida is None:
+        salida.to_csv(sys.stdout, index=False)
+    elif args.salida.endswith(".csv") and not args.agregar:
+        salida.to_csv(args.salida, index=False)
+    else:
+        informe.escribir_informe(args.salida, salida.columns, salida.itertuples(index=False, name=None),
+                                 agregar=args.agregar)
+
+    errores = int((resultados[lote.COLUMNA_ERROR] != "").sum())
+    print(f"{len(resultados)} righe, {errores} con errori", file=sys.stderr)
+    return 0
+
+
+def _lote_por_bloques(args, indice, valores):
+    import lote
+
+    if not (args.entrada.endswith(".csv") and args.salida and args.salida.endswith(".csv")):
+        raise motor.ErrorPresupuesto("--chunk-size richiede un file .csv in ingresso e --salida .csv")
+    if args.agregar:
+        raise motor.ErrorPresupuesto("--agregar non è disponibile con --chunk-size")
+    if args.incertidumbre is not None:
+        raise motor.ErrorPresupuesto("--incertidumbre non è disponibile con --chunk-size")
+    filas, errores = lote.procesar_csv_por_bloques(
+        indice, args.entrada, args.salida, valores,
+        trabajadores=args.workers, tamano_bloque=args.chunk_size)
+    print(f"{filas} righe, {errores} con errori", file=sys.stderr)
+    return 0
+
+
+def _comando_anidar(args):
+    import anidado
+    import informe
+    import lote
+
+    indice = _vista(args).indice() if args.db else tarifas.indice_tarifas(args.archivo)
+    formatos = anidado.leer_formatos(lote.leer_trabajos(args.hojas)) if args.hojas else {}
+    trabajos = lote.leer_trabajos(args.entrada)
+    filas, grupos = anidado.anidar_lote(indice, trabajos, formatos, anidado.leer_formato(args.hoja),
+                                        args.separacion, trabajadores=args.workers)
+    salida = trabajos.join(filas, rsuffix="_risultato")
+
+    if args.salida is None:
+        salida.to_csv(sys.stdout, index=False)
+    else:
+        informe.escribir_informe(args.salida, salida.columns, salida.itertuples(index=False, name=None))
+    if args.colocaciones:
+        columnas = ("Material", "Espesor", "fila", "hoja", "x", "y", "ancho", "largo", "rotada")
+        informe.escribir_informe(args.colocaciones, columnas, (
+            (grupo.material, grupo.espesor, *colocacion) for grupo in grupos for colocacion in grupo.colocaciones))
+
+    for grupo in grupos:
+        print(f"{grupo.material} {grupo.espesor:g} mm: {grupo.hojas} lamiere {grupo.ancho_hoja:g}x{grupo.largo_hoja:g}, "
+              f"{grupo.piezas} pezzi, utilizzo {grupo.utilizacion:.1%}, materiale {grupo.costo_material:.2f} EUR "
+              f"(senza nesting {grupo.costo_sin_anidado:.2f} EUR)", file=sys.stderr)
+    errores = int((filas[anidado.COLUMNA_ERROR] != "").sum())
+    print(f"{len(filas)} righe, {errores} con errori", file=sys.stderr)
+    return 0
+
+
+def _comando_dxf(args):
+    import geometrias
+    import informe
+
+    rutas = []
+    for entrada in args.entradas:
+        if os.path.isdir(entrada):
+            rutas.extend(geometrias.CacheGeometrias.dxf_de_carpeta(entrada))
+        else:
+            rutas.append(entrada)
+    cache = geometrias.CacheGeometrias("" if args.sin_cache else None)
+    leidos = cache.leer_carpeta(rutas, trabajadores=args.workers)
+    cache.cerrar()
+
+    columnas = ["archivo", "perimetro", "aujeros", "ancho", "largo", "contornos", "abiertos", "errore"]
+    fijas = {"Material": args.material, "Espesor": args.espesor}
+    fijas = {columna: valor for columna, valor in fijas.items() if valor is not None}
+    filas = []
+    for ruta, geometria, error in leidos:
+        if geometria is None:
+            medidas = ("",) * 6
+        else:
+            medidas = (round(geometria.perimetro, 3), geometria.aujeros, round(geometria.ancho, 3),
+                       round(geometria.largo, 3), geometria.contornos, geometria.abiertos)
+        filas.append((*fijas.values(), ruta, *medidas, error))
+    columnas = [*fijas, *columnas]
+
+    if args.salida is None:
+        import csv
+
+        escritor = csv.writer(sys.stdout, lineterminator="\n")
+        escritor.writerow(columnas)
+        escritor.writerows(filas)
+    else:
+        informe.escribir_informe(args.salida, columnas, filas)
+    errores = sum(1 for _, geometria, _ in leidos if geometria is None)
+    print(f"{len(leidos)} disegni, {errores} con errori. {cache.linea_resumen()}", file=sys.stderr)
+    return 0
+
+
+def _comando_planificar(args):
+    import informe
+    import lote
+    import planificador
+
+    valores = _valores_tarifa(args)
+    if args.tabla_maquinas:
+        maquinas = planificador.maquinas_de_tabla(args.tabla_maquinas, valores)
+    else:
+        nombres = [nombre.strip() for nombre in args.maquinas.split(",")] if args.maquinas else None
+        maquinas = planificador.maquinas_de_almacen(almacen_tarifas.AlmacenTarifas(args.db), nombres,
+                                                    args.fecha, valores)
+    trabajos = lote.leer_trabajos(args.entrada)
+    plan = planificador.planificar(maquinas, trabajos, cambio_material=args.cambio_material,
+                                   cambio_espesor=args.cambio_espesor, objetivo=args.objetivo,
+                                   limite_s=args.limite, plazo_h=args.plazo)
+    salida = trabajos.join(plan.tabla(), rsuffix="_risultato")
+    salida = salida.iloc[plan.orden_de_corte()]
+
+    if args.salida is None:
+        salida.to_csv(sys.stdout, index=False)
+    else:
+        informe.escribir_informe(args.salida, salida.columns, salida.itertuples(index=False, name=None))
+    for linea in plan.resumen():
+        print(linea, file=sys.stderr)
+    return 0
+
+
+def _comando_importar(args):
+    almacen = almacen_tarifas.AlmacenTarifas(args.db)
+    filas = almacen.importar(args.archivo, args.perfil, args.desde)
+    print(f"{filas} righe importate per {args.perfil}", file=sys.stderr)
+    return 0
+
+
+def _comando_versiones(args):
+    for maquina, vigente_desde, origen, filas in almacen_tarifas.AlmacenTarifas(args.db).versiones(args.perfil):
+        print(f"{maquina:12} {vigente_desde}  {filas:5} righe  {origen}")
+    return 0
+
+
+def _comando_perfil(args):
+    almacen = almacen_tarifas.AlmacenTarifas(args.db)
+    almacen.guardar_perfil(args.perfil, **_valores_tarifa(args))
+    for campo, valor in almacen.perfil(args.perfil).items():
+        print(f"{campo:16} {valor}")
+    return 0
+
+
+def _agregar_tarifas_opcionales(parser):
+    parser.add_argument("--neto-pack", type=float, help="m3 (se manca la colonna neto_pack)")
+    parser.add_argument("--costo-pack", type=float, help="EUR (se manca la colonna costo_pack)")
+    parser.add_argument("--maquina", type=float, help="EUR/h (se manca la colonna costo_maquina)")
+    parser.add_argument("--operario", type=float, help="EUR (se manca la colonna costo_operario)")
+
+
+def _agregar_pieza(parser):
+    # Medidas, tarifas y recorrido de una pieza (pieza, comparar)
+    parser.add_argument("--perimetro", type=float, help="mm (obbligatorio senza --dxf)")
+    parser.add_argument("--aujeros", type=float)
+    parser.add_argument("--ancho", type=float, help="mm (obbligatorio senza --dxf)")
+    parser.add_argument("--largo", type=float, help="mm (obbligatorio senza --dxf)")
+    parser.add_argument("--dxf", help="disegno del pezzo: perimetro, fori, ingombro e punti di inizio "
+                                      "per le misure non indicate")
+    parser.add_argument("--neto-pack", type=float, help="m3 (obbligatorio senza profilo)")
+    parser.add_argument("--costo-pack", type=float, help="EUR (obbligatorio senza profilo)")
+    parser.add_argument("--maquina", type=float, help="EUR/h (obbligatorio senza profilo)")
+    parser.add_argument("--operario", type=float, help="EUR (obbligatorio senza profilo)")
+    _agregar_almacen(parser)
+    parser.add_argument("--geometria", help="punti di inizio di fori e contorni (colonne x, y in mm, "
+                                            ".csv/.ods/.xlsx): aggiunge il tempo di spostamento in vuoto")
+    parser.add_argument("--velocidad-rapida", type=float, default=60.0, help="m/min in vuoto (default 60)")
+    parser.add_argument("--limite-recorrido", type=float, default=2.0,
+                        help="secondi massimi per migliorare l'ordine di taglio (default 2)")
+    parser.add_argument("--orden-corte", help="salva l'ordine di taglio (.csv/.ods/.xlsx)")
+
+
+def _agregar_incertidumbre(parser, muestras):
+    parser.add_argument("--incertidumbre", nargs="?", const="", metavar="TOLLERANZE",
+                        help="intervalli p5/p50/p95 con Monte Carlo: es. 'cw=0.15,duracion=normal:10%%,"
+                             "1=triangular:0.2' (senza valore: ±15%% uniforme su CW, 1, 2 e Duracion)")
+    parser.add_argument("--muestras", type=int, default=muestras,
+                        help=f"campioni Monte Carlo (default {muestras})")
+    parser.add_argument("--semilla", type=int, help="seme del generatore, per risultati ripetibili")
+
+
+def crear_parser():
+    parser = argparse.ArgumentParser(description="Preventivi per il taglio laser")
+    parser.add_argument("--profile", action="store_true",
+                        help=f"misura le fasi di caricamento e calcolo (anche con {instrumentacion.VARIABLE}=1) "
+                             "e stampa il riepilogo su stderr")
+    parser.add_argument("--profile-json", help="salva il riepilogo delle fasi in questo JSON")
+    parser.add_argument("--cprofile", help="esegue il comando con cProfile e salva il profilo qui")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    pieza = subparsers.add_parser("pieza", help="preventivo di un singolo pezzo")
+    _agregar_archivo(pieza)
+    pieza.add_argument("--material", required=True)
+    pieza.add_argument("--espesor", type=float, required=True, help="mm")
+    _agregar_pieza(pieza)
+    pieza.add_argument("--json", action="store_true", help="output in formato JSON")
+    pieza.add_argument("--sin-cache", action="store_true",
+                       help="non usare la cache dei preventivi (%s)" % cache_presupuestos.RUTA)
+    pieza.add_argument("--estadisticas-cache", action="store_true",
+                       help="stampa su stderr le statistiche della cache")
+    _agregar_incertidumbre(pieza, muestras=100_000)
+    pieza.set_defaults(funcion=_comando_pieza)
+
+    comparar = subparsers.add_parser("comparar", help="lo stesso pezzo in tutti i materiali e spessori della tabella")
+    _agregar_archivo(comparar)
+    _agregar_pieza(comparar)
+    comparar.add_argument("--primeros", type=int, default=20, help="righe da stampare, dalla più economica (default 20)")
+    comparar.add_argument("--salida", help="salva tutta la classifica (.csv/.ods/.xlsx) invece di stamparla")
+    comparar.set_defaults(funcion=_comando_comparar)
+
+    lotes = subparsers.add_parser("lote", help="preventivi di un elenco di pezzi (.csv/.ods/.xlsx)")
+    _agregar_archivo(lotes)
+    lotes.add_argument("entrada", help="tabella dei lavori")
+    lotes.add_argument("--salida", help="file dei risultati (.csv/.ods/.xlsx); stdout se omesso")
+    lotes.add_argument("--agregar", action="store_true", help="aggiungi i risultati a un file esistente")
+    _agregar_tarifas_opcionales(lotes)
+    _agregar_almacen(lotes)
+    lotes.add_argument("--chunk-size", type=int, default=0,
+                       help="righe per blocco: legge e scrive il CSV a blocchi senza caricarlo tutto")
+    lotes.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                       help="processi per l'elaborazione a blocchi (default: numero di CPU)")
+    _agregar_incertidumbre(lotes, muestras=10_000)
+    lotes.set_defaults(funcion=_comando_lote)
+
+    anidar = subparsers.add_parser("anidar", help="nesting dei pezzi sulle lamiere e costo del materiale")
+    _agregar_archivo(anidar)
+    anidar.add_argument("entrada", help="tabella dei lavori (Material, Espesor, ancho, largo, [cantidad], [rotar])")
+    anidar.add_argument("--salida", help="file dei risultati (.csv/.ods/.xlsx); stdout se omesso")
+    anidar.add_argument("--hoja", default="1500x3000", help="formato della lamiera ancho x largo in mm")
+    anidar.add_argument("--hojas", help="formati per materiale: tabella Material, Espesor, ancho, largo "
+                                        "(Espesor vuoto = tutti gli spessori)")
+    anidar.add_argument("--separacion", type=float, default=0.0, help="mm tra i pezzi e dai bordi")
+    anidar.add_argument("--colocaciones", help="salva la posizione di ogni pezzo (.csv/.ods/.xlsx)")
+    anidar.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="processi per provare gli ordinamenti in parallelo (default: numero di CPU)")
+    _agregar_almacen(anidar)
+    anidar.set_defaults(funcion=_comando_anidar)
+
+    dxf = subparsers.add_parser("dxf", help="misure dei disegni DXF (perimetro, fori, ingombro)")
+    dxf.add_argument("entradas", nargs="+", help="file .dxf o cartelle che li contengono")
+    dxf.add_argument("--salida", help="file dei risultati (.csv/.ods/.xlsx); stdout se omesso")
+    dxf.add_argument("--material", help="aggiunge la colonna Material (per usare il risultato con 'lote')")
+    dxf.add_argument("--espesor", type=float, help="aggiunge la colonna Espesor in mm")
+    dxf.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                     help="processi per leggere i disegni nuovi (default: numero di CPU)")
+    dxf.add_argument("--sin-cache", action="store_true", help="non usare la cache delle geometrie")
+    dxf.set_defaults(funcion=_comando_dxf)
+
+    planificar = subparsers.add_parser("planificar", help="distribuisce un lotto di lavori tra più macchine")
+    planificar.add_argument("entrada", help="tabella dei lavori (come 'lote', con 'cantidad' opzionale)")
+    planificar.add_argument("--salida", help="file del piano (.csv/.ods/.xlsx); stdout se omesso")
+    planificar.add_argument("--db", default=almacen_tarifas.ALMACEN,
+                            help="base di tariffe con una tabella e un profilo per macchina")
+    planificar.add_argument("--maquinas", help="macchine della base separate da virgole (default: tutte)")
+    planificar.add_argument("--fecha", help="data delle tariffe, AAAA-MM-GG (default: oggi)")
+    planificar.add_argument("--tabla-maquinas", help="invece di --db: tabella con maquina, archivo (tariffe) e "
+                                                     "opzionalmente neto_pack, costo_pack, costo_maquina, costo_operario")
+    _agregar_tarifas_opcionales(planificar)
+    planificar.add_argument("--cambio-material", type=float, default=0.5, help="ore per cambiare materiale (default 0.5)")
+    planificar.add_argument("--cambio-espesor", type=float, default=0.1, help="ore per cambiare solo spessore (default 0.1)")
+    planificar.add_argument("--objetivo", choices=("makespan", "costo"), default="makespan",
+                            help="minimizza la fine dell'ultima macchina o il costo totale (default makespan)")
+    planificar.add_argument("--plazo", type=float, help="ore massime per macchina con --objetivo costo")
+    planificar.add_argument("--limite", type=float, default=2.0,
+                            help="secondi massimi per migliorare il piano (default 2)")
+    planificar.set_defaults(funcion=_comando_planificar)
+
+    importar = subparsers.add_parser("importar", help="importa una tabella .ods/.xlsx nella base di tariffe")
+    importar.add_argument("archivo", help="tabella delle tariffe .ods/.xlsx (foglio 'date')")
+    importar.add_argument("--db", default=almacen_tarifas.ALMACEN)
+    importar.add_argument("--perfil", required=True, help="macchina a cui appartiene la tabella")
+    importar.add_argument("--desde", help="data di entrata in vigore, AAAA-MM-GG (default: oggi)")
+    importar.set_defaults(funcion=_comando_importar)
+
+    versiones = subparsers.add_parser("versiones", help="versioni salvate nella base di tariffe")
+    versiones.add_argument("--db", default=almacen_tarifas.ALMACEN)
+    versiones.add_argument("--perfil", help="solo questa macchina")
+    versiones.set_defaults(funcion=_comando_versiones)
+
+    perfil = subparsers.add_parser("perfil", help="valori predefiniti di una macchina")
+    perfil.add_argument("perfil", help="nome della macchina")
+    perfil.add_argument("--db", default=almacen_tarifas.ALMACEN)
+    perfil.add_argument("--neto-pack", type=float, help="m3")
+    perfil.add_argument("--costo-pack", type=float, help="EUR")
+    perfil.add_argument("--maquina", type=float, help="costo della macchina EUR/h")
+    perfil.add_argument("--operario", type=float, help="EUR")
+    perfil.set_defaults(funcion=_comando_perfil)
+
+    return parser
+
+
+def main(argv=None):
+    args = crear_parser().parse_args(argv)
+    if args.profile or args.profile_json:
+        instrumentacion.activar()
+    try:
+        if args.cprofile:
+            codigo, estadisticas = instrumentacion.perfilar(args.funcion, args, ruta=args.cprofile)
+            print(estadisticas, file=sys.stderr)
+        else:
+            codigo = args.funcion(args)
+    except motor.ErrorPresupuesto as e:
+        print(f"Errore: {e}", file=sys.stderr)
+        codigo = 2
+    if instrumentacion.activada:
+        print(instrumentacion.tabla(), file=sys.stderr)
+        if args.profile_json:
+            instrumentacion.volcar_json(args.profile_json)
+    return codigo
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""Trabajo en segundo plano para las ventanas Tk.
+
+Las funciones largas (cargar la tabla, calcular) se ejecutan en un hilo y su
+resultado vuelve al hilo de Tk por una cola que se revisa con `after`, así el
+bucle de eventos nunca se bloquea. Cada trabajo tiene un nombre: enviar otro
+con el mismo nombre deja obsoleto al anterior y su resultado se descarta
+(por ejemplo, si el usuario elige otro archivo mientras se carga el primero).
+
+Todos los métodos se llaman desde el hilo de Tk; los hilos de trabajo sólo
+escriben en la cola.
+"""
+import concurrent.futures
+import queue
+import time
+
+
+class Trabajador:
+    def __init__(self, raiz, al_cambiar_ocupado=None, intervalo_ms=20, hilos=2):
+        self.raiz = raiz
+        self.al_cambiar_ocupado = al_cambiar_ocupado
+        self.intervalo_ms = intervalo_ms
+        self.ejecutor = concurrent.futures.ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="laser")
+        self.cola = queue.Queue()
+        self.generaciones = {}
+        self.futuros = {}
+        self.pendientes = 0
+        self.sondeando = False
+        # Máximo retraso observado del bucle de Tk respecto al intervalo pedido (ms)
+        self.latencia_maxima_ms = 0.0
+        self._esperado = None
+
+    def enviar(self, nombre, funcion, *args, al_terminar=None, al_fallar=None):
+        """Ejecuta funcion(*args) en segundo plano.
+
+        al_terminar(resultado) o al_fallar(excepcion) se llaman en el hilo de
+        Tk, sólo si no se envió después otro trabajo con el mismo nombre.
+        """
+        self.cancelar(nombre)
+        generacion = self.generaciones[nombre]
+
+        futuro = self.ejecutor.submit(funcion, *args)
+        self.futuros[nombre] = futuro
+        self._cambiar_pendientes(+1)
+        futuro.add_done_callback(
+            lambda f: self.cola.put((nombre, generacion, f, al_terminar, al_fallar)))
+        if not self.sondeando:
+            self.sondeando = True
+            self._programar()
+        return futuro
+
+    def cancelar(self, nombre):
+        """Deja obsoleto el trabajo `nombre` (si aún no empezó, no se ejecuta)."""
+        self.generaciones[nombre] = self.generaciones.get(nombre, 0) + 1
+        futuro = self.futuros.pop(nombre, None)
+        if futuro is not None:
+            futuro.cancel()
+
+    def ocupado(self):
+        return self.pendientes > 0
+
+    def cerrar(self):
+        self.ejecutor.shutdown(wait=False, cancel_futures=True)
+
+    def _cambiar_pendientes(self, delta):
+        antes = self.pendientes > 0
+        self.pendientes += delta
+        if self.al_cambiar_ocupado is not None and antes != (self.pendientes > 0):
+            self.al_cambiar_ocupado(self.pendientes > 0)
+
+    def _programar(self):
+        self._esperado = time.perf_counter() + self.intervalo_ms / 1000
+        self.raiz.after(self.intervalo_ms, self._sondear)
+
+    def _sondear(self):
+        retraso = (time.perf_counter() - self._esperado) * 1000
+        self.latencia_maxima_ms = max(self.latencia_maxima_ms, retraso)
+
+        while True:
+            try:
+                nombre, generacion, futuro, al_terminar, al_fallar = self.cola.get_nowait()
+            except queue.Empty:
+                break
+            self._cambiar_pendientes(-1)
+            if self.futuros.get(nombre) is futuro:
+                del self.futuros[nombre]
+            if futuro.cancelled() or self.generaciones.get(nombre) != generacion:
+                continue  # trabajo reemplazado por otro más nuevo
+            error = futuro.exception()
+            if error is None:
+                if al_terminar is not None:
+                    al_terminar(futuro.result())
+            elif al_fallar is not None:
+                al_fallar(error)
+
+        if self.pendientes > 0:
+            self._programar()
+        else:
+            self.sondeando = False
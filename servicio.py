@@ -0,0 +1,395 @@
+"""Servicio HTTP/JSON local de presupuestos (asyncio, sin dependencias).
+
+Para el ERP y el configurador web: la tabla de tarifas se carga una vez y
+cada presupuesto sale de memoria con motor.py, el mismo cálculo que la
+ventana. Un solo hilo atiende todas las conexiones (HTTP/1.1 con
+keep-alive); los lotes grandes van a un pool de procesos con las
+fórmulas vectorizadas de lote.py para no bloquear el bucle de eventos.
+Las filas de un lote se validan igual en línea y en el pool.
+
+    python servicio.py --archivo date.ods --puerto 8765 --maquina 60 --operario 25
+    python servicio.py --db tarifas.sqlite --perfil Laser1 --workers 2
+
+Rutas:
+    POST /presupuesto  {"material": "Acero", "espesor": 2, "perimetro": 1200, ...}
+                       -> {columnas de lote.COLUMNAS_RESULTADO} (422 con {"errore": ...})
+    POST /lote         {"trabajos": [{...}, ...], "valores": {...}}
+                       -> {"resultados": [{columnas de lote.COLUMNAS_RESULTADO, "errore"}, ...]}
+    GET  /materiales   -> {material: [espesores]}
+    GET  /salud        -> filas y versión de la tabla
+
+Los campos que falten en una pieza se toman de "valores" (sólo /lote) y
+después de los valores por defecto del servicio (--neto-pack, ... o el
+perfil de la máquina). medir_servicio.py mide presupuestos por segundo y
+latencias contra este servicio.
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import math
+import multiprocessing
+import os
+import signal
+import sys
+
+import numpy as np
+
+import almacen_tarifas
+import lote
+import motor
+import tarifas
+
+PUERTO = 8765
+# Lotes de más trabajos que esto van al pool de procesos (si hay)
+UMBRAL_POOL = 256
+MAX_CUERPO = 64 * 1024 * 1024
+
+_RAZONES = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 422: "Unprocessable Entity", 500: "Internal Server Error"}
+
+# Nombres aceptados para material y espesor (los de la ventana y los de las tablas de lote)
+_ALIAS = {"Material": "material", "Espesor": "espesor"}
+_CAMPOS_NUMERICOS = dict(motor.CAMPOS)
+
+
+def _datos(objeto, valores):
+    """motor.DatosPieza de un objeto JSON; los errores son ErrorPresupuesto con los mensajes de motor."""
+    if not isinstance(objeto, dict):
+        raise motor.ErrorPresupuesto(motor.NUMEROS_INVALIDOS)
+    objeto = {_ALIAS.get(clave, clave): valor for clave, valor in objeto.items()}
+    material = objeto.get("material")
+    espesor = objeto.get("espesor")
+    if not material or motor.es_vacio(espesor):
+        raise motor.ErrorPresupuesto(motor.SIN_MATERIAL)
+    campos = {}
+    for campo, mensaje in _CAMPOS_NUMERICOS.items():
+        valor = objeto.get(campo)
+        if motor.es_vacio(valor):
+            valor = valores.get(campo)
+        if motor.es_vacio(valor):
+            raise motor.ErrorPresupuesto(mensaje)
+        campos[campo] = valor
+    if not motor.es_vacio(objeto.get("tiempo_desplazamiento_horas")):
+        campos["tiempo_desplazamiento_horas"] = objeto["tiempo_desplazamiento_horas"]
+    try:
+        return motor.DatosPieza(material=str(material), espesor=float(espesor),
+                                **{campo: float(valor) for campo, valor in campos.items()})
+    except (TypeError, ValueError):
+        raise motor.ErrorPresupuesto(motor.NUMEROS_INVALIDOS) from None
+
+
+def _sin_nan(valor):
+    # JSON no tiene NaN: las columnas vacías de un lote con error van como null
+    return None if isinstance(valor, float) and math.isnan(valor) else valor
+
+
+# Índice de tarifas de cada proceso del pool: se recibe una sola vez al iniciarlo
+_indice_trabajador = None
+
+
+def _iniciar_trabajador(indice):
+    global _indice_trabajador
+    _indice_trabajador = indice
+
+
+def _fila_lote(datos_o_error, columnas=None, posicion=0):
+    # Mismas claves que lote.calcular_lote: resultado o columnas vacías con el error
+    if isinstance(datos_o_error, str):
+        fila = dict.fromkeys(lote.COLUMNAS_RESULTADO)
+        fila[lote.COLUMNA_ERROR] = datos_o_error
+        return fila
+    return {clave: _sin_nan(columna[posicion]) for clave, columna in columnas.items()}
+
+
+def _validar(objeto, valores):
+    # DatosPieza o el mensaje de error: la misma validación en línea y en el pool
+    try:
+        return _datos(objeto, valores)
+    except motor.ErrorPresupuesto as e:
+        return str(e)
+
+
+def _lote_en_trabajador(trabajos, valores):
+    # Cada fila se valida como en /presupuesto; las válidas van juntas por las fórmulas de lote.py
+    filas = [_validar(objeto, valores) for objeto in trabajos]
+    validas = [datos for datos in filas if not isinstance(datos, str)]
+    columnas = {}
+    if validas:
+        posiciones = lote.posiciones_tarifa(_indice_trabajador, [datos.material for datos in validas],
+                                            [datos.espesor for datos in validas])
+        encontrada = posiciones >= 0
+        arrays = _indice_trabajador.arrays()
+        tarifa = {campo: arrays[campo][np.where(encontrada, posiciones, 0)] for campo in lote.CAMPOS_TARIFA_TABLA}
+        errores = np.where(encontrada, "", motor.SIN_DATOS).astype(object)
+        campos = {campo: np.fromiter((getattr(datos, campo) for datos in validas), float, len(validas))
+                  for campo in motor.DatosPieza._fields[2:]}
+        columnas = {clave: columna.tolist()
+                    for clave, columna in lote.calcular_sobre_tarifas(campos, tarifa, errores).items()}
+    resultados = []
+    posicion = 0
+    for datos in filas:
+        if isinstance(datos, str):
+            resultados.append(_fila_lote(datos))
+        else:
+            resultados.append(_fila_lote(datos, columnas, posicion))
+            posicion += 1
+    return resultados
+
+
+class Servicio:
+    """Estado compartido por las conexiones: índice, valores por defecto y pool."""
+
+    def __init__(self, indice, valores=None, trabajadores=0, umbral_pool=UMBRAL_POOL):
+        self.indice = indice
+        self.valores = dict(valores or {})
+        self.umbral_pool = umbral_pool
+        self.pool = None
+        if trabajadores > 0:
+            # spawn: con fork los procesos (que arrancan con el primer lote grande)
+            # heredarían el socket que escucha y lo retendrían si el servicio muere
+            self.pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=trabajadores, mp_context=multiprocessing.get_context("spawn"),
+                initializer=_iniciar_trabajador, initargs=(indice,))
+        self.atendidas = 0
+
+    def cerrar(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+
+    def presupuesto(self, objeto):
+        # Mismas claves que cada fila de /lote (Presupuesto.como_dict): tiempo_corte_horas
+        # es el tiempo total de máquina en las dos rutas
+        datos = _datos(objeto, self.valores)
+        return motor.calcular_presupuesto(self.indice, datos).como_dict()
+
+    def _fila_lote(self, objeto, valores):
+        datos = _validar(objeto, valores)
+        if isinstance(datos, str):
+            return _fila_lote(datos)
+        try:
+            fila = motor.calcular_presupuesto(self.indice, datos).como_dict()
+        except motor.ErrorPresupuesto as e:
+            return _fila_lote(str(e))
+        fila[lote.COLUMNA_ERROR] = ""
+        return fila
+
+    def lote_requiere_pool(self, cuerpo):
+        return self.pool is not None and len(cuerpo.get("trabajos") or ()) > self.umbral_pool
+
+    def lote(self, cuerpo):
+        valores = dict(self.valores, **(cuerpo.get("valores") or {}))
+        return {"resultados": [self._fila_lote(objeto, valores) for objeto in cuerpo.get("trabajos") or ()]}
+
+    async def lote_en_pool(self, cuerpo):
+        valores = dict(self.valores, **(cuerpo.get("valores") or {}))
+        bucle = asyncio.get_running_loop()
+        resultados = await bucle.run_in_executor(self.pool, _lote_en_trabajador, cuerpo["trabajos"], valores)
+        return {"resultados": resultados}
+
+    def materiales(self):
+        return self.indice.espesores
+
+    def salud(self):
+        return {"filas": len(self.indice), "version": self.indice.version, "atendidas": self.atendidas}
+
+
+def _respuesta(estado, objeto, cerrar=False):
+    cuerpo = json.dumps(objeto, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    cabecera = (f"HTTP/1.1 {estado} {_RAZONES[estado]}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(cuerpo)}\r\n"
+                f"{'Connection: close' if cerrar else 'Connection: keep-alive'}\r\n\r\n")
+    return cabecera.encode("latin-1") + cuerpo
+
+
+class _Conexion(asyncio.Protocol):
+    """HTTP/1.1 mínimo: Content-Length, keep-alive y pedidos encadenados en orden."""
+
+    def __init__(self, servicio):
+        self.servicio = servicio
+        self.transporte = None
+        self.bufer = bytearray()
+        self.pendiente = None  # tarea de un lote en el pool; los pedidos siguientes esperan
+
+    def connection_made(self, transporte):
+        self.transporte = transporte
+
+    def connection_lost(self, error):
+        self.transporte = None
+        if self.pendiente is not None:
+            self.pendiente.cancel()
+
+    def data_received(self, datos):
+        self.bufer += datos
+        self._procesar()
+
+    def _procesar(self):
+        while self.pendiente is None and self.transporte is not None:
+            fin_cabecera = self.bufer.find(b"\r\n\r\n")
+            if fin_cabecera < 0:
+                if len(self.bufer) > 65536:
+                    self._enviar(_respuesta(400, {"errore": "Intestazione troppo lunga"}, cerrar=True), True)
+                return
+            lineas = bytes(self.bufer[:fin_cabecera]).decode("latin-1").split("\r\n")
+            try:
+                metodo, ruta, version = lineas[0].split(" ", 2)
+            except ValueError:
+                self._enviar(_respuesta(400, {"errore": "Richiesta non valida"}, cerrar=True), True)
+                return
+            cabeceras = {}
+            for linea in lineas[1:]:
+                nombre, _, valor = linea.partition(":")
+                cabeceras[nombre.strip().lower()] = valor.strip()
+            try:
+                largo = int(cabeceras.get("content-length", "0"))
+            except ValueError:
+                largo = -1
+            if largo < 0 or largo > MAX_CUERPO:
+                self._enviar(_respuesta(413 if largo > 0 else 400, {"errore": "Content-Length non valido"},
+                                        cerrar=True), True)
+                return
+            inicio_cuerpo = fin_cabecera + 4
+            if len(self.bufer) < inicio_cuerpo + largo:
+                return  # falta parte del cuerpo
+            cuerpo = bytes(self.bufer[inicio_cuerpo:inicio_cuerpo + largo])
+            del self.bufer[:inicio_cuerpo + largo]
+
+            conexion = cabeceras.get("connection", "").lower()
+            cerrar = conexion == "close" or (version == "HTTP/1.0" and conexion != "keep-alive")
+            self._atender(metodo, ruta.split("?", 1)[0], cuerpo, cerrar)
+
+    def _atender(self, metodo, ruta, cuerpo, cerrar):
+        servicio = self.servicio
+        servicio.atendidas += 1
+        try:
+            if ruta in ("/presupuesto", "/lote"):
+                if metodo != "POST":
+                    self._enviar(_respuesta(405, {"errore": "Usa POST"}, cerrar), cerrar)
+                    return
+                try:
+                    objeto = json.loads(cuerpo)
+                except ValueError:
+                    self._enviar(_respuesta(400, {"errore": "JSON non valido"}, cerrar), cerrar)
+                    return
+                if ruta == "/presupuesto":
+                    try:
+                        self._enviar(_respuesta(200, servicio.presupuesto(objeto), cerrar), cerrar)
+                    except motor.ErrorPresupuesto as e:
+                        self._enviar(_respuesta(422, {"errore": str(e)}, cerrar), cerrar)
+                elif not isinstance(objeto, dict) or not isinstance(objeto.get("trabajos", []), list):
+                    self._enviar(_respuesta(400, {"errore": "Serve {\"trabajos\": [...]}"}, cerrar), cerrar)
+                elif not isinstance(objeto.get("valores") or {}, dict):
+                    self._enviar(_respuesta(400, {"errore": "\"valores\" deve essere un oggetto"}, cerrar), cerrar)
+                elif servicio.lote_requiere_pool(objeto):
+                    # El bucle sigue atendiendo otras conexiones mientras el pool calcula
+                    self.transporte.pause_reading()
+                    self.pendiente = asyncio.ensure_future(self._lote_en_pool(objeto, cerrar))
+                else:
+                    self._enviar(_respuesta(200, servicio.lote(objeto), cerrar), cerrar)
+            elif ruta == "/materiales" and metodo == "GET":
+                self._enviar(_respuesta(200, servicio.materiales(), cerrar), cerrar)
+            elif ruta == "/salud" and metodo == "GET":
+                self._enviar(_respuesta(200, servicio.salud(), cerrar), cerrar)
+            else:
+                self._enviar(_respuesta(404, {"errore": f"Percorso sconosciuto: {metodo} {ruta}"}, cerrar), cerrar)
+        except Exception as e:  # un pedido roto no tumba el servicio
+            self._enviar(_respuesta(500, {"errore": str(e)}, cerrar=True), True)
+
+    async def _lote_en_pool(self, objeto, cerrar):
+        try:
+            respuesta = _respuesta(200, await self.servicio.lote_en_pool(objeto), cerrar)
+        except motor.ErrorPresupuesto as e:
+            respuesta = _respuesta(422, {"errore": str(e)}, cerrar)
+        except Exception as e:
+            respuesta, cerrar = _respuesta(500, {"errore": str(e)}, cerrar=True), True
+        self.pendiente = None
+        self._enviar(respuesta, cerrar)
+        if self.transporte is not None:
+            self.transporte.resume_reading()
+            self._procesar()
+
+    def _enviar(self, datos, cerrar):
+        if self.transporte is None:
+            return
+        self.transporte.write(datos)
+        if cerrar:
+            self.transporte.close()
+            self.transporte = None
+
+
+async def servir(servicio, host="127.0.0.1", puerto=PUERTO, listo=None):
+    """Atiende hasta que se cancela la tarea o llega SIGTERM/SIGINT.
+
+    `listo(puerto)` se llama al empezar a escuchar.
+    """
+    bucle = asyncio.get_running_loop()
+    tarea = asyncio.current_task()
+    for senal in (signal.SIGTERM, signal.SIGINT):
+        try:
+            bucle.add_signal_handler(senal, tarea.cancel)
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows: Ctrl+C llega como KeyboardInterrupt
+    servidor = await bucle.create_server(lambda: _Conexion(servicio), host, puerto, reuse_address=True)
+    if listo is not None:
+        listo(servidor.sockets[0].getsockname()[1])
+    async with servidor:
+        try:
+            await servidor.serve_forever()
+        except asyncio.CancelledError:
+            pass
+
+
+def crear_parser():
+    parser = argparse.ArgumentParser(description="Servizio HTTP/JSON locale di preventivi")
+    parser.add_argument("--archivo", default="date.ods", help="tabella delle tariffe .ods/.xlsx (foglio 'date')")
+    parser.add_argument("--db", help="base di tariffe SQLite (invece di --archivo)")
+    parser.add_argument("--perfil", help="macchina della base di tariffe (con --db)")
+    parser.add_argument("--fecha", help="data della tariffa da usare, AAAA-MM-GG (default: oggi)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=PUERTO)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="processi per i lotti grandi (0: tutto nel ciclo di eventi)")
+    parser.add_argument("--umbral-pool", type=int, default=UMBRAL_POOL,
+                        help=f"lavori oltre i quali un lotto va al pool di processi (default {UMBRAL_POOL})")
+    parser.add_argument("--neto-pack", type=float, help="m3 (se manca nella richiesta)")
+    parser.add_argument("--costo-pack", type=float, help="EUR (se manca nella richiesta)")
+    parser.add_argument("--maquina", type=float, help="EUR/h (se manca nella richiesta)")
+    parser.add_argument("--operario", type=float, help="EUR (se manca nella richiesta)")
+    return parser
+
+
+def main(argv=None):
+    args = crear_parser().parse_args(argv)
+    valores = {campo: valor for campo, valor in (
+        ("neto_pack", args.neto_pack), ("costo_pack", args.costo_pack),
+        ("costo_maquina", args.maquina), ("costo_operario", args.operario)) if valor is not None}
+    try:
+        if args.db:
+            if not args.perfil:
+                raise motor.ErrorPresupuesto("--db richiede --perfil (la macchina)")
+            almacen = almacen_tarifas.AlmacenTarifas(args.db)
+            indice = almacen.vista(args.perfil, args.fecha).indice()
+            valores = dict(almacen.perfil(args.perfil), **valores)
+        else:
+            indice = tarifas.indice_tarifas(args.archivo)
+    except motor.ErrorPresupuesto as e:
+        print(f"Errore: {e}", file=sys.stderr)
+        return 2
+
+    servicio = Servicio(indice, valores, args.workers, args.umbral_pool)
+
+    def listo(puerto):
+        print(f"In ascolto su http://{args.host}:{puerto} ({len(indice)} righe di tariffe)", file=sys.stderr, flush=True)
+
+    try:
+        asyncio.run(servir(servicio, args.host, args.puerto, listo))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servicio.cerrar()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
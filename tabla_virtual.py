@@ -0,0 +1,394 @@
+"""Tabla de resultados virtual para lotes grandes.
+
+Un ttk.Treeview con cien mil filas tarda en llenarse y guarda todos los
+textos ya formateados. Aquí los resultados quedan en arrays de NumPy
+(ResultadosLote) y el Treeview tiene sólo las filas que caben en pantalla:
+al desplazarse se reescriben esas filas con los valores de la ventana
+visible, formateados en el momento.
+
+Ordenar (clic en el encabezado) y filtrar trabajan sobre los arrays: el
+orden es una permutación de índices y el filtro una máscara booleana, y la
+vista es la permutación restringida a la máscara.
+
+    modelo = ResultadosLote.desde_lote(trabajos, lote.calcular_lote(indice, trabajos))
+    tabla = TablaVirtual(ventana)
+    tabla.mostrar(modelo)
+
+NumPy y pandas se importan al construir el modelo, no al importar el
+módulo: app.py lo importa al arrancar.
+"""
+import collections
+import re
+import tkinter as tk
+from tkinter import ttk
+
+# clave: nombre de la columna (las de lote.calcular_lote); formato: None para texto
+Columna = collections.namedtuple("Columna", "clave titulo formato ancho")
+
+COLUMNAS_LOTE = (
+    Columna("Material", "Materiale", None, 120),
+    Columna("Espesor", "Spessore", "{:g}", 70),
+    Columna("costo_gas", "Costo Gas", "{:.2f} EUR", 90),
+    Columna("costo_maquina", "Costo Maquina", "{:.2f} EUR", 90),
+    Columna("costo_peso", "Costo Peso", "{:.2f} EUR", 90),
+    Columna("total", "Total", "{:.2f} EUR", 90),
+    Columna("cantidad_gas_dict", "Cantidad Gas", "{:.4f} m³", 90),
+    Columna("tiempo_corte_horas", "Tiempo Corte (Horas)", "{:.4f} h", 90),
+    Columna("Costo_operario", "Costo Operario", "{:.2f} EUR/h", 90),
+    Columna("errore", "Errore", None, 250),
+)
+
+# Una pieza en todos los materiales y espesores (comparacion.py)
+COLUMNAS_COMPARACION = (
+    Columna("puesto", "#", "{:.0f}", 50),
+    Columna("Material", "Materiale", None, 120),
+    Columna("Espesor", "Spessore", "{:g}", 70),
+    Columna("tiempo_corte_horas", "Tiempo Corte (Horas)", "{:.4f} h", 110),
+    Columna("cantidad_gas_dict", "Cantidad Gas", "{:.4f} m³", 90),
+    Columna("costo_gas", "Costo Gas", "{:.2f} EUR", 90),
+    Columna("costo_maquina", "Costo Maquina", "{:.2f} EUR", 90),
+    Columna("costo_peso", "Costo Peso", "{:.2f} EUR", 90),
+    Columna("total", "Total", "{:.2f} EUR", 90),
+    Columna("nota", "Nota", None, 170),
+    Columna("errore", "Errore", None, 250),
+)
+
+# Colores de las filas resaltadas (ResultadosLote.resaltadas)
+COLORES_RESALTADO = {"economica": "#c8e6c9", "rapida": "#bbdefb"}
+
+# Filtro de columnas numéricas: ">100", "<= 5", "=12.5", "10..20" o un número
+_COMPARACION = re.compile(r"^\s*(>=|<=|>|<|=)?\s*([-+]?[\d.,]+(?:e[-+]?\d+)?)\s*$", re.IGNORECASE)
+_RANGO = re.compile(r"^\s*([-+]?[\d.,]+)\s*\.\.\s*([-+]?[\d.,]+)\s*$")
+
+
+def _decimales(formato):
+    coincidencia = re.search(r"\.(\d+)f", formato)
+    return int(coincidencia.group(1)) if coincidencia else None
+
+
+def _numero_filtro(texto):
+    return float(texto.replace(",", "."))
+
+
+def _codificar(valores):
+    # (valores únicos ordenados, código de cada fila); vacíos y NaN son ""
+    import numpy as np
+    import pandas as pd
+
+    textos = pd.Series(valores, dtype=object)
+    textos = textos.where(textos.notna(), "")
+    if pd.api.types.infer_dtype(textos, skipna=False) not in ("string", "empty"):
+        textos = textos.astype(str)
+    codigos, unicos = pd.factorize(textos, sort=True)
+    return np.asarray(unicos, dtype=object), codigos.astype(np.int32)
+
+
+class ResultadosLote:
+    """Resultados de un lote en arrays, con orden y filtro.
+
+    Las columnas de texto se guardan como códigos sobre sus valores únicos
+    ordenados: ordenar es ordenar enteros y filtrar por texto mira sólo los
+    valores distintos.
+    """
+
+    def __init__(self, columnas, datos):
+        import numpy as np
+
+        self.columnas = tuple(columnas)
+        self._numeros = {}
+        self._textos = {}  # clave -> (valores únicos, códigos)
+        n = None
+        for columna in self.columnas:
+            valores = datos[columna.clave]
+            if columna.formato is None:
+                unicos, codigos = _codificar(valores)
+                self._textos[columna.clave] = (unicos, codigos)
+                largo = len(codigos)
+            else:
+                self._numeros[columna.clave] = np.asarray(valores, dtype=float)
+                largo = len(self._numeros[columna.clave])
+            n = largo if n is None else n
+            if largo != n:
+                raise ValueError(f"La colonna {columna.clave} ha {largo} righe invece di {n}")
+        self.total_filas = n or 0
+        # Fila original -> etiqueta de resaltado (COLORES_RESALTADO), siga donde siga en la vista
+        self.resaltadas = {}
+        self._orden = np.arange(self.total_filas)
+        self._mascara = None
+        self.vista = self._orden
+        self.orden_actual = None  # (clave, descendente)
+
+    @classmethod
+    def desde_lote(cls, trabajos, resultados, columnas=COLUMNAS_LOTE):
+        """Modelo con la entrada (`trabajos`) y la salida de lote.calcular_lote."""
+        import pandas as pd
+
+        datos = {}
+        for columna in columnas:
+            origen = resultados if columna.clave in resultados else trabajos
+            if columna.formato is None:
+                datos[columna.clave] = origen[columna.clave].to_numpy(dtype=object)
+            else:
+                datos[columna.clave] = pd.to_numeric(origen[columna.clave], errors="coerce").to_numpy(dtype=float)
+        return cls(columnas, datos)
+
+    def __len__(self):
+        return len(self.vista)
+
+    def _columna(self, clave):
+        for columna in self.columnas:
+            if columna.clave == clave:
+                return columna
+        raise KeyError(clave)
+
+    def etiqueta(self, posicion):
+        """Etiqueta de resaltado de la fila `posicion` de la vista, o ""."""
+        return self.resaltadas.get(int(self.vista[posicion]), "") if self.resaltadas else ""
+
+    def fila(self, posicion):
+        """Textos de la fila `posicion` de la vista (formateados ahora)."""
+        i = self.vista[posicion]
+        textos = []
+        for columna in self.columnas:
+            if columna.formato is None:
+                unicos, codigos = self._textos[columna.clave]
+                textos.append(unicos[codigos[i]])
+            else:
+                valor = self._numeros[columna.clave][i]
+                textos.append("" if valor != valor else columna.formato.format(valor))
+        return textos
+
+    def filas_crudas(self):
+        """Filas de la vista, en su orden, con los valores sin formatear (para los informes)."""
+        vista = self.vista
+        columnas = []
+        for columna in self.columnas:
+            if columna.formato is None:
+                unicos, codigos = self._textos[columna.clave]
+                columnas.append(unicos[codigos[vista]].tolist())
+            else:
+                columnas.append(self._numeros[columna.clave][vista].tolist())
+        return zip(*columnas)
+
+    def ordenar(self, clave, descendente=False):
+        """Ordena por la columna `clave` (estable; los vacíos quedan al final)."""
+        import numpy as np
+
+        if clave in self._textos:
+            unicos, codigos = self._textos[clave]
+            valores = codigos
+            if descendente:
+                valores = -codigos
+            if unicos.size and unicos[0] == "":
+                # El código 0 es el texto vacío: al final en los dos sentidos
+                valores = np.where(codigos == 0, np.iinfo(np.int32).max, valores)
+        else:
+            self._columna(clave)
+            valores = self._numeros[clave]
+            if descendente:
+                valores = -valores  # NaN sigue siendo NaN: argsort lo deja al final
+        self._orden = np.argsort(valores, kind="stable")
+        self.orden_actual = (clave, descendente)
+        self._aplicar()
+
+    def filtrar(self, clave=None, texto=""):
+        """Deja en la vista las filas cuyo valor en `clave` cumple `texto`.
+
+        Texto vacío (o clave None) quita el filtro. En las columnas de texto
+        es una búsqueda sin distinguir mayúsculas; en las numéricas,
+        ">100", "<=5", "=12.5", "10..20" o un número (igual al valor mostrado).
+        Un filtro numérico mal escrito da ValueError y no cambia la vista.
+        """
+        import numpy as np
+
+        if clave is None or not texto.strip():
+            self._mascara = None
+        elif clave in self._textos:
+            unicos, codigos = self._textos[clave]
+            buscado = texto.strip().lower()
+            coinciden = np.fromiter((buscado in valor.lower() for valor in unicos), dtype=bool, count=len(unicos))
+            self._mascara = coinciden[codigos]
+        else:
+            self._mascara = self._condicion(self._columna(clave), texto)
+        self._aplicar()
+
+    def _condicion(self, columna, texto):
+        import numpy as np
+
+        valores = self._numeros[columna.clave]
+        rango = _RANGO.match(texto)
+        if rango:
+            minimo, maximo = sorted(_numero_filtro(parte) for parte in rango.groups())
+            return (valores >= minimo) & (valores <= maximo)
+        comparacion = _COMPARACION.match(texto)
+        if not comparacion:
+            raise ValueError(f"Filtro non valido: {texto}")
+        operador, numero = comparacion.group(1) or "=", _numero_filtro(comparacion.group(2))
+        with np.errstate(invalid="ignore"):
+            if operador == ">":
+                return valores > numero
+            if operador == ">=":
+                return valores >= numero
+            if operador == "<":
+                return valores < numero
+            if operador == "<=":
+                return valores <= numero
+        decimales = _decimales(columna.formato)
+        if decimales is None:
+            return valores == numero
+        return np.round(valores, decimales) == round(numero, decimales)
+
+    def _aplicar(self):
+        if self._mascara is None:
+            self.vista = self._orden
+        else:
+            self.vista = self._orden[self._mascara[self._orden]]
+
+
+class TablaVirtual(ttk.Frame):
+    """Treeview con `filas_visibles` filas fijas que muestran una ventana de un ResultadosLote."""
+
+    RETARDO_FILTRO_MS = 200
+
+    def __init__(self, padre, columnas=COLUMNAS_LOTE, filas_visibles=20, **opciones):
+        super().__init__(padre, **opciones)
+        self.columnas = tuple(columnas)
+        self.filas_visibles = filas_visibles
+        self.modelo = None
+        self.primera = 0
+        self._pintado_pendiente = False
+        self._filtro_pendiente = None
+
+        barra = ttk.Frame(self)
+        barra.pack(fill="x", pady=(0, 4))
+        ttk.Label(barra, text="Filtra:").pack(side="left")
+        self.columna_filtro = ttk.Combobox(barra, state="readonly", width=18,
+                                           values=[columna.titulo for columna in self.columnas])
+        self.columna_filtro.current(0)
+        self.columna_filtro.pack(side="left", padx=4)
+        self.texto_filtro = tk.StringVar()
+        self.entrada_filtro = tk.Entry(barra, textvariable=self.texto_filtro, width=24)
+        self.entrada_filtro.pack(side="left", padx=4)
+        self.estado = tk.StringVar(value="")
+        ttk.Label(barra, textvariable=self.estado).pack(side="right")
+        self.columna_filtro.bind("<<ComboboxSelected>>", self._programar_filtro)
+        self.entrada_filtro.bind("<KeyRelease>", self._programar_filtro)
+
+        cuerpo = ttk.Frame(self)
+        cuerpo.pack(fill="both", expand=True)
+        claves = [columna.clave for columna in self.columnas]
+        self.arbol = ttk.Treeview(cuerpo, columns=claves, show="headings",
+                                  height=filas_visibles, selectmode="browse")
+        for columna in self.columnas:
+            self.arbol.heading(columna.clave, text=columna.titulo,
+                               command=lambda clave=columna.clave: self.ordenar_por(clave))
+            self.arbol.column(columna.clave, width=columna.ancho, stretch=False,
+                              anchor="w" if columna.formato is None else "e")
+        for etiqueta, color in COLORES_RESALTADO.items():
+            self.arbol.tag_configure(etiqueta, background=color)
+        # Las filas del Treeview son siempre las mismas; sólo cambian sus valores
+        self.items = [self.arbol.insert("", "end", values=()) for _ in range(filas_visibles)]
+
+        self.barra_vertical = ttk.Scrollbar(cuerpo, orient="vertical", command=self._desplazar)
+        barra_horizontal = ttk.Scrollbar(self, orient="horizontal", command=self.arbol.xview)
+        self.arbol.configure(xscrollcommand=barra_horizontal.set)
+        self.arbol.pack(side="left", fill="both", expand=True)
+        self.barra_vertical.pack(side="right", fill="y")
+        barra_horizontal.pack(fill="x")
+
+        for secuencia, paso in (("<Button-4>", -3), ("<Button-5>", 3)):  # rueda en X11
+            self.arbol.bind(secuencia, lambda event, paso=paso: self._mover(paso))
+        self.arbol.bind("<MouseWheel>", lambda event: self._mover(-3 if event.delta > 0 else 3))
+        self.arbol.bind("<Prior>", lambda event: self._mover(-self.filas_visibles))
+        self.arbol.bind("<Next>", lambda event: self._mover(self.filas_visibles))
+        self.arbol.bind("<Home>", lambda event: self._ir_a(0))
+        self.arbol.bind("<End>", lambda event: self._ir_a(len(self.modelo or ())))
+        self.arbol.bind("<Up>", lambda event: self._flecha(-1))
+        self.arbol.bind("<Down>", lambda event: self._flecha(1))
+
+    def mostrar(self, modelo):
+        """Muestra otro ResultadosLote desde el principio, con el filtro escrito."""
+        self.modelo = modelo
+        self.primera = 0
+        self._filtrar()
+
+    def ordenar_por(self, clave):
+        if self.modelo is None:
+            return
+        # Segundo clic en la misma columna: orden inverso
+        descendente = self.modelo.orden_actual == (clave, False)
+        self.modelo.ordenar(clave, descendente)
+        for columna in self.columnas:
+            flecha = ""
+            if columna.clave == clave:
+                flecha = " ▼" if descendente else " ▲"
+            self.arbol.heading(columna.clave, text=columna.titulo + flecha)
+        self._ir_a(0)
+
+    def _programar_filtro(self, event=None):
+        # Esperar a que el usuario deje de escribir
+        if self._filtro_pendiente is not None:
+            self.after_cancel(self._filtro_pendiente)
+        self._filtro_pendiente = self.after(self.RETARDO_FILTRO_MS, self._filtrar)
+
+    def _filtrar(self):
+        self._filtro_pendiente = None
+        if self.modelo is None:
+            return
+        columna = self.columnas[self.columna_filtro.current()]
+        try:
+            self.modelo.filtrar(columna.clave, self.texto_filtro.get())
+        except ValueError:
+            self.entrada_filtro.configure(foreground="#b00020")
+            return
+        self.entrada_filtro.configure(foreground="black")
+        self._ir_a(0)
+
+    def _flecha(self, paso):
+        # Flechas en el borde de la ventana visible: desplazar en vez de salir
+        seleccion = self.arbol.selection()
+        posicion = self.items.index(seleccion[0]) if seleccion else 0
+        if 0 <= posicion + paso < self.filas_visibles:
+            return None
+        self._mover(paso)
+        return "break"
+
+    def _desplazar(self, accion, cantidad, unidad=None):
+        # Protocolo del comando de ttk.Scrollbar
+        if self.modelo is None:
+            return
+        if accion == "moveto":
+            self._ir_a(int(float(cantidad) * len(self.modelo)))
+        elif accion == "scroll":
+            paso = int(cantidad) * (self.filas_visibles if unidad == "pages" else 1)
+            self._mover(paso)
+
+    def _mover(self, filas):
+        self._ir_a(self.primera + filas)
+        return "break"
+
+    def _ir_a(self, primera):
+        total = len(self.modelo) if self.modelo is not None else 0
+        self.primera = max(0, min(primera, total - self.filas_visibles))
+        # Varios eventos de rueda seguidos se pintan una sola vez
+        if not self._pintado_pendiente:
+            self._pintado_pendiente = True
+            self.after_idle(self._pintar)
+
+    def _pintar(self):
+        self._pintado_pendiente = False
+        modelo = self.modelo
+        total = len(modelo) if modelo is not None else 0
+        for desplazamiento, item in enumerate(self.items):
+            posicion = self.primera + desplazamiento
+            if posicion < total:
+                etiqueta = modelo.etiqueta(posicion)
+                self.arbol.item(item, values=modelo.fila(posicion), tags=(etiqueta,) if etiqueta else ())
+            else:
+                self.arbol.item(item, values=(), tags=())
+        if total:
+            self.barra_vertical.set(self.primera / total, min(1.0, (self.primera + self.filas_visibles) / total))
+            self.estado.set(f"{total:,} di {modelo.total_filas:,} righe".replace(",", "."))
+        else:
+            self.barra_vertical.set(0, 1)
+            self.estado.set(f"0 di {modelo.total_filas:,} righe".replace(",", ".") if modelo is not None else "")
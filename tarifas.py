@@ -0,0 +1,343 @@
+import hashlib
+import math
+import os
+import threading
+from typing import NamedTuple
+
+import instrumentacion
+
+# NumPy, pandas y los lectores (lector_ods, instantanea) se importan al leer
+# la primera tabla, no al importar este módulo: las ventanas lo importan antes
+# de mostrarse y la lectura ocurre después, en segundo plano.
+
+# Nombre de la hoja con la tabla de tarifas
+HOJA = "date"
+
+# Cache en memoria: ruta absoluta ->
+#     [(mtime, tamaño), {columna: array}, IndiceTarifas, DataFrame]
+# El índice y el DataFrame se construyen sólo si alguien los pide.
+_cache = {}
+
+# Las lecturas pueden venir de hilos en segundo plano: una sola a la vez
+_candado = threading.RLock()
+
+# Contadores para comprobar cuántas veces se parsea realmente el archivo
+estadisticas = {"aciertos": 0, "fallos": 0}
+
+
+def _leer_excel(archivo):
+    # Columnas de la hoja HOJA: lector en streaming para ODS, pandas para Excel
+    if archivo.endswith(".ods"):
+        import lector_ods
+        return lector_ods.leer_columnas(archivo, HOJA)
+    import pandas as pd
+    return {c: s.to_numpy() for c, s in pd.read_excel(archivo, sheet_name=HOJA).items()}
+
+
+def _leer_hoja(ruta):
+    # Primero la instantánea binaria; si falta o el archivo cambió, parsear y regenerarla
+    import instantanea
+
+    if not instantanea.activada():
+        with instrumentacion.tramo("carga/parseo"):
+            return _leer_excel(ruta)
+
+    with instrumentacion.tramo("carga/instantanea"):
+        sha = instantanea.huella(ruta)
+        columnas = instantanea.leer_hoja(ruta, sha)
+    if columnas is None:
+        with instrumentacion.tramo("carga/parseo"):
+            columnas = _leer_excel(ruta)
+        try:
+            with instrumentacion.tramo("carga/guardar_instantanea"):
+                instantanea.guardar(ruta, columnas, sha)
+        except OSError:
+            pass  # carpeta de sólo lectura: se sigue sin instantánea
+    return columnas
+
+
+class FilaTarifa:
+    """Valores de una fila de la tabla que usa el cálculo de presupuestos."""
+
+    __slots__ = ("material", "espesor", "cw", "tiempo_1", "tiempo_2", "duracion", "costo")
+
+    def __init__(self, material, espesor, cw, tiempo_1, tiempo_2, duracion, costo):
+        self.material = material
+        self.espesor = espesor
+        self.cw = cw                # columna 'CW ' (mm/h)
+        self.tiempo_1 = tiempo_1    # columna 1 (h por agujero)
+        self.tiempo_2 = tiempo_2    # columna 2 (h por agujero)
+        self.duracion = duracion    # columna 'Duracion' (duración del pack)
+        self.costo = costo          # columna 'Costo' (EUR/m²)
+
+    def como_dict(self):
+        """Fila con los nombres de columna de la hoja 'date'."""
+        return {
+            "Material": self.material,
+            "Espesor": self.espesor,
+            "CW ": self.cw,
+            1: self.tiempo_1,
+            2: self.tiempo_2,
+            "Duracion": self.duracion,
+            "Costo": self.costo,
+        }
+
+    def valores(self):
+        return tuple(getattr(self, campo) for campo in self.__slots__)
+
+    def igual(self, otra):
+        """Mismos valores que `otra` (dos celdas vacías, NaN, cuentan como iguales)."""
+        return all(a == b or (a != a and b != b) for a, b in zip(self.valores(), otra.valores()))
+
+    def __repr__(self):
+        return f"FilaTarifa({self.material!r}, {self.espesor!r})"
+
+
+class Cambios(NamedTuple):
+    """Diferencias por clave (material, espesor) entre dos versiones de la tabla."""
+    agregadas: list
+    eliminadas: list
+    modificadas: list
+
+    def __bool__(self):
+        return bool(self.agregadas or self.eliminadas or self.modificadas)
+
+    def materiales(self):
+        """Materiales con alguna fila agregada, eliminada o modificada."""
+        return {material for material, _ in self.agregadas + self.eliminadas + self.modificadas}
+
+    def cambian_espesores(self):
+        """Materiales cuya lista de espesores cambió."""
+        return {material for material, _ in self.agregadas + self.eliminadas}
+
+
+class IndiceTarifas:
+    """Índice (material, espesor) -> FilaTarifa construido una vez por archivo.
+
+    `espesores` guarda la lista ordenada de espesores de cada material y
+    `materiales` los materiales en el orden en que aparecen en la hoja.
+    Si una clave se repite vale la primera fila, como en la búsqueda original.
+    """
+
+    def __init__(self, filas):
+        self.filas = {}
+        self.espesores = {}
+        for fila in filas:
+            clave = (fila.material, fila.espesor)
+            if clave not in self.filas:
+                self.filas[clave] = fila
+                self.espesores.setdefault(fila.material, []).append(fila.espesor)
+        for lista in self.espesores.values():
+            lista.sort()
+        self.materiales = list(self.espesores)
+        self._arrays = None
+        self._claves = None
+        self._version = None
+
+    def __len__(self):
+        return len(self.filas)
+
+    def buscar(self, material, espesor):
+        return self.filas.get((material, float(espesor)))
+
+    @property
+    def version(self):
+        """Huella del contenido (sha256): cambia si cambia cualquier valor de la tabla.
+
+        No depende del orden de las filas ni del archivo de origen.
+        """
+        if self._version is None:
+            sha = hashlib.sha256()
+            for clave in sorted(self.filas):
+                sha.update(repr(self.filas[clave].valores()).encode("utf-8"))
+            self._version = sha.hexdigest()
+        return self._version
+
+    def arrays(self):
+        """Columnas del índice como arrays NumPy, en el orden de `filas`.
+
+        Se calculan una vez y sirven para los cálculos vectorizados (lotes).
+        """
+        if self._arrays is None:
+            import numpy as np
+
+            filas = list(self.filas.values())
+            n = len(filas)
+            self._arrays = {
+                "material": np.array([f.material for f in filas], dtype=object),
+                "espesor": np.fromiter((f.espesor for f in filas), float, n),
+                "cw": np.fromiter((f.cw for f in filas), float, n),
+                "tiempo_1": np.fromiter((f.tiempo_1 for f in filas), float, n),
+                "tiempo_2": np.fromiter((f.tiempo_2 for f in filas), float, n),
+                "duracion": np.fromiter((f.duracion for f in filas), float, n),
+                "costo": np.fromiter((f.costo for f in filas), float, n),
+            }
+        return self._arrays
+
+    def claves(self):
+        """MultiIndex (material, espesor) alineado con arrays(), para buscar por lotes.
+
+        Como arrays(), se construye una vez; actualizado() devuelve un índice
+        nuevo, así que nunca queda desfasado respecto de `filas`.
+        """
+        if self._claves is None:
+            import pandas as pd
+
+            arrays = self.arrays()
+            self._claves = pd.MultiIndex.from_arrays([arrays["material"], arrays["espesor"]])
+        return self._claves
+
+    def actualizado(self, filas):
+        """Nuevo índice con el contenido de `filas` y las diferencias con éste.
+
+        Las filas que no cambiaron se reutilizan y sólo se rehacen las listas
+        de espesores de los materiales afectados. Este índice no se modifica:
+        quien lo esté usando sigue viendo la versión anterior completa hasta
+        que se reemplace la referencia por el índice nuevo.
+        """
+        nuevas = {}
+        for fila in filas:
+            nuevas.setdefault((fila.material, fila.espesor), fila)
+
+        cambios = Cambios(
+            agregadas=[clave for clave in nuevas if clave not in self.filas],
+            eliminadas=[clave for clave in self.filas if clave not in nuevas],
+            modificadas=[clave for clave, fila in nuevas.items()
+                         if clave in self.filas and not self.filas[clave].igual(fila)],
+        )
+        if not cambios:
+            return self, cambios
+
+        indice = IndiceTarifas(())
+        indice.filas = dict(self.filas)
+        for clave in cambios.eliminadas:
+            del indice.filas[clave]
+        for clave in cambios.agregadas + cambios.modificadas:
+            indice.filas[clave] = nuevas[clave]
+
+        indice.espesores = dict(self.espesores)
+        for material in cambios.cambian_espesores():
+            lista = sorted(espesor for m, espesor in nuevas if m == material)
+            if lista:
+                indice.espesores[material] = lista
+            else:
+                del indice.espesores[material]
+        indice.materiales = [m for m in self.materiales if m in indice.espesores]
+        indice.materiales += [m for m in indice.espesores if m not in self.espesores]
+        return indice, cambios
+
+    @classmethod
+    def desde_columnas(cls, columnas):
+        return cls(filas_desde_columnas(columnas))
+
+    @classmethod
+    def desde_dataframe(cls, df):
+        return cls(filas_desde_columnas({c: df[c].to_numpy() for c in df.columns}))
+
+
+def _numero(valor):
+    # Celda no numérica ("n/d", texto) -> NaN, como pd.to_numeric(errors="coerce"):
+    # el error aparece al presupuestar esa fila, no al cargar la tabla
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def filas_desde_columnas(hoja):
+    """FilaTarifa de cada fila con material y espesor, en el orden de la hoja.
+
+    `hoja` es {columna: valores}, como la devuelve leer_columnas.
+    """
+    # Una sola pasada sobre las columnas, sin máscaras ni to_dict
+    columnas = [hoja[c] for c in ("Material", "Espesor", "CW ", 1, 2, "Duracion", "Costo")]
+    for material, espesor, cw, t1, t2, duracion, costo in zip(*columnas):
+        if not isinstance(material, str):
+            continue
+        espesor = _numero(espesor)
+        if espesor == espesor:
+            yield FilaTarifa(material, espesor, _numero(cw), _numero(t1), _numero(t2), _numero(duracion), _numero(costo))
+
+
+def firma(archivo):
+    """(mtime, tamaño) del archivo: cambia cada vez que se guarda."""
+    info = os.stat(archivo)
+    return (info.st_mtime_ns, info.st_size)
+
+
+def _entrada(archivo):
+    ruta = os.path.abspath(archivo)
+    with _candado:
+        firma_actual = firma(ruta)
+
+        entrada = _cache.get(ruta)
+        if entrada is not None and entrada[0] == firma_actual:
+            estadisticas["aciertos"] += 1
+            return entrada
+
+        estadisticas["fallos"] += 1
+        entrada = [firma_actual, _leer_hoja(ruta), None, None]
+        _cache[ruta] = entrada
+        return entrada
+
+
+def leer_columnas(archivo):
+    """La hoja de tarifas como {columna: array}, parseando el archivo sólo si cambió.
+
+    La clave es la ruta, la fecha de modificación y el tamaño del archivo.
+    Los arrays son compartidos: no se deben modificar en el lugar.
+    """
+    return _entrada(archivo)[1]
+
+
+def leer_tarifas(archivo):
+    """La hoja de tarifas como DataFrame (compartido, igual que leer_columnas)."""
+    entrada = _entrada(archivo)
+    with _candado:
+        if entrada[3] is None:
+            import pandas as pd
+            entrada[3] = pd.DataFrame(entrada[1])
+        return entrada[3]
+
+
+def indice_tarifas(archivo):
+    """IndiceTarifas de la hoja, construido junto con la lectura cacheada."""
+    entrada = _entrada(archivo)
+    with _candado:
+        if entrada[2] is None:
+            with instrumentacion.tramo("carga/indice"):
+                entrada[2] = IndiceTarifas.desde_columnas(entrada[1])
+        return entrada[2]
+
+
+def recargar_indice(archivo, indice_actual):
+    """(índice, cambios) de la versión actual del archivo respecto a indice_actual.
+
+    Si el archivo no cambió devuelve el mismo índice y cambios vacíos; si
+    cambió, el índice nuevo reutiliza las filas sin cambios (ver
+    IndiceTarifas.actualizado) y queda en el cache para las lecturas siguientes.
+    """
+    entrada = _entrada(archivo)
+    with _candado:
+        if indice_actual is None:
+            if entrada[2] is None:
+                entrada[2] = IndiceTarifas.desde_columnas(entrada[1])
+            return entrada[2], Cambios(list(entrada[2].filas), [], [])
+        if entrada[2] is indice_actual:
+            return indice_actual, Cambios([], [], [])
+
+        filas = entrada[2].filas.values() if entrada[2] is not None else filas_desde_columnas(entrada[1])
+        with instrumentacion.tramo("carga/diferencias"):
+            entrada[2], cambios = indice_actual.actualizado(filas)
+        return entrada[2], cambios
+
+
+def estadisticas_cache():
+    """Copia de los contadores de aciertos/fallos del cache."""
+    return dict(estadisticas, entradas=len(_cache))
+
+
+def limpiar_cache():
+    _cache.clear()
+    estadisticas["aciertos"] = 0
+    estadisticas["fallos"] = 0
@@ -0,0 +1,102 @@
+import random
+
+import pandas as pd
+import pytest
+
+import anidado
+import motor
+import tarifas
+
+
+def _piezas(cantidad, semilla=0):
+    generador = random.Random(semilla)
+    return [(i, float(generador.randint(50, 700)), float(generador.randint(50, 1200)), generador.random() < 0.7)
+            for i in range(cantidad)]
+
+
+def _comprobar(resultado, piezas, ancho_hoja, largo_hoja, separacion):
+    medidas = {fila: (ancho, largo) for fila, ancho, largo, _ in piezas}
+    # Cada pieza queda colocada una vez o fuera
+    assert sorted([c.fila for c in resultado.colocaciones] + resultado.fuera) == sorted(medidas)
+    for c in resultado.colocaciones:
+        assert 0 <= c.hoja < resultado.hojas
+        # Medidas de la pieza, giradas o no
+        assert (c.ancho, c.largo) == (medidas[c.fila][::-1] if c.rotada else medidas[c.fila])
+        assert c.x >= separacion - 1e-6 and c.y >= separacion - 1e-6
+        assert c.x + c.ancho <= ancho_hoja - separacion + 1e-6
+        assert c.y + c.largo <= largo_hoja - separacion + 1e-6
+    for i, a in enumerate(resultado.colocaciones):
+        for b in resultado.colocaciones[i + 1:]:
+            if a.hoja != b.hoja:
+                continue
+            # Rectángulos separados al menos `separacion` en x o en y
+            separados = (a.x + a.ancho + separacion <= b.x + 1e-6 or b.x + b.ancho + separacion <= a.x + 1e-6
+                         or a.y + a.largo + separacion <= b.y + 1e-6 or b.y + b.largo + separacion <= a.y + 1e-6)
+            assert separados, (a, b)
+
+
+@pytest.mark.parametrize("orden", sorted(anidado.ORDENES))
+@pytest.mark.parametrize("separacion", [0.0, 5.0])
+def test_sin_solapes(orden, separacion):
+    piezas = _piezas(120, semilla=len(orden))
+    resultado = anidado.anidar(piezas, 1500.0, 3000.0, separacion, orden)
+    assert resultado.fuera == []
+    assert resultado.hojas >= 1
+    _comprobar(resultado, piezas, 1500.0, 3000.0, separacion)
+
+
+def test_piezas_iguales_llenan_la_chapa():
+    piezas = [(i, 500.0, 1000.0, False) for i in range(9)]
+    resultado = anidado.anidar(piezas, 1500.0, 3000.0)
+    assert resultado.hojas == 1
+    _comprobar(resultado, piezas, 1500.0, 3000.0, 0.0)
+
+
+def test_pieza_que_no_entra():
+    piezas = [(0, 2000.0, 4000.0, True), (1, 100.0, 100.0, True)]
+    resultado = anidado.anidar(piezas, 1500.0, 3000.0)
+    assert resultado.fuera == [0]
+    assert [c.fila for c in resultado.colocaciones] == [1]
+
+
+def test_rotacion_para_entrar():
+    piezas = [(0, 2500.0, 1000.0, True)]
+    resultado = anidado.anidar(piezas, 1500.0, 3000.0)
+    assert resultado.colocaciones[0].rotada
+    assert anidado.anidar([(0, 2500.0, 1000.0, False)], 1500.0, 3000.0).fuera == [0]
+
+
+def test_sin_piezas():
+    resultado = anidado.anidar([], 1500.0, 3000.0)
+    assert resultado == anidado.Anidado("area", 0, [], [], 0.0)
+    assert anidado.anidar_grupos({}) == {}
+
+
+def test_mejor_orden_entre_grupos():
+    piezas = _piezas(40)
+    mejores = anidado.anidar_grupos({"a": (piezas, 1500.0, 3000.0)})
+    hojas = min(anidado.anidar(piezas, 1500.0, 3000.0, orden=orden).hojas for orden in anidado.ORDENES)
+    assert mejores["a"].hojas == hojas
+
+
+def _indice():
+    return tarifas.IndiceTarifas([tarifas.FilaTarifa("Acero", 2.0, 1000.0, 0.01, 0.02, 10.0, 20.0)])
+
+
+def test_lote_sin_trabajos():
+    trabajos = pd.DataFrame({"Material": [], "Espesor": [], "ancho": [], "largo": []})
+    filas, grupos = anidado.anidar_lote(_indice(), trabajos)
+    assert filas.empty and grupos == []
+
+
+def test_lote_errores_por_fila():
+    trabajos = pd.DataFrame({
+        "Material": ["Acero", "Nope", "Acero", "Acero"],
+        "Espesor": [2.0, 2.0, 2.0, 2.0],
+        "ancho": [100.0, 100.0, -1.0, 5000.0],
+        "largo": [200.0, 200.0, 200.0, 5000.0],
+    })
+    filas, grupos = anidado.anidar_lote(_indice(), trabajos)
+    assert list(filas[anidado.COLUMNA_ERROR]) == ["", motor.SIN_DATOS, motor.NUMEROS_INVALIDOS, anidado.FUERA_DE_HOJA]
+    assert filas["costo_peso_anidado"].notna().tolist() == [True, False, False, False]
+    assert [g.piezas for g in grupos] == [1]
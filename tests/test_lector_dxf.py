@@ -0,0 +1,119 @@
+import math
+
+import pytest
+
+import lector_dxf
+import motor
+
+
+def _dxf(*entidades, cabecera=()):
+    # Texto DXF mínimo: pares (código, valor) por entidad
+    lineas = []
+    if cabecera:
+        lineas += ["0", "SECTION", "2", "HEADER"]
+        for codigo, valor in cabecera:
+            lineas += [str(codigo), str(valor)]
+        lineas += ["0", "ENDSEC"]
+    lineas += ["0", "SECTION", "2", "ENTITIES"]
+    for tipo, pares in entidades:
+        lineas += ["0", tipo]
+        for codigo, valor in pares:
+            lineas += [str(codigo), str(valor)]
+    lineas += ["0", "ENDSEC", "0", "EOF"]
+    return "\n".join(lineas) + "\n"
+
+
+def _linea(x1, y1, x2, y2):
+    return "LINE", [(10, x1), (20, y1), (11, x2), (21, y2)]
+
+
+def _circulo(cx, cy, r):
+    return "CIRCLE", [(10, cx), (20, cy), (40, r)]
+
+
+def _lwpolilinea(vertices, cerrada=True):
+    pares = [(70, 1 if cerrada else 0)]
+    for vertice in vertices:
+        x, y, *bulge = vertice
+        pares += [(10, x), (20, y)] + ([(42, bulge[0])] if bulge else [])
+    return "LWPOLYLINE", pares
+
+
+def _leer(tmp_path, texto):
+    ruta = tmp_path / "pieza.dxf"
+    ruta.write_text(texto)
+    return lector_dxf.leer_dxf(str(ruta))
+
+
+def test_cadena_de_lineas_que_se_cierra(tmp_path):
+    geometria = _leer(tmp_path, _dxf(_linea(0, 0, 10, 0), _linea(10, 0, 10, 20),
+                                     _linea(10, 20, 0, 20), _linea(0, 20, 0, 0)))
+    assert geometria.perimetro == pytest.approx(60)
+    assert (geometria.contornos, geometria.abiertos, geometria.aujeros) == (1, 0, 0)
+    assert (geometria.ancho, geometria.largo) == (pytest.approx(10), pytest.approx(20))
+    assert geometria.entidades == 4
+
+
+def test_cadena_abierta(tmp_path):
+    geometria = _leer(tmp_path, _dxf(_linea(0, 0, 10, 0), _linea(10, 0, 10, 20)))
+    assert (geometria.contornos, geometria.abiertos) == (0, 1)
+    assert len(geometria.inicios) == 1
+
+
+def test_bulge_dos_semicirculos(tmp_path):
+    # bulge 1 = semicírculo: dos tramos forman un círculo de radio 5
+    geometria = _leer(tmp_path, _dxf(_lwpolilinea([(0, 0, 1), (10, 0, 1)])))
+    assert geometria.perimetro == pytest.approx(10 * math.pi)
+    assert (geometria.ancho, geometria.largo) == (pytest.approx(10), pytest.approx(10))
+    assert geometria.contornos == 1
+
+
+def test_bulge_negativo_va_hacia_el_otro_lado(tmp_path):
+    # Semicírculo horario de (0, 0) a (10, 0): queda por encima de la cuerda
+    geometria = _leer(tmp_path, _dxf(_lwpolilinea([(0, 0, -1), (10, 0)], cerrada=False)))
+    assert geometria.perimetro == pytest.approx(5 * math.pi)
+    assert geometria.largo == pytest.approx(5)
+
+
+def test_caja_de_arco_que_cruza_cero_grados(tmp_path):
+    geometria = _leer(tmp_path, _dxf(("ARC", [(10, 0), (20, 0), (40, 10), (50, 350), (51, 10)])))
+    assert geometria.perimetro == pytest.approx(10 * math.radians(20))
+    # El punto a 0° (x = 10) es el extremo derecho aunque no sea un extremo del arco
+    assert geometria.ancho == pytest.approx(10 - 10 * math.cos(math.radians(10)))
+    assert geometria.largo == pytest.approx(2 * 10 * math.sin(math.radians(10)))
+
+
+def test_agujeros_dentro_del_contorno(tmp_path):
+    geometria = _leer(tmp_path, _dxf(_lwpolilinea([(0, 0), (100, 0), (100, 50), (0, 50)]),
+                                     _circulo(20, 25, 5), _circulo(80, 25, 5), _circulo(300, 25, 5)))
+    # El tercer círculo está fuera de la placa: es otro contorno exterior
+    assert (geometria.contornos, geometria.aujeros) == (4, 2)
+    assert geometria.perimetro == pytest.approx(300 + 3 * 10 * math.pi)
+
+
+def test_unidades_de_la_cabecera(tmp_path):
+    geometria = _leer(tmp_path, _dxf(_circulo(0, 0, 1), cabecera=[(9, "$INSUNITS"), (70, 1)]))
+    assert geometria.ancho == pytest.approx(2 * 25.4)
+
+
+def test_entidades_no_soportadas_se_cuentan(tmp_path):
+    geometria = _leer(tmp_path, _dxf(_circulo(0, 0, 1), ("TEXT", [(1, "hola")]), ("SPLINE", [])))
+    assert geometria.ignoradas == {"SPLINE": 1, "TEXT": 1}
+
+
+@pytest.mark.parametrize("texto", [
+    "0\nSECTION\n2\nHEADER\n0\nENDSEC\n0\nEOF\n",         # sin ENTITIES
+    _dxf(("TEXT", [(1, "sólo texto")])),                   # nada que cortar
+    _dxf(_linea(0, 0, 10, "abc")),                        # número inválido
+    _dxf(_lwpolilinea([(0, 0), ("x", 1)])),               # número inválido en una polilínea
+    "X\nSECTION\n",                                        # código de grupo inválido
+    "AutoCAD Binary DXF\r\n\x1a\x00",                      # binario
+])
+def test_archivos_malformados(tmp_path, texto):
+    with pytest.raises(motor.ErrorPresupuesto):
+        _leer(tmp_path, texto)
+
+
+def test_archivo_inexistente(tmp_path):
+    with pytest.raises(motor.ErrorPresupuesto):
+        lector_dxf.leer_dxf(str(tmp_path / "no_existe.dxf"))
@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import motor
+import planificador
+import tarifas
+
+VALORES = {"neto_pack": 10.0, "costo_pack": 50.0, "costo_maquina": 60.0, "costo_operario": 25.0}
+
+
+def _maquina(nombre, cw, materiales=("Acero", "Inox"), costo_maquina=60.0):
+    filas = [tarifas.FilaTarifa(material, espesor, cw / espesor, 0.001, 0.002, 10.0, 20.0)
+             for material in materiales for espesor in (1.0, 2.0, 3.0)]
+    return planificador.Maquina(nombre, tarifas.IndiceTarifas(filas), dict(VALORES, costo_maquina=costo_maquina))
+
+
+def _maquinas():
+    return [_maquina("rapida", 6000.0), _maquina("lenta", 3000.0, costo_maquina=40.0),
+            _maquina("solo_acero", 4500.0, materiales=("Acero",))]
+
+
+def _trabajos(cantidad, semilla=0):
+    generador = np.random.default_rng(semilla)
+    return pd.DataFrame({
+        "Material": generador.choice(["Acero", "Inox"], cantidad),
+        "Espesor": generador.choice([1.0, 2.0, 3.0], cantidad),
+        "perimetro": generador.uniform(500, 20_000, cantidad).round(1),
+        "aujeros": generador.integers(0, 50, cantidad),
+        "ancho": generador.uniform(100, 1000, cantidad).round(1),
+        "largo": generador.uniform(100, 2000, cantidad).round(1),
+        "cantidad": generador.integers(1, 20, cantidad),
+    })
+
+
+def _comprobar(plan, maquinas, trabajos, horas, cambio_material, cambio_espesor):
+    familia, material = planificador.familias(trabajos)
+    assert len(trabajos) == len(plan.asignacion)
+    fines = np.zeros(len(plan.maquinas))
+    for k in range(len(plan.maquinas)):
+        filas = np.flatnonzero(plan.asignacion == k)
+        filas = filas[np.argsort(plan.posicion[filas])]
+        assert plan.posicion[filas].tolist() == list(range(1, len(filas) + 1))
+        assert np.allclose(plan.horas[filas], horas[filas, k])
+        # Cada trabajo empieza cuando termina el anterior más el cambio de material o espesor
+        anterior_fin, anterior = 0.0, None
+        for fila in filas:
+            cambio = 0.0
+            if anterior is not None and familia[fila] != familia[anterior]:
+                cambio = cambio_material if material[fila] != material[anterior] else cambio_espesor
+            assert plan.inicio[fila] == pytest.approx(anterior_fin + cambio)
+            assert plan.fin[fila] == pytest.approx(plan.inicio[fila] + plan.horas[fila])
+            anterior_fin, anterior = plan.fin[fila], fila
+        fines[k] = anterior_fin
+        assert plan.corte[k] + plan.preparacion[k] == pytest.approx(anterior_fin)
+    assert plan.makespan == pytest.approx(fines.max())
+    assert plan.costo_preparacion == pytest.approx(
+        sum(p * m.valores["costo_maquina"] for p, m in zip(plan.preparacion, maquinas)))
+
+
+@pytest.mark.parametrize("objetivo", planificador.OBJETIVOS)
+@pytest.mark.parametrize("limite_s", [0, 1.0])
+def test_makespan_coherente(objetivo, limite_s):
+    maquinas, trabajos = _maquinas(), _trabajos(60, semilla=1)
+    horas, _, _ = planificador.matrices(maquinas, trabajos)
+    plan = planificador.planificar(maquinas, trabajos, 0.5, 0.1, objetivo=objetivo, limite_s=limite_s)
+    assert (plan.asignacion >= 0).all()
+    # Ningún trabajo va a una máquina que no puede cortarlo
+    assert np.isfinite(horas[np.arange(len(trabajos)), plan.asignacion]).all()
+    assert not (plan.asignacion[trabajos["Material"].to_numpy() == "Inox"] == 2).any()
+    _comprobar(plan, maquinas, trabajos, horas, 0.5, 0.1)
+
+
+def test_mejora_no_empeora():
+    maquinas, trabajos = _maquinas(), _trabajos(80, semilla=2)
+    inicial = planificador.planificar(maquinas, trabajos, limite_s=0)
+    mejorado = planificador.planificar(maquinas, trabajos, limite_s=1.0)
+    assert mejorado.makespan <= inicial.makespan + 1e-9
+    inicial = planificador.planificar(maquinas, trabajos, objetivo="costo", limite_s=0)
+    mejorado = planificador.planificar(maquinas, trabajos, objetivo="costo", limite_s=1.0)
+    assert mejorado.costo_total <= inicial.costo_total + 1e-6
+
+
+def test_plazo_con_objetivo_costo():
+    maquinas, trabajos = _maquinas(), _trabajos(40, semilla=3)
+    libre = planificador.planificar(maquinas, trabajos, objetivo="costo", limite_s=0.5)
+    plazo = libre.makespan / 2
+    plan = planificador.planificar(maquinas, trabajos, objetivo="costo", limite_s=0.5, plazo_h=plazo)
+    assert (plan.corte + plan.preparacion <= plazo + 1e-9).all()
+    assert plan.costo_total >= libre.costo_total - 1e-6
+
+
+def test_trabajos_sin_maquina():
+    maquinas = _maquinas()
+    trabajos = _trabajos(5)
+    trabajos.loc[[1, 3], "Material"] = "Nope"
+    plan = planificador.planificar(maquinas, trabajos, limite_s=0.5)
+    assert plan.asignacion[[1, 3]].tolist() == [-1, -1]
+    assert plan.errores[1] == motor.SIN_DATOS and plan.errores[0] == ""
+    assert np.isnan(plan.horas[[1, 3]]).all() and plan.posicion[[1, 3]].tolist() == [0, 0]
+    assert plan.orden_de_corte()[-2:].tolist() == [1, 3]
+
+
+def test_ningun_trabajo_se_puede_cortar():
+    trabajos = _trabajos(3)
+    trabajos["Material"] = "Nope"
+    plan = planificador.planificar(_maquinas(), trabajos, limite_s=0.5)
+    assert (plan.asignacion == -1).all()
+    assert plan.makespan == 0.0 and plan.costo_total == 0.0
+    assert plan.utilizacion().tolist() == [0.0, 0.0, 0.0]
+
+
+def test_sin_trabajos():
+    plan = planificador.planificar(_maquinas(), _trabajos(0), limite_s=0.5)
+    assert len(plan.asignacion) == 0 and plan.makespan == 0.0
+    assert plan.tabla().empty
+    assert len(plan.resumen()) == 4
+
+
+def test_errores_de_uso():
+    with pytest.raises(motor.ErrorPresupuesto):
+        planificador.planificar([], _trabajos(3))
+    with pytest.raises(motor.ErrorPresupuesto):
+        planificador.planificar(_maquinas(), _trabajos(3), objetivo="rapido")
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+import motor
+import recorrido
+
+
+def _puntos(cantidad, semilla=0):
+    return np.random.default_rng(semilla).uniform(0, 1000, size=(cantidad, 2))
+
+
+@pytest.mark.parametrize("cantidad", [1, 2, 5, 40, 300])
+def test_orden_es_permutacion_y_no_empeora(cantidad):
+    puntos = _puntos(cantidad, semilla=cantidad)
+    inicial, distancia_inicial = recorrido.ordenar(puntos, limite_s=0)
+    orden, distancia = recorrido.ordenar(puntos, limite_s=5.0)
+    assert sorted(inicial) == list(range(cantidad))
+    assert sorted(orden) == list(range(cantidad))
+    assert distancia == pytest.approx(recorrido.longitud(puntos, orden))
+    assert distancia_inicial == pytest.approx(recorrido.longitud(puntos, inicial))
+    assert distancia <= distancia_inicial + 1e-6
+
+
+def test_puntos_en_linea():
+    # Sobre una recta desde el origen el mejor recorrido es ir en orden
+    puntos = [(x, 0.0) for x in (30.0, 10.0, 50.0, 20.0, 40.0)]
+    orden, distancia = recorrido.ordenar(puntos, limite_s=1.0)
+    assert orden == [1, 3, 0, 4, 2]
+    assert distancia == pytest.approx(50.0)
+
+
+def test_puntos_repetidos():
+    puntos = [(5.0, 5.0)] * 4 + [(100.0, 0.0)]
+    orden, distancia = recorrido.ordenar(puntos, limite_s=1.0)
+    assert sorted(orden) == list(range(5))
+    assert distancia == pytest.approx(recorrido.longitud(puntos, orden))
+
+
+def test_inicio_fuera_del_origen():
+    puntos = _puntos(50, semilla=3)
+    orden, distancia = recorrido.ordenar(puntos, inicio=(1000.0, 1000.0), limite_s=1.0)
+    assert sorted(orden) == list(range(50))
+    assert distancia == pytest.approx(recorrido.longitud(puntos, orden, inicio=(1000.0, 1000.0)))
+
+
+def test_sin_puntos():
+    assert recorrido.ordenar([]) == ([], 0.0)
+    assert recorrido.ordenar(np.empty((0, 2))) == ([], 0.0)
+
+
+def test_vecinos_cercanos():
+    xs, ys = _puntos(200, semilla=1).T
+    vecinos = recorrido.vecinos_cercanos(xs, ys, k=4)
+    assert vecinos.shape == (200, 4)
+    assert not (vecinos == np.arange(200)[:, None]).any()
+    assert recorrido.vecinos_cercanos(np.array([1.0]), np.array([1.0])).shape == (1, 0)
+
+
+def test_tiempo_desplazamiento():
+    assert recorrido.tiempo_desplazamiento(60_000, velocidad_m_min=60) == pytest.approx(1 / 60)
+    with pytest.raises(motor.ErrorPresupuesto):
+        recorrido.tiempo_desplazamiento(100, velocidad_m_min=0)
+
+
+def test_leer_puntos(tmp_path):
+    ruta = tmp_path / "agujeros.csv"
+    ruta.write_text("X,Y\n1,2\n3,4\n")
+    assert recorrido.leer_puntos(str(ruta)).tolist() == [[1.0, 2.0], [3.0, 4.0]]
+    ruta.write_text("x\n1\n")
+    with pytest.raises(motor.ErrorPresupuesto, match="y"):
+        recorrido.leer_puntos(str(ruta))
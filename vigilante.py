@@ -0,0 +1,53 @@
+"""Vigilancia del archivo de tarifas mientras la ventana está abierta.
+
+Los presupuestistas editan date.ods con LibreOffice con la aplicación
+abierta. Cada `intervalo_ms` se revisa (mtime, tamaño) del archivo con
+`after`, en el hilo de Tk: es un stat, no bloquea, y funciona igual en
+Linux, Windows y macOS sin inotify. Al guardar, LibreOffice reescribe el
+archivo en varios pasos; sólo se avisa cuando la firma nueva se repite en
+dos revisiones seguidas, es decir, cuando el archivo dejó de cambiar.
+"""
+import tarifas
+
+
+class Vigilante:
+    def __init__(self, raiz, obtener_ruta, al_cambiar, intervalo_ms=1000):
+        """obtener_ruta() da el archivo a vigilar en cada revisión (puede
+        cambiar si el usuario elige otro); al_cambiar(ruta) se llama en el
+        hilo de Tk cuando ese archivo se modificó."""
+        self.raiz = raiz
+        self.obtener_ruta = obtener_ruta
+        self.al_cambiar = al_cambiar
+        self.intervalo_ms = intervalo_ms
+        self.ruta = None
+        self.firma = None
+        self.candidata = None
+        self._pendiente = None
+
+    def iniciar(self):
+        if self._pendiente is None:
+            self._pendiente = self.raiz.after(self.intervalo_ms, self._revisar)
+
+    def detener(self):
+        if self._pendiente is not None:
+            self.raiz.after_cancel(self._pendiente)
+            self._pendiente = None
+
+    def _revisar(self):
+        self._pendiente = None
+        ruta = self.obtener_ruta()
+        try:
+            firma = tarifas.firma(ruta)
+        except OSError:
+            firma = None  # a mitad de un guardado el archivo puede no existir
+
+        if ruta != self.ruta:
+            # Archivo nuevo: quien lo eligió ya lo está cargando
+            self.ruta, self.firma, self.candidata = ruta, firma, None
+        elif firma is not None and firma != self.firma:
+            if firma == self.candidata:
+                self.firma, self.candidata = firma, None
+                self.al_cambiar(ruta)
+            else:
+                self.candidata = firma
+        self.iniciar()